@@ -0,0 +1,275 @@
+# pylint: disable=missing-module-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-class-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-function-docstring  # чтобы не быть Капитаном Очевидностью
+# pylint: disable=line-too-long               # строки с ожидаемым выводом
+
+import time
+from collections import namedtuple
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy
+
+from components import IOMemoryCell, Register
+from emulator import ALU_RESULT_SAVE_CELL, FETCH, INSTRUCTION_SAVE_CELL, MICROCODE, SKIP
+from isa import IMMEDIATE_SOURCES, REGISTER_PORTS, Opcode, extract, to_words
+from machine import INTERRUPT_PROGRAM, INTERRUPT_VECTOR
+from schedule import TokenSchedule
+
+# Последовательности управляющих слов: инструкции из MICROCODE, пропуск перехода, HALT и неизвестный опкод
+SEQUENCES: List[Tuple[Tuple[int, ...], ...]] = [MICROCODE[opcode] for opcode in sorted(MICROCODE)] + [SKIP]
+SKIP_SEQUENCE = len(SEQUENCES) - 1
+HALT_SEQUENCE = len(SEQUENCES)
+ERROR_SEQUENCE = HALT_SEQUENCE + 1
+SEQUENCE_COUNT = ERROR_SEQUENCE + 1
+MAX_SEQUENCE_LENGTH = max(len(words) for words in SEQUENCES)
+
+# CONTROL[последовательность, такт инструкции]: такт 0 -- выборка, далее слова последовательности
+CONTROL = numpy.zeros((SEQUENCE_COUNT, MAX_SEQUENCE_LENGTH + 1, len(FETCH)), dtype=numpy.int64)
+CONTROL[:, 0] = FETCH
+for _sequence, _words in enumerate(SEQUENCES):
+    CONTROL[_sequence, 1:len(_words) + 1] = _words
+# Число слов; у HALT и ошибки инструкция не завершается, а снимает экземпляр
+LENGTHS = numpy.array([len(words) for words in SEQUENCES] + [MAX_SEQUENCE_LENGTH + 1] * 2, dtype=numpy.int64)
+
+# DECODE[opcode, ZF, PF] -- последовательность, как ControlUnit._transition_table
+DECODE = numpy.full((16, 2, 2), ERROR_SEQUENCE, dtype=numpy.int64)
+for _sequence, _opcode in enumerate(sorted(MICROCODE)):
+    DECODE[_opcode] = _sequence
+DECODE[Opcode.HALT] = HALT_SEQUENCE
+DECODE[Opcode.JG] = SKIP_SEQUENCE
+DECODE[Opcode.JG, :, 1] = DECODE[Opcode.JMP, 0, 0]
+DECODE[Opcode.BNE] = DECODE[Opcode.JMP, 0, 0]
+DECODE[Opcode.BNE, 1] = SKIP_SEQUENCE
+DECODE[Opcode.BEQ] = SKIP_SEQUENCE
+DECODE[Opcode.BEQ, 1] = DECODE[Opcode.JMP, 0, 0]
+
+# Значения регистров держатся в int64: экземпляр, результат АЛУ которого выходит за 2 ** 62, снимается
+VALUE_LIMIT = 1 << 62
+
+
+class BatchResult(namedtuple('BatchResult', 'outputs ticks instructions registers errors elapsed')):
+    """Итог пакетного прогона по экземплярам: вывод, такты, инструкции, регистры, исключение или None."""
+
+    @property
+    def instructions_per_second(self) -> float:
+        """Пропускная способность в инструкциях экземпляров в секунду."""
+        return int(sum(self.instructions)) / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def token_arrays(schedules: Sequence[Iterable[Tuple[int, str]] | None]) -> Tuple[numpy.ndarray, numpy.ndarray]:
+    """Такты и коды токенов по экземплярам, дополненные тактом -1.
+
+    Токены одного такта сливаются в последний, как в IOHandler.receive_tokens.
+    """
+    collapsed: List[Dict[int, int]] = []
+    for schedule in schedules:
+        tokens: Dict[int, int] = {}
+        for token_tick, token_value in TokenSchedule(schedule):
+            tokens[token_tick] = ord(token_value)
+        collapsed.append(tokens)
+
+    width = max((len(tokens) for tokens in collapsed), default=0) + 1
+    ticks = numpy.full((len(collapsed), width), -1, dtype=numpy.int64)
+    values = numpy.zeros((len(collapsed), width), dtype=numpy.int64)
+    for row, tokens in enumerate(collapsed):
+        ticks[row, :len(tokens)] = list(tokens)
+        values[row, :len(tokens)] = list(tokens.values())
+    return ticks, values
+
+
+class BatchEmulator():
+    """Много экземпляров машины с одной программой и разными расписаниями ввода, такт за тактом вместе.
+
+    Состояние экземпляра -- строка массивов NumPy формы (N, ...), такт -- одни и те же операции
+    над всеми строками, ветвления, ввод-вывод и прерывания выбираются масками.
+    Такты повторяют Emulator._do_tick и ControlUnit.start, поэтому вывод и число тактов
+    совпадают с моделью fast. Экземпляры, дошедшие до HALT или ошибки, выбывают, массивы сжимаются.
+    """
+
+    # Массивы состояния, строка -- экземпляр
+    STATE: Tuple[str, ...] = ('ids', 'pc', 'ir', 'alu_result', 'rd2', 'zero_flag', 'positive_flag', 'tick',
+                              'dip_value', 'interrupt_request', 'in_interrupt', 'sequence', 'position',
+                              'saved_sequence', 'saved_position', 'instructions', 'token_position',
+                              'token_ticks', 'token_values', 'registers', 'memory')
+
+    def __init__(self, program: Sequence[int], schedules: Sequence[Iterable[Tuple[int, str]] | None],
+                 text_start_adr: int = 0, is_interrupts_allowed: bool = False, memory_size: int = 512,
+                 interrupt_program: Sequence[int] = (), interrupt_vector: int = 0) -> None:
+        count = len(schedules)
+        assert count > 0, 'Batch is empty'
+        assert memory_size > max(len(program), interrupt_vector + len(interrupt_program)), 'Impossible to accommodate the program'
+        self.is_interrupts_allowed = is_interrupts_allowed
+
+        image = numpy.zeros(memory_size, dtype=numpy.int32)
+        image[:len(program)] = to_words(program)
+        image[interrupt_vector:interrupt_vector + len(interrupt_program)] = to_words(interrupt_program)
+        self.memory = numpy.tile(image, (count, 1))
+        self.registers = numpy.zeros((count, len(Register)), dtype=numpy.int64)
+        self.registers[:, Register.x6] = interrupt_vector
+
+        self.ids = numpy.arange(count)
+        self.pc = numpy.full(count, text_start_adr, dtype=numpy.int64)
+        for name in ['ir', 'alu_result', 'rd2', 'zero_flag', 'positive_flag', 'tick', 'dip_value',
+                     'interrupt_request', 'in_interrupt', 'position', 'saved_sequence', 'saved_position',
+                     'instructions', 'token_position']:
+            setattr(self, name, numpy.zeros(count, dtype=numpy.int64))
+        self.sequence = numpy.full(count, ERROR_SEQUENCE, dtype=numpy.int64)
+        self.token_ticks, self.token_values = token_arrays(schedules)
+
+        self.outputs: List[List[int]] = [[] for _ in range(count)]
+        self.ticks = numpy.zeros(count, dtype=numpy.int64)
+        self.instruction_counts = numpy.zeros(count, dtype=numpy.int64)
+        self.final_registers = numpy.zeros((count, len(Register)), dtype=numpy.int64)
+        self.errors: List[Exception | None] = [None] * count
+        self._rows = numpy.arange(count)
+        self._failed = numpy.zeros(count, dtype=bool)
+
+    @property
+    def active(self) -> int:
+        return len(self.ids)
+
+    def _fail(self, mask: numpy.ndarray, error: Exception) -> None:
+        mask = mask & ~self._failed
+        for instance in self.ids[mask].tolist():
+            self.errors[instance] = error
+        self._failed |= mask
+
+    def _retire(self, mask: numpy.ndarray) -> None:
+        instances = self.ids[mask]
+        self.ticks[instances] = self.tick[mask]
+        self.instruction_counts[instances] = self.instructions[mask]
+        self.final_registers[instances] = self.registers[mask]
+
+        keep = ~mask
+        for name in self.STATE:
+            setattr(self, name, getattr(self, name)[keep])
+        self._rows = numpy.arange(len(self.ids))
+
+    def _do_tick(self) -> None:
+        rows, registers, memory = self._rows, self.registers, self.memory
+        pc_write, adr_src, io_op, ir_write, wd_src, imm_src, alu_control, alu_src_b, alu_src_a, reg_write, edit_flags = \
+            CONTROL[self.sequence, self.position].T
+        self._failed = numpy.zeros(len(rows), dtype=bool)
+        self.tick += 1
+
+        self.pc = pc = numpy.where(pc_write != 0, self.alu_result, self.pc)
+        address = numpy.where(adr_src != 0, self.alu_result, pc)
+        # Отрицательный адрес, как и в списке Python, отсчитывается с конца памяти
+        out_of_memory = (address >= memory.shape[1]) | (address < -memory.shape[1])
+        self._fail(out_of_memory, AssertionError('Memory out'))
+        read_data = memory[rows, numpy.where(out_of_memory, 0, address)].astype(numpy.int64)
+
+        io = io_op != 0
+        read_data = numpy.where(io & (address == IOMemoryCell.IN), self.dip_value, read_data)
+        written = io & (address == IOMemoryCell.OUT) & ~out_of_memory
+        if written.any():
+            for instance, value in zip(self.ids[written].tolist(), self.rd2[written].tolist()):
+                self.outputs[instance].append(value)
+            self.dip_value = numpy.where(written, self.rd2, self.dip_value)
+        self._fail(~io & ((address == IOMemoryCell.IN) | (address == IOMemoryCell.OUT)),
+                   AttributeError('Unsopported operation on memory cell'))
+
+        arrived = self.token_ticks[rows, self.token_position] == self.tick
+        if arrived.any():
+            self.interrupt_request = self.interrupt_request | arrived
+            self.dip_value = numpy.where(arrived, self.token_values[rows, self.token_position], self.dip_value)
+            self.token_position = self.token_position + arrived
+
+        self.ir = instr = numpy.where(ir_write != 0, read_data, self.ir)
+
+        write = reg_write != 0
+        target = extract(instr, REGISTER_PORTS['A3'])
+        stored = write & (target != 0)
+        if stored.any():
+            registers[rows[stored], target[stored]] = numpy.where(wd_src != 0, self.alu_result, read_data)[stored]
+        # RD1 не обновляется, но во всех тактах записи ALUSrcA = 1
+        rd1 = numpy.where(write, 0, registers[rows, extract(instr, REGISTER_PORTS['A1'])])
+        self.rd2 = rd2 = numpy.where(write, self.rd2, registers[rows, extract(instr, REGISTER_PORTS['A2'])])
+
+        imm = numpy.choose(imm_src, [extract(instr, fields) for fields in IMMEDIATE_SOURCES.values()])
+        src_a = numpy.where(alu_src_a != 0, pc, rd1)
+        src_b = numpy.choose(alu_src_b, (rd2, imm, 1, 0))
+
+        divided = (alu_control == 2) | (alu_control == 4)
+        by_zero = divided & (src_b == 0)
+        self._fail(by_zero, ZeroDivisionError('integer division or modulo by zero'))
+        divisor = numpy.where(src_b == 0, 1, src_b)
+        multiplied = alu_control == 3
+        overflow = multiplied & (numpy.abs(src_a.astype(numpy.float64) * src_b) >= VALUE_LIMIT)
+        result = numpy.select([alu_control == 0, alu_control == 1, alu_control == 2, multiplied],
+                              [src_a + src_b, src_b - src_a, src_a % divisor, numpy.where(overflow, 0, src_a) * src_b],
+                              src_a // divisor)
+        self._fail(overflow | (numpy.abs(result) >= VALUE_LIMIT), OverflowError('ALU result does not fit in int64'))
+        self.alu_result = result
+
+        flags = edit_flags != 0
+        self.zero_flag = numpy.where(flags, result == 0, self.zero_flag)
+        self.positive_flag = numpy.where(flags, result > 0, self.positive_flag)
+
+    def _advance(self) -> numpy.ndarray:
+        """Переход между тактами инструкции, прерывания и HALT; маска выбывающих экземпляров."""
+        rows = self._rows
+        self.position = position = self.position + 1
+
+        fetched = position == 1
+        self.sequence = numpy.where(fetched, DECODE[self.ir & 15, self.zero_flag, self.positive_flag], self.sequence)
+
+        if self.is_interrupts_allowed:
+            entering = (self.in_interrupt == 0) & (self.interrupt_request == 1) & ~self._failed
+            if entering.any():
+                # DataPath.enter_interrupt, прерванная инструкция продолжится после HALT обработчика
+                self.interrupt_request = numpy.where(entering, 0, self.interrupt_request)
+                self.in_interrupt = self.in_interrupt | entering
+                self.saved_sequence = numpy.where(entering, self.sequence, self.saved_sequence)
+                self.saved_position = numpy.where(entering, position, self.saved_position)
+                entered = rows[entering]
+                self.registers[entered, Register.x7] = self.pc[entering]
+                self.pc = numpy.where(entering, self.registers[:, Register.x6], self.pc)
+                self.memory[entered, ALU_RESULT_SAVE_CELL] = self.alu_result[entering].astype(numpy.int32)
+                self.memory[entered, INSTRUCTION_SAVE_CELL] = self.ir[entering].astype(numpy.int32)
+                self.position = position = numpy.where(entering, 0, position)
+
+            exiting = (position == 1) & (self.sequence == HALT_SEQUENCE) & (self.in_interrupt == 1)
+            if exiting.any():
+                # DataPath.exit_interrupt
+                self.in_interrupt = numpy.where(exiting, 0, self.in_interrupt)
+                self.pc = numpy.where(exiting, self.registers[:, Register.x7], self.pc)
+                self.alu_result = numpy.where(exiting, self.memory[:, ALU_RESULT_SAVE_CELL], self.alu_result)
+                self.ir = numpy.where(exiting, self.memory[:, INSTRUCTION_SAVE_CELL], self.ir)
+                self.sequence = numpy.where(exiting, self.saved_sequence, self.sequence)
+                self.position = position = numpy.where(exiting, self.saved_position, position)
+
+        decoded = position == 1
+        halted = decoded & (self.sequence == HALT_SEQUENCE)
+        unsupported = decoded & (self.sequence == ERROR_SEQUENCE) & ~self._failed
+        for instance, opcode in zip(self.ids[unsupported].tolist(), (self.ir[unsupported] & 15).tolist()):
+            self.errors[instance] = AttributeError('Unsupported opcode: ' + str(opcode))
+
+        completed = position > LENGTHS[self.sequence]
+        self.instructions = self.instructions + completed
+        self.position = numpy.where(completed, 0, position)
+        return halted | unsupported | self._failed
+
+    def run(self, max_ticks: int | None = None) -> BatchResult:
+        """Исполнять все экземпляры до HALT; после max_ticks оставшиеся снимаются с TimeoutError."""
+        start = time.perf_counter()
+        while self.active:
+            if max_ticks is not None and self.tick[0] >= max_ticks:
+                self._fail(numpy.ones(self.active, dtype=bool), TimeoutError(f'Tick limit {max_ticks} reached'))
+                self._retire(self._failed)
+                break
+            self._do_tick()
+            retired = self._advance()
+            if retired.any():
+                self._retire(retired)
+        return BatchResult(self.outputs, self.ticks.tolist(), self.instruction_counts.tolist(),
+                           self.final_registers.tolist(), self.errors, time.perf_counter() - start)
+
+
+def batch_simulation(program: Sequence[int], schedules: Sequence[Iterable[Tuple[int, str]] | None],
+                     text_start_adr: int = 0, is_interrupts_allowed: bool = False, memory_size: int = 512,
+                     max_ticks: int | None = None) -> BatchResult:
+    """Прогнать программу с каждым расписанием ввода, как fast_simulation, но всеми экземплярами сразу."""
+    emulator = BatchEmulator(program, schedules, text_start_adr, is_interrupts_allowed, memory_size,
+                             INTERRUPT_PROGRAM, INTERRUPT_VECTOR)
+    return emulator.run(max_ticks)
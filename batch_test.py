@@ -0,0 +1,52 @@
+# pylint: disable=missing-module-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-class-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-function-docstring  # чтобы не быть Капитаном Очевидностью
+# pylint: disable=line-too-long               # строки с ожидаемым выводом
+
+import unittest
+from batch import batch_simulation
+from machine import fast_simulation
+from testing import translate_example
+
+
+class BatchTests(unittest.TestCase):
+    """
+    1) Каждый экземпляр совпадает с моделью fast по выводу, тактам и регистрам
+    2) Ошибка снимает только свой экземпляр, остальные доходят до HALT
+    3) Ограничение тактов снимает зациклившиеся экземпляры
+    """
+
+    def test_Schedules_SameAsFast(self):
+        program = translate_example('cat')
+        schedules = [None, [], [(3, 'a'), (3, 'b'), (40, 'c')], [(1, 'x'), (9, 'y'), (17, 'z'), (25, 'w')]]
+
+        result = batch_simulation(program, schedules, 0, True)
+
+        for number, schedule in enumerate(schedules):
+            with self.subTest(schedule=schedule):
+                expected = fast_simulation(program, 0, True, int_tokens=schedule)
+                self.assertEqual(result.outputs[number], expected.output)
+                self.assertEqual(result.ticks[number], expected.ticks)
+                self.assertEqual(result.registers[number], expected.registers)
+                self.assertIsNone(result.errors[number])
+        self.assertGreater(result.instructions_per_second, 0)
+
+    def test_DivisionByZero_RetiresInstance(self):
+        program = translate_example('prob5')
+
+        result = batch_simulation(program, [None, []], 0, True)
+
+        self.assertIsInstance(result.errors[0], ZeroDivisionError)
+        self.assertIsNone(result.errors[1])
+        self.assertEqual(result.outputs[1], [232792560, 20, 232792560])
+        self.assertEqual(result.ticks[1], 2125)
+
+    def test_TickLimit_ThrowsTimeout(self):
+        result = batch_simulation([8], [None, None], max_ticks=50)
+
+        self.assertEqual(result.ticks, [50, 50])
+        self.assertIsInstance(result.errors[0], TimeoutError)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,278 @@
+# pylint: disable=missing-module-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-class-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-function-docstring  # чтобы не быть Капитаном Очевидностью
+# pylint: disable=line-too-long               # строки с ожидаемым выводом
+
+import glob
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, Iterator, List
+
+from batch import batch_simulation
+from isa import read_image
+from logpipe import LogPipeline
+from machine import ENGINES, DataPath, circuit_simulation, simulation
+from tracing import Tracer
+from translator import generate, lexical_analysis, translate
+from workload import WorkloadSpec, generate_workload, straight_line_source
+
+# Примеры и разрешены ли прерывания; prob5 идет последним
+EXAMPLES = (('hello', True), ('hello', False), ('cat', True), ('prob5', False))
+# Метрики, у которых меньше -- лучше; остальные -- пропускная способность
+LOWER_IS_BETTER = frozenset(['peak_rss_mb'])
+# Допустимое падение метрики в процентах для режима сравнения
+DEFAULT_THRESHOLD = 10.0
+
+
+def bench_lexer(filename: str = 'examples/prob5.asm', repeat: int = 2000) -> float:
+    """Скорость лексического анализа в МБ/с на исходнике, повторенном repeat раз."""
+    with open(filename, encoding='utf-8') as file:
+        code = file.read() * repeat
+
+    start = time.perf_counter()
+    lexical_analysis(code)
+    elapsed = time.perf_counter() - start
+
+    return len(code.encode()) / elapsed / 1e6
+
+
+def best_time(run: Callable[[], None], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def bench_logging(filename: str = 'examples/prob5.out', repeat: int = 10) -> tuple[float, float, float]:
+    """Время прогона в мс: без лога, с INFO-логом в файл синхронно и через фоновый поток (вместе с дозаписью)."""
+    image = read_image(filename)
+    program = image.words.tolist()
+
+    def logged(logs: str, asynchronous: bool) -> Callable[[], None]:
+        def run() -> None:
+            with LogPipeline(logs, asynchronous=asynchronous):
+                simulation(program, image.entry)
+        return run
+
+    with tempfile.TemporaryDirectory() as directory:
+        logs = os.path.join(directory, 'run.logs')
+        silent = best_time(lambda: simulation(program, image.entry), repeat)
+        synchronous = best_time(logged(logs, False), repeat)
+        asynchronous = best_time(logged(logs, True), repeat)
+
+    return silent * 1e3, synchronous * 1e3, asynchronous * 1e3
+
+
+def bench_tracing(filename: str = 'examples/prob5.out', repeat: int = 10) -> tuple[float, float]:
+    """Цена текстового лога и двоичной трассы в мс на прогон: лучшее время минус время без записи."""
+    image = read_image(filename)
+    program = image.words.tolist()
+
+    def traced() -> None:
+        with Tracer(os.path.join(directory, 'run.trace')) as tracer:
+            simulation(program, image.entry, tracer=tracer)
+
+    def logged() -> None:
+        with LogPipeline(os.path.join(directory, 'run.logs'), asynchronous=False):
+            simulation(program, image.entry)
+
+    with tempfile.TemporaryDirectory() as directory:
+        silent = best_time(lambda: simulation(program, image.entry), repeat)
+        text = best_time(logged, repeat)
+        trace = best_time(traced, repeat)
+
+    return (text - silent) * 1e3, (trace - silent) * 1e3
+
+
+def bench_events(examples: tuple[tuple[str, bool], ...] = EXAMPLES) -> Dict[str, tuple[int, int, int]]:
+    """Событийный такт на примерах: тактов, вычислений компонентов и пропущенных вычислений."""
+    counters: Dict[str, tuple[int, int, int]] = {}
+    for name, interrupts in examples:
+        image = read_image(f'examples/{name}.out')
+        data_paths: List[DataPath] = []
+        circuit_simulation(image.words.tolist(), image.entry, interrupts,
+                           instruction_hook=data_paths.append, event_driven=True)
+        scheduler = data_paths[-1].scheduler
+        counters[f'{name} (interrupts)' if interrupts else name] = (scheduler.ticks, scheduler.evaluated, scheduler.skipped)
+    return counters
+
+
+def bench_batch(filename: str = 'examples/prob5.out', instances: int = 1000) -> tuple[float, float]:
+    """Инструкций экземпляров в секунду: пакетная модель на instances расписаниях и модель fast по одному."""
+    image = read_image(filename)
+    program = image.words.tolist()
+    schedules = [[(tick, 'x')] for tick in range(1000, 1000 + instances)]
+
+    batch = batch_simulation(program, schedules, image.entry)
+    single = best_time(lambda: simulation(program, image.entry, engine='fast', int_tokens=schedules[0]), 10)
+    return batch.instructions_per_second, batch.instructions[0] / single
+
+
+def suite_programs() -> Dict[str, tuple[List[int], bool]]:
+    """Программы для замера моделей: примеры и prob5 с большим пределом (нагрузка подольше)."""
+    programs: Dict[str, tuple[List[int], bool]] = {}
+    for name, interrupts in EXAMPLES:
+        with open(f'examples/{name}.asm', encoding='utf-8') as file:
+            code = file.read()
+        _, words = translate(code)
+        programs[f'{name} (interrupts)' if interrupts else name] = (words, interrupts)
+    with open('examples/prob5.asm', encoding='utf-8') as file:
+        code = file.read()
+    assert 'addi x6, x0, 20' in code, 'prob5 limit is not found'
+    _, words = translate(code.replace('addi x6, x0, 20', 'addi x6, x0, 60'))
+    programs['prob5 (60)'] = (words, False)
+    _, words = translate(generate_workload(WorkloadSpec(10 ** 5)).source)
+    programs['workload (1e5)'] = (words, False)
+    return programs
+
+
+def bench_scaling(sizes: tuple[int, ...] = (10 ** 4, 10 ** 5, 10 ** 6), circuit_limit: int = 10 ** 5) -> Iterator[str]:
+    """Таблица масштабирования по размеру N, значения -- тысяч в секунду.
+
+    Трансляция линейной программы из N инструкций (лексер и генерация кода) и исполнение нагрузки
+    workload на N инструкций моделями fast и circuit (circuit -- до circuit_limit).
+    Стадия, время которой растет быстрее N, видна по падению значений.
+    """
+    yield f'{"N":>9} {"lex kB/s":>10} {"gen kwords/s":>13} {"fast kinstr/s":>14} {"circuit kinstr/s":>17}'
+    for size in sizes:
+        code = straight_line_source(size)
+        start = time.perf_counter()
+        tokens = lexical_analysis(code)
+        lexed = time.perf_counter()
+        generate(tokens)
+        generated = time.perf_counter()
+
+        workload = generate_workload(WorkloadSpec(size))
+        _, words = translate(workload.source)
+        rates = []
+        for engine in ('fast', 'circuit'):
+            if engine == 'circuit' and size > circuit_limit:
+                rates.append('-')
+                continue
+            start_run = time.perf_counter()
+            result = simulation(words, 0, False, workload.memory_size, engine, workload.schedule)
+            assert result.output == workload.output, f'{engine} output differs from workload expectation'
+            rates.append(f'{workload.instructions / (time.perf_counter() - start_run) / 1e3:.1f}')
+        yield (f'{size:9} {len(code) / (lexed - start) / 1e3:10.1f} {size / (generated - lexed) / 1e3:13.1f} '
+               f'{rates[0]:>14} {rates[1]:>17}')
+
+
+def commit_hash() -> str | None:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(repeat: int = 5, scale: int = 1, engines: tuple[str, ...] = ('fast', 'circuit')) -> Dict[str, object]:
+    """Замеры трансляции и моделей, лучшее из repeat; scale увеличивает объем исходников.
+
+    lex_mb_per_s и encode_words_per_s -- лексический анализ всех примеров и генерация кода для линейной
+    программы, <engine>_ticks_per_s и <engine>_instructions_per_s -- суммарно по suite_programs.
+    """
+    metrics: Dict[str, float] = {}
+    sources = []
+    for filename in sorted(glob.glob('examples/*.asm')):
+        with open(filename, encoding='utf-8') as file:
+            sources.append(file.read())
+    code = '\n'.join(sources) * (200 * scale)
+    metrics['lex_mb_per_s'] = len(code.encode()) / best_time(lambda: lexical_analysis(code), repeat) / 1e6
+
+    tokens = lexical_analysis(straight_line_source(5000 * scale))
+    words = len(generate(tokens)[1])
+    metrics['encode_words_per_s'] = words / best_time(lambda: generate(tokens), repeat)
+
+    programs = suite_programs()
+    for engine in engines:
+        ticks = instructions = 0
+        elapsed = 0.0
+        for words, interrupts in programs.values():
+            counter: List[int] = []
+            ticks += ENGINES[engine](words, 0, interrupts, instruction_hook=lambda _: counter.append(1)).ticks
+            # HALT, на котором останавливается программа, хук не видит
+            instructions += len(counter) + 1
+            elapsed += best_time(lambda: simulation(words, 0, interrupts, engine=engine), repeat)
+        metrics[f'{engine}_ticks_per_s'] = ticks / elapsed
+        metrics[f'{engine}_instructions_per_s'] = instructions / elapsed
+
+    # ru_maxrss в килобайтах на Linux и в байтах на macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    metrics['peak_rss_mb'] = rss / (1 << 20) if sys.platform == 'darwin' else rss / 1024
+    return {'commit': commit_hash(), 'python': platform.python_version(), 'platform': platform.platform(),
+            'repeat': repeat, 'scale': scale, 'metrics': metrics}
+
+
+def compare(baseline: Dict[str, float], current: Dict[str, float], threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """Метрики, просевшие относительно baseline больше чем на threshold процентов."""
+    regressions: List[str] = []
+    for name, base in baseline.items():
+        if name not in current or base == 0:
+            continue
+        value = current[name]
+        change = (value - base) / base * 100 if name in LOWER_IS_BETTER else (base - value) / base * 100
+        if change > threshold:
+            regressions.append(f'{name}: {base:.4g} -> {value:.4g} ({change:.1f}% worse)')
+    return regressions
+
+
+def read_results(filename: str) -> Dict[str, object]:
+    with open(filename, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def write_results(filename: str, results: Dict[str, object]) -> None:
+    with open(filename, 'w', encoding='utf-8') as file:
+        file.write(json.dumps(results, indent=4) + '\n')
+
+
+def main_suite(args) -> int:
+    """suite <results.json> -- записать замеры; compare <baseline.json> [results.json] [percent] -- сравнить.
+
+    Без results.json сравнение прогоняет замеры заново. Код возврата 1 -- есть просевшие метрики.
+    """
+    command, *args = args
+    if command == 'suite':
+        results = run_suite()
+        write_results(args[0], results)
+        for name, value in results['metrics'].items():
+            print(f'{name}: {value:.4g}')
+        return 0
+
+    baseline = read_results(args[0])
+    current = read_results(args[1]) if len(args) > 1 and args[1].endswith('.json') else run_suite()
+    percent = float(args[-1]) if len(args) > 1 and not args[-1].endswith('.json') else DEFAULT_THRESHOLD
+    regressions = compare(baseline['metrics'], current['metrics'], percent)
+    print(f'baseline {baseline["commit"]}, current {current["commit"]}, threshold {percent}%')
+    for line in regressions:
+        print('REGRESSION ' + line)
+    return 1 if regressions else 0
+
+
+def main(args):
+    if args and args[0] in ('suite', 'compare'):
+        sys.exit(main_suite(args))
+    if args and args[0] == 'scaling':
+        for line in bench_scaling(tuple(int(size) for size in args[1:]) or (10 ** 4, 10 ** 5, 10 ** 6)):
+            print(line)
+        return
+    print(f'lexer: {bench_lexer(*args[:1]):.2f} MB/s')
+    text, trace = bench_tracing()
+    print(f'tracing: text log +{text:.2f} ms, binary trace +{trace:.2f} ms per prob5 run')
+    silent, synchronous, asynchronous = bench_logging()
+    print(f'logging: silent {silent:.2f} ms, INFO to file {synchronous:.2f} ms, INFO through queue {asynchronous:.2f} ms per prob5 run')
+    batch, single = bench_batch()
+    print(f'batch: {batch:.0f} instance-instructions/s for 1000 prob5 schedules, fast engine {single:.0f} instructions/s')
+    for name, (ticks, evaluated, skipped) in bench_events().items():
+        print(f'events: {name}: {ticks} ticks, {evaluated} evaluations, {skipped} skipped ({skipped / (evaluated + skipped):.0%})')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,43 @@
+# pylint: disable=missing-module-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-class-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-function-docstring  # чтобы не быть Капитаном Очевидностью
+# pylint: disable=line-too-long               # строки с ожидаемым выводом
+
+import unittest
+from benchmark import compare, run_suite
+
+
+class BenchmarkSuiteTests(unittest.TestCase):
+    """
+    1) Падение пропускной способности больше порога -- регрессия
+    2) Для памяти регрессия -- рост, метрики без пары не сравниваются
+    3) Замеры содержат все метрики и коммит
+    """
+
+    def test_ThroughputDrop_Regression(self):
+        baseline = {'fast_ticks_per_s': 1000.0, 'lex_mb_per_s': 2.0}
+
+        self.assertEqual(compare(baseline, {'fast_ticks_per_s': 950.0, 'lex_mb_per_s': 3.0}), [])
+        regressions = compare(baseline, {'fast_ticks_per_s': 850.0, 'lex_mb_per_s': 2.0})
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith('fast_ticks_per_s: 1000 -> 850 (15.0% worse)'))
+        self.assertEqual(compare(baseline, {'fast_ticks_per_s': 850.0, 'lex_mb_per_s': 2.0}, threshold=20), [])
+
+    def test_PeakRss_LowerIsBetter(self):
+        baseline = {'peak_rss_mb': 100.0, 'circuit_ticks_per_s': 10.0}
+
+        self.assertEqual(compare(baseline, {'peak_rss_mb': 50.0}), [])
+        self.assertEqual(len(compare(baseline, {'peak_rss_mb': 120.0})), 1)
+
+    def test_Suite_AllMetricsAndCommit(self):
+        results = run_suite(repeat=1, engines=('fast',))
+
+        self.assertEqual(set(results['metrics']), {'lex_mb_per_s', 'encode_words_per_s', 'fast_ticks_per_s',
+                                                   'fast_instructions_per_s', 'peak_rss_mb'})
+        self.assertTrue(all(value > 0 for value in results['metrics'].values()))
+        self.assertIn('commit', results)
+        self.assertEqual(compare(results['metrics'], results['metrics']), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
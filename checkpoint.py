@@ -0,0 +1,166 @@
+# pylint: disable=missing-module-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-class-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-function-docstring  # чтобы не быть Капитаном Очевидностью
+# pylint: disable=line-too-long               # строки с ожидаемым выводом
+
+import struct
+import sys
+import zlib
+from array import array
+from typing import List, Sequence
+
+from isa import MEMORY_TYPECODE
+from machine import ControlUnit, DataPath
+from sinks import ListSink
+
+# Заголовок: сигнатура, версия, длина сжатого содержимого
+CHECKPOINT_MAGIC = b'CSACHKPT'
+CHECKPOINT_VERSION = 1
+HEADER = struct.Struct('<8sHI')
+
+
+def write_ints(buffer: bytearray, values: Sequence[int]) -> None:
+    """Длина и значения varint-ами с zigzag: значения регистров не ограничены шириной слова."""
+    for value in [len(values), *values]:
+        value = value << 1 if value >= 0 else (-value << 1) - 1
+        while value > 0x7F:
+            buffer.append(value & 0x7F | 0x80)
+            value >>= 7
+        buffer.append(value)
+
+
+def read_ints(data: memoryview, offset: int) -> tuple[List[int], int]:
+    """Список, записанный write_ints, и смещение после него."""
+    values: List[int] = []
+    count = None
+    while count is None or len(values) < count:
+        value, shift = 0, 0
+        while True:
+            byte = data[offset]
+            offset += 1
+            value |= (byte & 0x7F) << shift
+            shift += 7
+            if byte < 0x80:
+                break
+        value = value >> 1 if not value & 1 else -((value + 1) >> 1)
+        if count is None:
+            count = value
+        else:
+            values.append(value)
+    return values, offset
+
+
+class CheckpointReader():
+    """Последовательное чтение полей распакованного снимка."""
+
+    def __init__(self, payload: bytes) -> None:
+        self.data = memoryview(payload)
+        self.offset = 0
+
+    def ints(self) -> List[int]:
+        values, self.offset = read_ints(self.data, self.offset)
+        return values
+
+    def words(self) -> memoryview:
+        size, = self.ints()
+        start, self.offset = self.offset, self.offset + size
+        return self.data[start:self.offset]
+
+
+def snapshot(data_path: DataPath, control_unit: ControlUnit) -> bytes:
+    """Полное состояние машины между инструкциями в сжатом двоичном снимке.
+
+    Поля идут в порядке restore: DataPath, память, регистровый файл, порты компонентов, провода,
+    IOHandler (курсор расписания, вывод) и ControlUnit (регистры, контекст прерывания).
+    """
+    payload = bytearray()
+    write_ints(payload, [data_path.tick, int(data_path.in_interrupt), len(data_path.Memory.memory)])
+    memory = array(MEMORY_TYPECODE, data_path.Memory.memory)
+    if sys.byteorder != 'little':
+        memory.byteswap()
+    write_ints(payload, [len(memory) * memory.itemsize])
+    payload += memory.tobytes()
+
+    write_ints(payload, list(data_path.Register_File.inner_registers.values()))
+    write_ints(payload, [data_path.PC.state, data_path.IR.state])
+    for component in data_path.components.values():
+        write_ints(payload, component.values)
+    write_ints(payload, [wire.get() for wire in data_path.wires.values()])
+
+    io_handler = data_path.IO_Handler
+    write_ints(payload, [io_handler.tick_count, io_handler.dip_value, io_handler.schedule.consumed,
+                         io_handler.schedule.next_tick, io_handler.output.count])
+    write_ints(payload, io_handler.output.tokens())
+
+    # pylint: disable=protected-access
+    interrupted = control_unit._transition_table.index(control_unit._interrupted_words) \
+        if control_unit._interrupted_words else -1
+    write_ints(payload, [int(control_unit.in_interrupt_context), interrupted, control_unit._interrupted_position])
+    write_ints(payload, control_unit.values)
+    write_ints(payload, control_unit._context)
+
+    compressed = zlib.compress(bytes(payload))
+    return HEADER.pack(CHECKPOINT_MAGIC, CHECKPOINT_VERSION, len(compressed)) + compressed
+
+
+def restore(data: bytes, data_path: DataPath, control_unit: ControlUnit) -> None:
+    """Вернуть машину в состояние снимка.
+
+    data_path и control_unit создаются заново с тем же размером памяти, разрешением прерываний
+    и тем же источником расписания ввода: курсор расписания проматывается на число забранных токенов.
+    Чтобы продолжить с другим вводом, расписание IOHandler заменяется после restore.
+    Вывод восстанавливается в ListSink целиком, в остальных приемниках -- только счетчик.
+    """
+    magic, version, length = HEADER.unpack_from(data)
+    assert magic == CHECKPOINT_MAGIC, 'Not a checkpoint'
+    if version > CHECKPOINT_VERSION:
+        raise AttributeError('Unsupported checkpoint version: ' + str(version))
+    reader = CheckpointReader(zlib.decompress(data[HEADER.size:HEADER.size + length]))
+
+    tick, in_interrupt, memory_size = reader.ints()
+    assert memory_size == len(data_path.Memory.memory), 'Checkpoint memory size mismatch'
+    data_path.tick, data_path.in_interrupt = tick, bool(in_interrupt)
+    memory = array(MEMORY_TYPECODE)
+    memory.frombytes(reader.words())
+    if sys.byteorder != 'little':
+        memory.byteswap()
+    data_path.Memory.memory[:] = memory
+
+    for number, value in enumerate(reader.ints()):
+        data_path.Register_File.inner_registers[number] = value
+    data_path.PC.state, data_path.IR.state = reader.ints()
+    for component in data_path.components.values():
+        component.values[:] = reader.ints()
+    for wire, value in zip(data_path.wires.values(), reader.ints()):
+        wire.set(value)
+
+    io_handler = data_path.IO_Handler
+    io_handler.tick_count, io_handler.dip_value, consumed, next_tick, output_count = reader.ints()
+    schedule = io_handler.schedule
+    while schedule.consumed < consumed and schedule.next_tick != -1:
+        schedule.pop()
+    assert (schedule.consumed, schedule.next_tick) == (consumed, next_tick), 'Token schedule differs from checkpoint'
+    tokens = reader.ints()
+    if isinstance(io_handler.output, ListSink):
+        io_handler.output.values[:] = tokens
+    io_handler.output.count = output_count
+
+    # pylint: disable=protected-access
+    in_interrupt_context, interrupted, control_unit._interrupted_position = reader.ints()
+    control_unit.in_interrupt_context = bool(in_interrupt_context)
+    control_unit._interrupted_words = control_unit._transition_table[interrupted] if interrupted >= 0 else ()
+    control_unit.values[:] = reader.ints()
+    control_unit._context[:] = reader.ints()
+
+    if data_path.scheduler is not None:
+        data_path.scheduler.invalidate()
+
+
+def save_checkpoint(filename: str, data_path: DataPath, control_unit: ControlUnit) -> None:
+    with open(filename, 'wb') as file:
+        file.write(snapshot(data_path, control_unit))
+
+
+def load_checkpoint(filename: str, data_path: DataPath, control_unit: ControlUnit) -> None:
+    with open(filename, 'rb') as file:
+        restore(file.read(), data_path, control_unit)
@@ -0,0 +1,71 @@
+# pylint: disable=missing-module-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-class-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-function-docstring  # чтобы не быть Капитаном Очевидностью
+# pylint: disable=line-too-long               # строки с ожидаемым выводом
+
+import unittest
+from checkpoint import read_ints, restore, snapshot, write_ints
+from machine import build_machine, circuit_simulation, machine_result
+from testing import tick_state, translate_example
+
+
+def paused_machine(instructions: int, int_tokens=None):
+    """Машина hello с прерываниями, остановленная после заданного числа инструкций."""
+    control_unit, data_path = build_machine(translate_example('hello'), 0, True, int_tokens=int_tokens)
+    count = 0
+
+    def pause(_) -> None:
+        nonlocal count
+        count += 1
+        if count == instructions:
+            control_unit.pause_requested = True
+
+    control_unit.instruction_hook = pause
+    control_unit.start(data_path)
+    control_unit.instruction_hook = None
+    return control_unit, data_path
+
+
+class CheckpointTests(unittest.TestCase):
+    """
+    1) Значения любой величины и знака пишутся и читаются без потерь
+    2) Восстановленная машина совпадает с исходной и доходит до того же результата, в том числе из обработчика прерывания
+    3) Другое расписание ввода при восстановлении -- AssertionError
+    """
+
+    def test_Ints_RoundTrip(self):
+        values = [0, 1, -1, 63, -64, 4655851200, -(1 << 70), 1 << 100]
+        buffer = bytearray()
+
+        write_ints(buffer, values)
+
+        self.assertEqual(read_ints(memoryview(buffer), 0), (values, len(buffer)))
+
+    def test_Restore_SameRunToHalt(self):
+        expected = circuit_simulation(translate_example('hello'), 0, True)
+        in_handler = []
+        for instructions in [1, 3, 6, 20, 27]:
+            with self.subTest(instructions=instructions):
+                control_unit, data_path = paused_machine(instructions)
+                self.assertFalse(control_unit.halted)
+                restored_unit, restored_path = build_machine([], 0, True)
+
+                restore(snapshot(data_path, control_unit), restored_path, restored_unit)
+                in_handler.append(restored_unit.in_interrupt_context)
+                self.assertEqual(tick_state(restored_path), tick_state(data_path))
+
+                restored_unit.start(restored_path)
+                self.assertTrue(restored_unit.halted)
+                self.assertEqual(machine_result(restored_path), expected)
+        self.assertIn(True, in_handler)
+
+    def test_OtherSchedule_ThrowsAssert(self):
+        control_unit, data_path = paused_machine(20)
+        restored_unit, restored_path = build_machine([], 0, True, int_tokens=[(1, 'h')])
+
+        with self.assertRaises(AssertionError):
+            restore(snapshot(data_path, control_unit), restored_path, restored_unit)
+
+
+if __name__ == '__main__':
+    unittest.main()
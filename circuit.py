@@ -3,45 +3,217 @@
 # pylint: disable=missing-function-docstring  # чтобы не быть Капитаном Очевидностью
 # pylint: disable=line-too-long               # строки с ожидаемым выводом
 
-from typing import Dict, List
+import os
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, List, Set, Tuple
+
+# Отладочный режим: дополнительные проверки значений на каждом такте, включается CSA_DEBUG=1
+DEBUG = __debug__ and os.environ.get('CSA_DEBUG', '') not in ('', '0')
 
 
 class CircuitWire():
+    """Провод хранит значение в ячейке массива, по умолчанию собственного.
+
+    Компилятор netlist переносит значения всех проводов схемы в один общий массив.
+    """
+
+    __slots__ = ('_cells', '_slot')
+
     def __init__(self, val: int = 0) -> None:
-        self.value = val
+        self._cells: List[int] = [val]
+        self._slot = 0
+
+    def bind(self, cells: List[int], slot: int) -> None:
+        cells[slot] = self._cells[self._slot]
+        self._cells = cells
+        self._slot = slot
+
+    @property
+    def value(self) -> int:
+        return self._cells[self._slot]
+
+    @value.setter
+    def value(self, value: int) -> None:
+        self._cells[self._slot] = value
 
     def set(self, value: int) -> None:
-        self.value = value
+        self._cells[self._slot] = value
 
     def get(self) -> int:
-        return self.value
+        return self._cells[self._slot]
+
+
+class EventWire(CircuitWire):
+    """Провод событийной схемы: изменение значения помечает читателей в планировщике.
+
+    readers -- битовая маска позиций компонентов-читателей в порядке вычисления.
+    """
+
+    __slots__ = ('scheduler', 'readers')
+
+    def __init__(self, val: int = 0) -> None:
+        super().__init__(val)
+        self.scheduler = None
+        self.readers = 0
+
+    @property
+    def value(self) -> int:
+        return self._cells[self._slot]
+
+    @value.setter
+    def value(self, value: int) -> None:
+        self.set(value)
+
+    def set(self, value: int) -> None:
+        cells, slot = self._cells, self._slot
+        if cells[slot] != value:
+            cells[slot] = value
+            if self.readers:
+                self.scheduler.mark(self.readers)
+
+
+def wire_slice(wires: List[CircuitWire]) -> Tuple[List[int], slice] | None:
+    """Общий массив и срез, если провода лежат в нем подряд, иначе None."""
+    # pylint: disable=protected-access
+    cells = wires[0]._cells
+    start = wires[0]._slot
+    for offset, wire in enumerate(wires):
+        if wire._cells is not cells or wire._slot != start + offset:
+            return None
+    return cells, slice(start, start + len(wires))
+
+
+class PortNames():
+    """Имена локальных переменных портов компонента в сгенерированном коде такта."""
+
+    def __init__(self, component: str, slots: Dict[str, int], indices: Dict[str, int]) -> None:
+        self.component = component
+        self.slots = slots
+        self.indices = indices
+        self.used: Dict[str, str] = {}
+        # Выходы, которые шаблон выставляет на любом пути без исключения
+        self.driven: Set[str] = set()
+
+    def __getitem__(self, name: str) -> str:
+        return self.used.setdefault(name, f'{self.component}_{name}')
+
+    def value(self, name: str) -> str:
+        """Ячейка регистра порта в списке значений компонента."""
+        return f'{self.component}_values[{self.indices[name]}]'
+
+    def set(self, name: str, value: str, always: bool = False) -> str:
+        """Строка, повторяющая set_register: регистр, провод и локальная переменная."""
+        if always:
+            self.driven.add(name)
+        targets = [f'{self.component}_{name}', self.value(name)]
+        if name in self.slots:
+            targets.append(f'cells[{self.slots[name]}]')
+        return ' = '.join(targets) + f' = {value}'
+
+
+class RegisterView(MutableMapping):
+    """Регистры компонента по именам поверх списка значений."""
+
+    __slots__ = ('ports', 'values')
+
+    def __init__(self, ports: Dict[str, int], values: List[int]) -> None:
+        self.ports = ports
+        self.values = values
+
+    def __getitem__(self, name: str) -> int:
+        return self.values[self.ports[name]]
+
+    def __setitem__(self, name: str, value: int) -> None:
+        self.values[self.ports[name]] = value
+
+    def __delitem__(self, name: str) -> None:
+        raise TypeError('Registers can not be removed')
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.ports)
+
+    def __len__(self) -> int:
+        return len(self.ports)
+
+    def copy(self) -> Dict[str, int]:
+        return dict(self)
 
 
 class CircuitComponent():
+    """Компонент схемы: значения портов в списке values, имя порта -- индекс в ports.
+
+    Провода привязываются к индексам портов в attach, такт работает только с индексами.
+    """
+
+    __slots__ = ('ports', 'values', '_wires', '_links', '_port_wires')
+
+    # Порты, значения которых компонент выставляет на провода
+    OUTPUTS: Tuple[str, ...] = ()
+
     def __init__(self, registers: List[str]) -> None:
-        self.registers: Dict[str, int] = {i: 0 for i in registers}
+        self.ports: Dict[str, int] = {name: index for index, name in enumerate(registers)}
+        self.values: List[int] = [0] * len(registers)
 
         self._wires: Dict[str, CircuitWire] = {}
+        # Подключенные порты: (индекс, провод) и провод по индексу порта
+        self._links: List[Tuple[int, CircuitWire]] = []
+        self._port_wires: List[CircuitWire | None] = [None] * len(registers)
+
+    @property
+    def registers(self) -> RegisterView:
+        return RegisterView(self.ports, self.values)
+
+    def port(self, name: str) -> int:
+        """Индекс порта; неизвестное имя -- AssertionError."""
+        try:
+            return self.ports[name]
+        except KeyError:
+            raise AssertionError('Указанный регистр не существует') from None
 
     def do_tick(self) -> None:
         self.update()
 
+    def settled(self) -> bool:
+        """Выходы зависят только от входов: без их изменения повторный такт ничего не меняет.
+
+        False -- компонент вычисляется и на следующем такте (счетчики, отложенное чтение состояния).
+        """
+        return True
+
     def attach(self, register_name: str, wire: CircuitWire) -> None:
-        assert register_name in self.registers.keys(), 'Указанный регистр не существует'
         assert wire is not None, 'Несуществующий провод данных'
+        index = self.port(register_name)
         self._wires[register_name] = wire
+        self._port_wires[index] = wire
+        self._links = [(self.ports[name], linked) for name, linked in self._wires.items()]
 
     def set_register(self, name: str, value: int):
-        assert name in self.registers.keys(), 'Указанный регистр не существует'
-        self.registers[name] = value
-        if self._wires.get(name) is not None:
-            self._wires[name].set(value)
+        try:
+            index = self.ports[name]
+        except KeyError:
+            raise AssertionError('Указанный регистр не существует') from None
+        if DEBUG:
+            assert isinstance(value, int), f'Register {name} value is not int: {value!r}'
+        self.values[index] = value
+        wire = self._port_wires[index]
+        if wire is not None:
+            wire.set(value)
 
     def get_register(self, name: str):
-        assert name in self.registers.keys(), 'Указанный регистр не существует'
-
-        return self.registers[name]
+        try:
+            return self.values[self.ports[name]]
+        except KeyError:
+            raise AssertionError('Указанный регистр не существует') from None
 
     def update(self):
-        for wire_name, wire in self._wires.items():
-            self.registers[wire_name] = wire.get()
+        values = self.values
+        for index, wire in self._links:
+            values[index] = wire.get()
+
+    def netlist_read(self, name: str, value: str) -> str:  # pylint: disable=unused-argument
+        """Выражение, которым update() переводит значение провода в регистр."""
+        return value
+
+    def netlist_code(self, ports: PortNames) -> List[str] | None:  # pylint: disable=unused-argument
+        """Тело do_tick после update() для компилятора netlist, None -- вызвать do_tick."""
+        return None
@@ -104,6 +104,17 @@ class CircuitComponentTests(unittest.TestCase):
 
         self.assertEqual(component.get_register('In'), 5)
 
+    def test_Registers_StoredByPortIndex(self):
+        component = CircuitComponent(['In', 'Out'])
+        wire = CircuitWire()
+
+        component.attach('Out', wire)
+        component.set_register('Out', 7)
+
+        self.assertEqual(component.values, [0, 7])
+        self.assertEqual(dict(component.registers), {'In': 0, 'Out': 7})
+        self.assertFalse(hasattr(component, '__dict__'))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -4,13 +4,21 @@
 # pylint: disable=line-too-long               # строки с ожидаемым выводом
 
 import logging
-from typing import Dict, List, Tuple
+from array import array
+from typing import Dict, Iterable, List, Sequence, Tuple
 from enum import Enum
-from numpy import binary_repr
-from circuit import CircuitComponent
+from circuit import DEBUG, CircuitComponent, PortNames
+from isa import IMMEDIATE_SOURCES, REGISTER_PORTS, extract, extract_expression, map_memory, new_memory, to_word, to_words
+from logpipe import LOG_FLAGS
+from schedule import TokenSchedule
+from sinks import OutputSink, ListSink
 
 
 class Trigger(CircuitComponent):
+    __slots__ = ('state',)
+
+    OUTPUTS = ('Out',)
+
     def __init__(self, state: int = 0) -> None:
         self.state: int = state
 
@@ -21,16 +29,36 @@ class Trigger(CircuitComponent):
 
         if self.get_register('EN') != 0:
             self.state = self.get_register('In')
-            logging.debug('Trigger %s change state to %s',
-                          __name__, self.state)
+            if LOG_FLAGS.debug:
+                logging.debug('Trigger %s change state to %s',
+                              __name__, self.state)
 
         self.set_register('Out', self.state)
 
+    def netlist_code(self, ports: PortNames) -> List[str]:
+        component = ports.component
+        return [f"if {ports['EN']} != 0:",
+                f"    {component}.state = {ports['In']}",
+                "    if debug:",
+                f"        logging.debug('Trigger %s change state to %s', {__name__!r}, {component}.state)",
+                ports.set('Out', f'{component}.state', always=True)]
+
 
 class Memory(CircuitComponent):
-    def __init__(self, memory_size: int) -> None:
+    """Память слов по 32 бита (isa.MEMORY_TYPECODE), записи переносятся по ширине слова.
+
+    С image память отображается из файла образа (isa.map_memory) и не читается целиком.
+    """
+
+    __slots__ = ('memory', 'tracer')
+
+    OUTPUTS = ('RD',)
+
+    def __init__(self, memory_size: int, image: str | None = None) -> None:
         assert memory_size > 0, 'Memory size is not positive'
-        self.memory: List[int] = [0] * memory_size
+        self.memory: array | memoryview = new_memory(memory_size) if image is None else map_memory(image, memory_size)
+        # Двоичная трасса (tracing.Tracer), получает записи в память
+        self.tracer = None
 
         super().__init__(['A', 'RD', 'WD', 'WE'])
 
@@ -38,19 +66,45 @@ class Memory(CircuitComponent):
         super().do_tick()
 
         data_addr = self.get_register('A')
-        assert data_addr < len(self.memory), 'Memory out'
+        if DEBUG:
+            assert 0 <= data_addr < len(self.memory), 'Memory out'
 
         if self.get_register('WE') != 0:
-            self.memory[data_addr] = self.get_register('WD')
+            self.write(data_addr, self.get_register('WD'))
         else:
-            self.set_register('RD', self.memory[data_addr])
-
-    def load_program(self, program: List[int], start_address: int):
+            self.set_register('RD', self.read(data_addr))
+
+    def netlist_code(self, ports: PortNames) -> List[str]:
+        component = ports.component
+        code = [f"assert 0 <= {ports['A']} < len({component}.memory), 'Memory out'"] if DEBUG else []
+        return code + [f"if {ports['WE']} != 0:",
+                       f"    {component}.write({ports['A']}, {ports['WD']})",
+                       "else:",
+                       "    try:",
+                       "        " + ports.set('RD', f"{component}.memory[{ports['A']}]"),
+                       "    except IndexError:",
+                       "        raise AssertionError('Memory out') from None"]
+
+    def read(self, address: int) -> int:
+        try:
+            return self.memory[address]
+        except IndexError:
+            raise AssertionError('Memory out') from None
+
+    def write(self, address: int, value: int) -> None:
+        try:
+            previous = self.memory[address]
+            self.memory[address] = to_word(value)
+        except IndexError:
+            raise AssertionError('Memory out') from None
+        if self.tracer is not None:
+            self.tracer.memory_write(address, self.memory[address], previous)
+
+    def load_program(self, program: Sequence[int], start_address: int):
         assert len(self.memory) > len(program) + \
             start_address, 'Impossible to accommodate the program'
 
-        for num in range(len(program)):
-            self.memory[num + start_address] = program[num]
+        self.memory[start_address:start_address + len(program)] = to_words(program)
 
 
 class Register(int, Enum):
@@ -65,6 +119,12 @@ class Register(int, Enum):
 
 
 class RegisterFile(CircuitComponent):
+    __slots__ = ('inner_registers', '_fields')
+
+    OUTPUTS = ('RD1', 'RD2')
+    # Номер регистра в инструкции: (сдвиг, маска) единственного поля isa.REGISTER_PORTS
+    ADDRESS_FIELDS: Dict[str, Tuple[int, int]] = {name: (field.shift, field.mask) for name, (field,) in REGISTER_PORTS.items()}
+
     def __init__(self) -> None:
         self.inner_registers: Dict[int, int] = {
             Register.x0: 0,  # x0 | ZR
@@ -78,6 +138,8 @@ class RegisterFile(CircuitComponent):
         }
 
         super().__init__(['A1', 'A2', 'A3', 'RD1', 'RD2', 'WD', 'WE3'])
+        # Индекс порта адреса -- (сдвиг, маска)
+        self._fields: Dict[int, Tuple[int, int]] = {self.ports[name]: field for name, field in self.ADDRESS_FIELDS.items()}
 
     def do_tick(self) -> None:
         super().do_tick()
@@ -94,20 +156,40 @@ class RegisterFile(CircuitComponent):
             else:
                 logging.warning('Prevent writing in x0 register')
 
+    def settled(self) -> bool:
+        # После записи RD1/RD2 еще не перечитаны из регистров
+        return self.values[self.ports['WE3']] == 0
+
     def update(self):
-        for wire_name, wire in self._wires.items():
-            match wire_name:
-                case 'A1':
-                    self.registers[wire_name] = (wire.get() >> 7) & 7
-                case 'A2':
-                    self.registers[wire_name] = (wire.get() >> 10) & 7
-                case 'A3':
-                    self.registers[wire_name] = (wire.get() >> 4) & 7
-                case _:
-                    self.registers[wire_name] = wire.get()
+        values, fields = self.values, self._fields
+        for index, wire in self._links:
+            field = fields.get(index)
+            values[index] = wire.get() if field is None else (wire.get() >> field[0]) & field[1]
+
+    def netlist_read(self, name: str, value: str) -> str:
+        if name in REGISTER_PORTS:
+            return extract_expression(value, REGISTER_PORTS[name])
+        return value
+
+    def netlist_code(self, ports: PortNames) -> List[str]:
+        registers = f'{ports.component}.inner_registers'
+        return [f"if {ports['WE3']} == 0:",
+                "    " + ports.set('RD1', f"{registers}[{ports['A1']}]"),
+                "    " + ports.set('RD2', f"{registers}[{ports['A2']}]"),
+                "else:",
+                f"    if {ports['A3']} != 0:",
+                f"        {registers}[{ports['A3']}] = {ports['WD']}",
+                "    else:",
+                "        logging.warning('Prevent writing in x0 register')"]
 
 
 class ALU(CircuitComponent):
+    __slots__ = ()
+
+    OUTPUTS = ('Result', 'ZeroFlag', 'PositiveFlag')
+    OPERATIONS: Dict[int, str] = {0: '{srcA} + {srcB}', 1: '{srcB} - {srcA}', 2: '{srcA} % {srcB}',
+                                  3: '{srcA} * {srcB}', 4: '{srcA} // {srcB}'}
+
     def __init__(self) -> None:
         super().__init__(['srcA', 'srcB', 'Result',
                           'ALUControl', 'ZeroFlag', 'PositiveFlag', 'EF'])
@@ -136,22 +218,35 @@ class ALU(CircuitComponent):
                 raise AssertionError('ALU operation not permitted')
 
         if self.get_register('EF') == 1:
-            if self.get_register('Result') == 0:
-                self.set_register('ZeroFlag', 1)
-                logging.debug('Zero flag is active')
-            else:
-                self.set_register('ZeroFlag', 0)
-                logging.debug('Zero flag is inactive')
-
-            if self.get_register('Result') > 0:
-                self.set_register('PositiveFlag', 1)
-                logging.debug('Positive flag is active')
-            else:
-                self.set_register('PositiveFlag', 0)
-                logging.debug('Positive flag is inactive')
+            self.set_register('ZeroFlag', 1 if self.get_register('Result') == 0 else 0)
+            self.set_register('PositiveFlag', 1 if self.get_register('Result') > 0 else 0)
+            if LOG_FLAGS.debug:
+                logging.debug('Zero flag is active' if self.get_register('ZeroFlag') else 'Zero flag is inactive')
+                logging.debug('Positive flag is active' if self.get_register('PositiveFlag') else 'Positive flag is inactive')
+
+    def netlist_code(self, ports: PortNames) -> List[str]:
+        code: List[str] = []
+        for control, operation in self.OPERATIONS.items():
+            code += [f"{'if' if control == 0 else 'elif'} {ports['ALUControl']} == {control}:",
+                     "    " + ports.set('Result', operation.format(srcA=ports['srcA'], srcB=ports['srcB']), always=True)]
+        code += ["else:",
+                 "    raise AssertionError('ALU operation not permitted')",
+                 f"if {ports['EF']} == 1:",
+                 "    " + ports.set('ZeroFlag', f"1 if {ports['Result']} == 0 else 0"),
+                 "    " + ports.set('PositiveFlag', f"1 if {ports['Result']} > 0 else 0"),
+                 "    if debug:",
+                 f"        logging.debug('Zero flag is active' if {ports['ZeroFlag']} else 'Zero flag is inactive')",
+                 f"        logging.debug('Positive flag is active' if {ports['PositiveFlag']} else 'Positive flag is inactive')"]
+        return code
 
 
 class SignExpand(CircuitComponent):
+    __slots__ = ()
+
+    OUTPUTS = ('Out',)
+    # ImmSrc -- выражение над In по полям isa.IMMEDIATE_SOURCES
+    EXPANSIONS: Dict[int, str] = {imm_src: extract_expression('{In}', fields) for imm_src, fields in IMMEDIATE_SOURCES.items()}
+
     def __init__(self) -> None:
         super().__init__(['In', 'Out', 'ImmSrc'])
 
@@ -161,37 +256,58 @@ class SignExpand(CircuitComponent):
     def do_tick(self) -> None:
         super().do_tick()
 
-        in_value = self.get_register('In')
-        match self.get_register('ImmSrc'):
-            case 0:
-                self.set_register('Out', (in_value >> 10) & 127)
-            case 1:
-                self.set_register('Out', (in_value >> 13) & 15)
-            case 2:
-                left_part = (in_value >> 10) & 120
-                right_part = (in_value >> 4) & 7
-                self.set_register('Out', left_part + right_part)
-            case _:
-                raise AssertionError('Expand sign operation not permitted')
+        fields = IMMEDIATE_SOURCES.get(self.get_register('ImmSrc'))
+        if fields is None:
+            raise AssertionError('Expand sign operation not permitted')
+        self.set_register('Out', extract(self.get_register('In'), fields))
+
+    def netlist_code(self, ports: PortNames) -> List[str]:
+        code: List[str] = []
+        for imm_src, expansion in self.EXPANSIONS.items():
+            code += [f"{'if' if imm_src == 0 else 'elif'} {ports['ImmSrc']} == {imm_src}:",
+                     "    " + ports.set('Out', expansion.format(In=ports['In']), always=True)]
+        return code + ["else:",
+                       "    raise AssertionError('Expand sign operation not permitted')"]
 
 
 class MUX(CircuitComponent):
+    """Мультиплексор на 2 ** digit_capacity входов In_<номер в двоичном виде>."""
+
+    __slots__ = ('_src_register', '_digit_capacity', '_inputs', '_select')
+
+    OUTPUTS = ('Out',)
+
     def __init__(self, digit_capacity: int, src_register_name: str = 'Src') -> None:
         self._src_register = src_register_name
-        self.__digit_capacity = digit_capacity
+        self._digit_capacity = digit_capacity
+        inputs = [self.input_name(number) for number in range(2 ** digit_capacity)]
 
-        super().__init__(['In_' + self.__get_bin_number(x)
-                          for x in range(2 ** digit_capacity)] + ['Out', src_register_name])
+        super().__init__(inputs + ['Out', src_register_name])
+        # Индексы портов входов по номеру входа
+        self._inputs: List[int] = [self.ports[name] for name in inputs]
+        self._select = self.ports[src_register_name]
+
+    def input_name(self, number: int) -> str:
+        return f'In_{number:0{self._digit_capacity}b}'
 
     def do_tick(self) -> None:
         super().do_tick()
 
-        self.set_register('Out', self.get_register(
-            'In_' + self.__get_bin_number(self.get_register(self._src_register))
-        ))
+        select = self.values[self._select]
+        if DEBUG:
+            assert 0 <= select < len(self._inputs), 'Указанный регистр не существует'
+        try:
+            self.set_register('Out', self.values[self._inputs[select]])
+        except IndexError:
+            raise AssertionError('Указанный регистр не существует') from None
 
-    def __get_bin_number(self, number: int) -> None:
-        return binary_repr(number, self.__digit_capacity)
+    def netlist_code(self, ports: PortNames) -> List[str]:
+        code: List[str] = []
+        for number in range(2 ** self._digit_capacity):
+            code += [f"{'if' if number == 0 else 'elif'} {ports[self._src_register]} == {number}:",
+                     "    " + ports.set('Out', ports[self.input_name(number)], always=True)]
+        return code + ["else:",
+                       "    raise AssertionError('Указанный регистр не существует')"]
 
 
 class IOMemoryCell(int, Enum):
@@ -202,16 +318,18 @@ class IOMemoryCell(int, Enum):
 class IOHandler(CircuitComponent):
     """Class to emulate IOC and connected DIP"""
 
-    def __init__(self, int_tokens: List[Tuple[int, str]] = None) -> None:
+    __slots__ = ('tick_count', 'schedule', 'dip_value', 'output', 'tracer')
+
+    OUTPUTS = ('Out', 'IOInt')
+
+    def __init__(self, int_tokens: Iterable[Tuple[int, str]] = None, output: OutputSink = None) -> None:
         self.tick_count = 0
-        if int_tokens is None:
-            self.__interrupt_tokens = [
-                (1, 'h'), (10, 'e'), (20, 'l'), (25, 'l'), (100, 'o')]
-        else:
-            self.__interrupt_tokens = int_tokens
+        self.schedule = TokenSchedule(int_tokens)
 
         self.dip_value = 0
-        self.saved_tokens = []
+        self.output: OutputSink = ListSink() if output is None else output
+        # Двоичная трасса (tracing.Tracer) вместо строк Readed/Saved в логе
+        self.tracer = None
 
         super().__init__(['In', 'WD', 'Out', 'IOOp', 'IOInt'])
 
@@ -223,22 +341,60 @@ class IOHandler(CircuitComponent):
             # LD operation on 120 cell
             if self.get_register('In') == IOMemoryCell.IN:
                 self.set_register('Out', self.dip_value)
-                logging.info('Readed: %s', self.dip_value)
+                if self.tracer is not None:
+                    self.tracer.input(self.dip_value)
+                elif LOG_FLAGS.info:
+                    logging.info('Readed: %s', self.dip_value)
 
             # SW operation on 121 cell
             if self.get_register('In') == IOMemoryCell.OUT:
-                self.saved_tokens.append(self.get_register('WD'))
+                self.output.write(self.get_register('WD'))
                 self.dip_value = self.get_register('WD')
-                logging.info('Saved: %d', self.get_register("WD"))
+                if self.tracer is not None:
+                    self.tracer.output(self.dip_value)
+                elif LOG_FLAGS.info:
+                    logging.info('Saved: %d', self.get_register("WD"))
         else:
             # Address IO memory addresses without access signal
             if self.get_register('In') in [120, 121]:
                 raise AttributeError('Unsopported operation on memory cell')
 
-        for token in self.__interrupt_tokens:
-            token_tick, token_value = token
-            if token_tick == self.tick_count:
-                self.set_register('IOInt', 1)
-                self.dip_value = ord(token_value)
+        self.receive_tokens()
+
+    def settled(self) -> bool:
+        # Такт считается и токены приходят на каждом такте
+        return False
+
+    @property
+    def saved_tokens(self) -> List[int]:
+        return self.output.tokens()
+
+    def receive_tokens(self) -> None:
+        while self.schedule.next_tick == self.tick_count:
+            self.set_register('IOInt', 1)
+            self.dip_value = ord(self.schedule.pop())
+            if LOG_FLAGS.debug:
                 logging.debug('Interrupt request! %s in tick %s',
                               self.dip_value, self.tick_count)
+
+    def netlist_code(self, ports: PortNames) -> List[str]:
+        component = ports.component
+        return [f"{component}.tick_count += 1",
+                f"if {ports['IOOp']} == 1:",
+                f"    if {ports['In']} == {int(IOMemoryCell.IN)}:",
+                "        " + ports.set('Out', f'{component}.dip_value'),
+                f"        if {component}.tracer is not None:",
+                f"            {component}.tracer.input({component}.dip_value)",
+                "        elif info:",
+                f"            logging.info('Readed: %s', {component}.dip_value)",
+                f"    if {ports['In']} == {int(IOMemoryCell.OUT)}:",
+                f"        {component}.output.write({ports['WD']})",
+                f"        {component}.dip_value = {ports['WD']}",
+                f"        if {component}.tracer is not None:",
+                f"            {component}.tracer.output({ports['WD']})",
+                "        elif info:",
+                f"            logging.info('Saved: %d', {ports['WD']})",
+                f"elif {ports['In']} in [{int(IOMemoryCell.IN)}, {int(IOMemoryCell.OUT)}]:",
+                "    raise AttributeError('Unsopported operation on memory cell')",
+                f"if {component}.tick_count == {component}.schedule.next_tick:",
+                f"    {component}.receive_tokens()"]
@@ -3,9 +3,13 @@
 # pylint: disable=missing-function-docstring  # чтобы не быть Капитаном Очевидностью
 # pylint: disable=line-too-long               # строки с ожидаемым выводом
 
+import os
+import tempfile
 import unittest
+from random import Random
 from components import SignExpand, Trigger, Memory, RegisterFile, ALU, MUX, IOHandler, IOMemoryCell
 from circuit import CircuitWire
+from isa import IMMEDIATE_SOURCES, INSTRUCTIONS, REGISTER_PORTS, Section, encode, operand_fields, read_image, write_code
 
 
 class TriggerTests(unittest.TestCase):
@@ -44,6 +48,9 @@ class MemoryTests(unittest.TestCase):
     4) Если WE == 0 то прочитать в RD
     5) Загрузили программу в память
     6) Загрузили программу мимо памяти
+    7) Запись переносится по ширине слова
+    8) Память отображается из образа, запись не попадает в файл
+    9) Образ меньше памяти: его слова в начале, остальное обнулено
     """
 
     def test_InitMemoryWithNegativeCellsAmount_ThrowsAssert(self):
@@ -93,6 +100,41 @@ class MemoryTests(unittest.TestCase):
         with self.assertRaises(AssertionError):
             memory.load_program(program, 5)
 
+    def test_DoTickWithWideWd_WrapToWord(self):
+        memory = Memory(5)
+        memory.set_register('WE', 1)
+
+        for address, value in enumerate([2 ** 32 + 5, -1, 2 ** 31]):
+            memory.set_register('A', address)
+            memory.set_register('WD', value)
+            memory.do_tick()
+
+        self.assertEqual(list(memory.memory), [5, -1, -2 ** 31, 0, 0])
+
+    def test_MappedImage_ReadFromFile(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'data.out')
+            write_code(filename, range(70000), sections=[Section('data', 0, 70000)])
+
+            memory = Memory(70000, filename)
+            memory.load_program([7], 0)
+
+            self.assertEqual((memory.memory[0], memory.memory[69999]), (7, 69999))
+            self.assertEqual(read_image(filename).words[0], 0)
+
+    def test_MappedSmallImage_RestZeroed(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'code.out')
+            write_code(filename, [5, 6, 7], sections=[Section('.text', 0, 3)])
+
+            memory = Memory(512, filename)
+            memory.write(511, -1)
+
+            self.assertEqual(len(memory.memory), 512)
+            self.assertEqual(list(memory.memory[:5]), [5, 6, 7, 0, 0])
+            self.assertEqual(memory.memory[511], -1)
+            self.assertEqual(read_image(filename).words.tolist(), [5, 6, 7])
+
 
 class RegisterFileTests(unittest.TestCase):
     """
@@ -272,6 +314,43 @@ class SignExapndTests(unittest.TestCase):
             sign_expand.do_tick()
 
 
+class InstructionDecodingTests(unittest.TestCase):
+    """
+    1) Каждый операнд каждого формата isa разбирается портом тракта данных обратно в то же значение
+    """
+
+    def test_EveryFormat_RoundTripThroughCircuit(self):
+        ports = {('A', name): fields for name, fields in REGISTER_PORTS.items()}
+        ports.update({('ImmSrc', imm_src): fields for imm_src, fields in IMMEDIATE_SOURCES.items()})
+        random = Random(3)
+
+        for mnemonic, instruction_format in INSTRUCTIONS.items():
+            for operand in {field.operand for field in instruction_format.fields}:
+                with self.subTest(mnemonic=mnemonic, operand=operand):
+                    fields = operand_fields(instruction_format, operand)
+                    port = next((port for port, port_fields in ports.items()
+                                 if {(field.mask, field.shift) for field in port_fields} == {(field.mask, field.shift) for field in fields}), None)
+                    self.assertIsNotNone(port, 'No data path port decodes the operand')
+                    mask = sum(field.mask for field in fields)
+
+                    for value in [mask] + [random.randrange(mask + 1) for _ in range(20)]:
+                        word = encode(mnemonic, **dict({name: random.randrange(8) for name in ('reg1', 'reg2', 'reg3')}, **{operand: value}))
+                        if port[0] == 'A':
+                            register_file = RegisterFile()
+                            register_file.attach(port[1], CircuitWire(word))
+                            register_file.do_tick()
+                            decoded = register_file.get_register(port[1])
+                            compiled = eval(register_file.netlist_read(port[1], 'word'), {'word': word})  # pylint: disable=eval-used
+                        else:
+                            sign_expand = SignExpand()
+                            sign_expand.set_register('ImmSrc', port[1])
+                            sign_expand.set_register('In', word)
+                            sign_expand.do_tick()
+                            decoded = sign_expand.get_register('Out')
+                            compiled = eval(SignExpand.EXPANSIONS[port[1]].format(In='word'), {'word': word})  # pylint: disable=eval-used
+                        self.assertEqual((decoded, compiled), (value, value))
+
+
 class Mux1BitTests(unittest.TestCase):
     """
     1) Тик с инпутом в 0
@@ -305,6 +384,7 @@ class Mux2BitsTests(unittest.TestCase):
     2) Тик с инпутом в 01
     3) Тик с инпутом в 10
     4) Тик с инпутом в 11
+    5) Тик с несуществующим инпутом
     """
 
     def test_DoTickWithInputEqualsZero_SaveIn00ToOut(self):
@@ -355,6 +435,13 @@ class Mux2BitsTests(unittest.TestCase):
 
         self.assertEqual(mux.get_register('Out'), 40)
 
+    def test_DoTickWithUnknownInput_ThrowsAssert(self):
+        mux = MUX(2)
+        mux.set_register('Src', 4)
+
+        with self.assertRaises(AssertionError):
+            mux.do_tick()
+
 
 class IOHandlerTests(unittest.TestCase):
     """
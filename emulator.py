@@ -0,0 +1,474 @@
+# pylint: disable=missing-module-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-class-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-function-docstring  # чтобы не быть Капитаном Очевидностью
+# pylint: disable=line-too-long               # строки с ожидаемым выводом
+
+import logging
+from array import array
+from collections import namedtuple
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from components import IOMemoryCell, Register
+from isa import Opcode, circuit_fields, decode, map_memory, new_memory, to_word, to_words
+from schedule import TokenSchedule
+from sinks import OutputSink, ListSink
+
+# Ячейки, в которые DataPath.enter_interrupt сохраняет контекст
+ALU_RESULT_SAVE_CELL = 256
+INSTRUCTION_SAVE_CELL = 257
+
+
+class Block(namedtuple('Block', 'start end ticks hooked run source')):
+    """Оттранслированный базовый блок: адреса [start, end), такты и функция run(emulator) -> HALT.
+
+    hooked -- блок вызывает instruction_hook после каждой инструкции; с block_hook блоки его не вызывают.
+    """
+
+
+class MachineState(namedtuple('MachineState', 'tick pc registers zero_flag positive_flag output_count')):
+    """Архитектурное состояние машины после исполнения инструкции."""
+
+
+# Управляющее слово одного такта:
+# (PCWrite, AdrSrc, IOOp, IRWrite, WDSrc, ImmSrc, ALUControl, ALUSrcB, ALUSrcA, RegWrite, EF)
+# Повторяет ControlUnit._instruction_transitions, поля по умолчанию равны нулю.
+FETCH = (0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0)
+PC_WRITE = (1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+PC_INCREMENT = (0, 0, 0, 0, 0, 0, 0, 2, 1, 0, 0)
+WRITE_BACK = (0, 0, 0, 0, 1, 0, 0, 2, 1, 1, 0)
+
+MICROCODE: dict = {
+    Opcode.ADDI: ((0, 0, 0, 1, 0, 0, 0, 1, 0, 0, 1), WRITE_BACK, PC_WRITE),
+    Opcode.ADD: ((0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 1), WRITE_BACK, PC_WRITE),
+    Opcode.REM: ((0, 0, 0, 1, 0, 0, 2, 0, 0, 0, 1), WRITE_BACK, PC_WRITE),
+    Opcode.MUL: ((0, 0, 0, 1, 0, 0, 3, 0, 0, 0, 1), WRITE_BACK, PC_WRITE),
+    Opcode.DIV: ((0, 0, 0, 1, 0, 0, 4, 0, 0, 0, 1), WRITE_BACK, PC_WRITE),
+    Opcode.LD: ((0, 0, 0, 1, 0, 0, 0, 1, 0, 0, 0),
+                (0, 1, 1, 0, 0, 0, 0, 2, 1, 1, 0), PC_WRITE),
+    Opcode.SW: ((0, 0, 0, 1, 0, 2, 0, 1, 0, 0, 0),
+                (0, 1, 1, 0, 0, 0, 0, 2, 1, 0, 0), PC_WRITE),
+    Opcode.CMP: ((0, 0, 0, 1, 0, 0, 1, 0, 0, 0, 1), PC_INCREMENT, PC_WRITE),
+    Opcode.JMP: ((0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0), PC_WRITE),
+}
+SKIP = (PC_INCREMENT, PC_WRITE)
+
+# Тактов на инструкцию: переходы -- 3, HALT -- 1, остальные -- 4
+BRANCH_TICKS = 3
+INSTRUCTION_TICKS = 4
+HALT_TICKS = 1
+# Самая длинная инструкция
+MAX_INSTRUCTION_TICKS = max(BRANCH_TICKS, INSTRUCTION_TICKS, HALT_TICKS)
+
+# Сколько раз исполнение должно прийти на адрес, прежде чем блок с него транслируется
+JIT_THRESHOLD = 64
+# Инструкции, на которых заканчивается базовый блок
+BLOCK_TERMINATORS = (Opcode.JMP, Opcode.JG, Opcode.BNE, Opcode.BEQ, Opcode.HALT)
+# Условие перехода по флагам, выставленным внутри блока (f -- последний результат с EF)
+# и по флагам на входе в блок
+BRANCH_CONDITIONS: Dict[int, Tuple[str, str]] = {
+    Opcode.JMP: ('', ''),
+    Opcode.JG: ('f > 0', 'emu.positive_flag == 1'),
+    Opcode.BNE: ('f != 0', 'emu.zero_flag != 1'),
+    Opcode.BEQ: ('f == 0', 'emu.zero_flag == 1'),
+}
+ALU_OPERATORS: Dict[int, str] = {Opcode.ADDI: '+', Opcode.ADD: '+', Opcode.REM: '%', Opcode.MUL: '*', Opcode.DIV: '//'}
+
+
+def alu(control: int, src_a: int, src_b: int) -> int:
+    match control:
+        case 0:
+            return src_a + src_b
+        case 1:
+            return src_b - src_a
+        case 2:
+            return src_a % src_b
+        case 3:
+            return src_a * src_b
+        case 4:
+            return src_a // src_b
+        case _:
+            raise AssertionError('ALU operation not permitted')
+
+
+class Emulator():
+    """Потактово точная модель машины уровня инструкций.
+
+    Исполняет программу напрямую над массивом регистров и памятью, без
+    проводов и компонентов DataPath. Прерывания и токены ввода попадают
+    в те же такты, что и в ControlUnit/DataPath: инструкции, в окно
+    которых попадает событие, исполняются по микрокоду такт за тактом.
+
+    С jit линейные участки до перехода или HALT транслируются в функции
+    Python и кешируются по адресу начала. Блок исполняется целиком, только
+    если до его конца не придет токен и нет ожидающего прерывания.
+    Запись в память через load_program или сохранение контекста прерывания
+    сбрасывает блоки, которые ее покрывают.
+    """
+
+    def __init__(self, memory_size: int = 512, is_interrupts_allowed: bool = False,
+                 int_tokens: Iterable[Tuple[int, str]] = None, jit: bool = True, output: OutputSink = None,
+                 memory_image: str | None = None) -> None:
+        self.memory: array | memoryview = new_memory(memory_size) if memory_image is None else map_memory(memory_image, memory_size)
+        self.registers: List[int] = [0] * 8
+
+        self.pc = 0
+        self.ir = 0
+        self.alu_result = 0
+        self.rd2 = 0
+        self.zero_flag = 0
+        self.positive_flag = 0
+        self.tick = 0
+
+        self.is_interrupts_allowed = is_interrupts_allowed
+        self.in_interrupt = False
+        self.interrupt_request = 0
+
+        self.schedule = TokenSchedule(int_tokens)
+
+        self.dip_value = 0
+        self.output: OutputSink = ListSink() if output is None else output
+
+        self.instruction_hook: Callable[['Emulator'], None] | None = None
+        # Вызывается после каждого исполненного блока (с флагом HALT) вместо instruction_hook на его инструкциях
+        self.block_hook: Callable[['Emulator', Block, bool], None] | None = None
+        self._decoded: Dict[int, Tuple[int, ...]] = {}
+        # Слово IR -- isa.circuit_fields для потактового исполнения
+        self._fields: Dict[int, Tuple[int, ...]] = {}
+
+        self.jit = jit
+        # None -- с этого адреса блок не строится, исполняем step()
+        self._blocks: Dict[int, Block | None] = {}
+        self._block_entries: Dict[int, int] = {}
+
+    @property
+    def saved_tokens(self) -> List[int]:
+        return self.output.tokens()
+
+    def load_program(self, program: List[int], start_address: int) -> None:
+        assert len(self.memory) > len(program) + \
+            start_address, 'Impossible to accommodate the program'
+
+        self.memory[start_address:start_address + len(program)] = to_words(program)
+        self.invalidate_blocks(start_address, start_address + len(program))
+
+    def write_memory(self, address: int, value: int) -> None:
+        self.memory[address] = to_word(value)
+        self.invalidate_blocks(address, address + 1)
+
+    def invalidate_blocks(self, start: int = 0, end: int | None = None) -> None:
+        """Сбросить блоки, пересекающие [start, end); без аргументов -- все."""
+        if end is None:
+            self._blocks.clear()
+            self._block_entries.clear()
+            return
+        for block_start in [block_start for block_start, block in self._blocks.items()
+                            if (block_start if block is None else block.start) < end and
+                            start < (block_start + 1 if block is None else block.end)]:
+            del self._blocks[block_start]
+
+    def state(self) -> MachineState:
+        return MachineState(self.tick, self.pc, tuple(self.registers),
+                            self.zero_flag, self.positive_flag, self.output.count)
+
+    def start(self) -> None:
+        if not self.jit:
+            while not self.step():
+                pass
+            return
+
+        blocks = self._blocks
+        entries = self._block_entries
+        block_hook = self.block_hook
+        hooked = self.instruction_hook is not None and block_hook is None
+        while True:
+            pc = self.pc
+            if pc in blocks:
+                block = blocks[pc]
+                if block is not None and block.hooked != hooked:
+                    block = blocks[pc] = self._translate_block(pc)
+            else:
+                # Транслируются только горячие адреса, холодный код дешевле исполнить step()
+                block = None
+                entries[pc] = entries.get(pc, 0) + 1
+                if entries[pc] >= JIT_THRESHOLD:
+                    block = blocks[pc] = self._translate_block(pc)
+
+            # Блок не должен пересечь такт прихода токена и обойти ожидающее прерывание
+            if block is not None and not (0 <= self.schedule.next_tick <= self.tick + block.ticks + MAX_INSTRUCTION_TICKS) and \
+                    not (self.interrupt_request and self.is_interrupts_allowed and not self.in_interrupt):
+                halted = block.run(self)
+                if block_hook is not None:
+                    block_hook(self, block, halted)
+                if halted:
+                    return
+            elif self.step():
+                return
+
+    def step(self) -> bool:
+        """Исполнить одну инструкцию, вернуть True на HALT."""
+        if (0 <= self.schedule.next_tick <= self.tick + MAX_INSTRUCTION_TICKS) or \
+                (self.interrupt_request and self.is_interrupts_allowed and not self.in_interrupt):
+            return self._step_by_ticks()
+        return self._step()
+
+    def _fetch_address(self, address: int) -> int:
+        assert address < len(self.memory), 'Memory out'
+        if address in (IOMemoryCell.IN, IOMemoryCell.OUT):
+            raise AttributeError('Unsopported operation on memory cell')
+        return self.memory[address]
+
+    def _write_register(self, number: int, value: int) -> None:
+        if number != 0:
+            self.registers[number] = value
+        else:
+            logging.warning('Prevent writing in x0 register')
+
+    def _set_flags(self, result: int) -> None:
+        self.zero_flag = 1 if result == 0 else 0
+        self.positive_flag = 1 if result > 0 else 0
+
+    def _decode(self, instr: int) -> Tuple[int, ...]:
+        """Операнды по таблице кодирования и номера портов A1/A2 регистрового файла."""
+        decoded = self._decoded.get(instr)
+        if decoded is None:
+            decoded = self._decoded[instr] = tuple(decode(instr)) + circuit_fields(instr)[:2]
+        return decoded
+
+    def _step(self) -> bool:
+        regs = self.registers
+        pc = self.pc
+        instr = self._fetch_address(pc)
+        opcode, reg1, reg2, reg3, imm, a1, a2 = self._decode(instr)
+        self.ir = instr
+
+        if opcode == Opcode.HALT:
+            self.tick += HALT_TICKS
+            self.alu_result = regs[a1] + regs[a2]
+            self.rd2 = regs[a2]
+            return True
+
+        if opcode <= Opcode.DIV:
+            src_b = imm if opcode == Opcode.ADDI else regs[reg3]
+            result = alu(0 if opcode <= Opcode.ADD else opcode, regs[reg2], src_b)
+            self._set_flags(result)
+            self._write_register(reg1, result)
+            pc += 1
+            self.tick += INSTRUCTION_TICKS
+        elif opcode <= Opcode.SW:
+            address = regs[reg2] + imm
+            assert address < len(self.memory), 'Memory out'
+            value = self.memory[address]
+            # На WD порта ввода-вывода всегда выставлен RD2
+            if address == IOMemoryCell.IN:
+                value = self.dip_value
+            elif address == IOMemoryCell.OUT:
+                self.output.write(regs[a2])
+                self.dip_value = regs[a2]
+            if opcode == Opcode.LD:
+                self._write_register(reg1, value)
+            pc += 1
+            self.tick += INSTRUCTION_TICKS
+        elif opcode == Opcode.CMP:
+            self._set_flags(regs[reg1] - regs[reg2])
+            pc += 1
+            self.tick += INSTRUCTION_TICKS
+        elif opcode <= Opcode.BEQ:
+            if opcode == Opcode.JMP or \
+                    (opcode == Opcode.JG and self.positive_flag == 1) or \
+                    (opcode == Opcode.BNE and self.zero_flag != 1) or \
+                    (opcode == Opcode.BEQ and self.zero_flag == 1):
+                pc = regs[reg1] + imm
+            else:
+                pc += 1
+            self.tick += BRANCH_TICKS
+        else:
+            raise AttributeError('Unsupported opcode: ' + str(opcode))
+
+        # Последний такт инструкции защелкивает PC и выставляет новый адрес на шину
+        self._fetch_address(pc)
+        self.pc = pc
+        self.alu_result = regs[a1] + regs[a2]
+        self.rd2 = regs[a2]
+
+        if self.instruction_hook is not None:
+            self.instruction_hook(self)
+        return False
+
+    def _translate_block(self, start: int) -> Block | None:
+        """Собрать функцию, исполняющую инструкции с start до перехода или HALT включительно."""
+        memory_size = len(self.memory)
+        hooked = self.instruction_hook is not None and self.block_hook is None
+        body: List[str] = []
+        ticks = 0
+        flags_set = False
+        address = start
+
+        def flush(next_pc: str, instr: int, a1: int, a2: int) -> List[str]:
+            state = [f'emu.pc = {next_pc}', f'emu.tick = tick + {ticks}', f'emu.ir = {instr}',
+                     f'emu.alu_result = r[{a1}] + r[{a2}]', f'emu.rd2 = r[{a2}]']
+            if flags_set:
+                state += ['emu.zero_flag = 1 if f == 0 else 0', 'emu.positive_flag = 1 if f > 0 else 0']
+            return state
+
+        def write_register(number: int, value: str) -> str:
+            return f'r[{number}] = {value}' if number != 0 else "logging.warning('Prevent writing in x0 register')"
+
+        # Граница после линейной инструкции: состояние для хука пишется, только если хук задан при трансляции
+        boundary: Tuple[str, int, int, int] | None = None
+        while address < memory_size and address not in (IOMemoryCell.IN, IOMemoryCell.OUT):
+            instr = self.memory[address]
+            opcode, reg1, reg2, reg3, imm, a1, a2 = self._decode(instr)
+            if opcode > Opcode.HALT:
+                break
+            if boundary is not None and hooked:
+                body += flush(*boundary) + ['hook(emu)']
+            boundary = None
+
+            if opcode == Opcode.HALT:
+                ticks += HALT_TICKS
+                body += flush(str(address), instr, a1, a2) + ['return True']
+                return self._compile_block(start, address + 1, ticks, hooked, body)
+
+            if opcode in BLOCK_TERMINATORS:
+                ticks += BRANCH_TICKS
+                condition = BRANCH_CONDITIONS[opcode][0 if flags_set else 1]
+                target = f'r[{reg1}] + {imm}'
+                body += [f'pc = {target} if {condition} else {address + 1}' if condition else f'pc = {target}',
+                         'emu._fetch_address(pc)']
+                body += flush('pc', instr, a1, a2) + (['hook(emu)'] if hooked else []) + ['return False']
+                return self._compile_block(start, address + 1, ticks, hooked, body)
+
+            if opcode <= Opcode.DIV:
+                src_b = str(imm) if opcode == Opcode.ADDI else f'r[{reg3}]'
+                body += [f'f = r[{reg2}] {ALU_OPERATORS[opcode]} {src_b}', write_register(reg1, 'f')]
+                flags_set = True
+            elif opcode <= Opcode.SW:
+                body += [f'address = r[{reg2}] + {imm}',
+                         f"assert address < {memory_size}, 'Memory out'",
+                         'value = memory[address]',
+                         f'if address == {int(IOMemoryCell.IN)}:',
+                         '    value = emu.dip_value',
+                         f'elif address == {int(IOMemoryCell.OUT)}:',
+                         f'    emu.output.write(r[{a2}])',
+                         f'    emu.dip_value = r[{a2}]']
+                if opcode == Opcode.LD:
+                    body.append(write_register(reg1, 'value'))
+            else:
+                body.append(f'f = r[{reg1}] - r[{reg2}]')
+                flags_set = True
+            ticks += INSTRUCTION_TICKS
+            address += 1
+            boundary = (str(address), instr, a1, a2)
+
+        if boundary is None:
+            return None
+        # Блок оборвался перед тем, что не транслируется: следующий адрес проверяет step() или шина
+        body += [f'emu._fetch_address({address})'] + flush(*boundary) + \
+            (['hook(emu)'] if hooked else []) + ['return False']
+        return self._compile_block(start, address, ticks, hooked, body)
+
+    @staticmethod
+    def _compile_block(start: int, end: int, ticks: int, hooked: bool, body: List[str]) -> Block:
+        source = '\n'.join(['def run(emu):', '    r = emu.registers', '    memory = emu.memory',
+                            '    hook = emu.instruction_hook', '    tick = emu.tick'] +
+                           ['    ' + line for line in body])
+        namespace: Dict[str, object] = {'logging': logging}
+        exec(compile(source, f'<block {start}>', 'exec'), namespace)  # pylint: disable=exec-used
+        return Block(start, end, ticks, hooked, namespace['run'], source)
+
+    def _step_by_ticks(self) -> bool:
+        self._do_tick(FETCH)
+
+        opcode = self.ir & 15
+        # Флаги для ветвления берутся на момент выборки, до возможного прерывания
+        zero_flag, positive_flag = self.zero_flag, self.positive_flag
+        self._handle_interrupt()
+
+        if opcode == Opcode.HALT:
+            return True
+
+        match opcode:
+            case Opcode.JG:
+                transitions = MICROCODE[Opcode.JMP] if positive_flag == 1 else SKIP
+            case Opcode.BNE:
+                transitions = MICROCODE[Opcode.JMP] if zero_flag != 1 else SKIP
+            case Opcode.BEQ:
+                transitions = MICROCODE[Opcode.JMP] if zero_flag == 1 else SKIP
+            case _:
+                transitions = MICROCODE.get(opcode)
+                if transitions is None:
+                    raise AttributeError('Unsupported opcode: ' + str(opcode))
+
+        for control in transitions:
+            self._do_tick(control)
+            self._handle_interrupt()
+
+        if self.instruction_hook is not None:
+            self.instruction_hook(self)
+        return False
+
+    def _do_tick(self, control: Tuple[int, ...]) -> None:
+        pc_write, adr_src, io_op, ir_write, wd_src, imm_src, alu_control, alu_src_b, alu_src_a, reg_write, edit_flags = control
+        regs = self.registers
+        self.tick += 1
+
+        if pc_write:
+            self.pc = self.alu_result
+
+        address = self.alu_result if adr_src else self.pc
+        assert address < len(self.memory), 'Memory out'
+        read_data = self.memory[address]
+
+        if io_op:
+            if address == IOMemoryCell.IN:
+                read_data = self.dip_value
+            if address == IOMemoryCell.OUT:
+                self.output.write(self.rd2)
+                self.dip_value = self.rd2
+        elif address in (IOMemoryCell.IN, IOMemoryCell.OUT):
+            raise AttributeError('Unsopported operation on memory cell')
+
+        while self.schedule.next_tick == self.tick:
+            self.interrupt_request = 1
+            self.dip_value = ord(self.schedule.pop())
+
+        if ir_write:
+            self.ir = read_data
+        instr = self.ir
+
+        fields = self._fields.get(instr)
+        if fields is None:
+            fields = self._fields[instr] = circuit_fields(instr)
+        if reg_write:
+            self._write_register(fields[2], self.alu_result if wd_src else read_data)
+            # RD1 не обновляется, но во всех тактах записи ALUSrcA = 1
+            rd1 = 0
+        else:
+            rd1 = regs[fields[0]]
+            self.rd2 = regs[fields[1]]
+        imm = fields[3 + imm_src]
+
+        src_a = self.pc if alu_src_a else rd1
+        src_b = (self.rd2, imm, 1, 0)[alu_src_b]
+        self.alu_result = alu(alu_control, src_a, src_b)
+        if edit_flags:
+            self._set_flags(self.alu_result)
+
+    def _handle_interrupt(self) -> None:
+        if not (self.is_interrupts_allowed and not self.in_interrupt and self.interrupt_request == 1):
+            return
+
+        self.interrupt_request = 0
+        self.in_interrupt = True
+        # Save PC, ALU Result and current command
+        self.registers[Register.x7] = self.pc
+        self.pc = self.registers[Register.x6]
+        self.write_memory(ALU_RESULT_SAVE_CELL, self.alu_result)
+        self.write_memory(INSTRUCTION_SAVE_CELL, self.ir)
+
+        self.start()
+
+        self.in_interrupt = False
+        self.pc = self.registers[Register.x7]
+        self.alu_result = self.memory[ALU_RESULT_SAVE_CELL]
+        self.ir = self.memory[INSTRUCTION_SAVE_CELL]
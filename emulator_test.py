@@ -0,0 +1,184 @@
+# pylint: disable=missing-module-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-class-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-function-docstring  # чтобы не быть Капитаном Очевидностью
+# pylint: disable=line-too-long               # строки с ожидаемым выводом
+
+import unittest
+from emulator import Emulator
+from machine import simulation, cross_check, circuit_simulation, fast_simulation, EngineDivergence
+from testing import translate_example
+from translator import translate
+
+
+class EmulatorTests(unittest.TestCase):
+    """
+    1) Хальт занимает один такт
+    2) ADDI пишет в регистр и двигает PC за 4 такта
+    3) Запись в 121 ячейку попадает в вывод
+    4) Неподдерживаемый опкод
+    5) Токен в окне инструкции обрабатывается потактово
+    """
+
+    def test_DoPerformHalt_OneTick(self):
+        emulator = Emulator(int_tokens=[])
+        emulator.memory[0] = 12
+
+        emulator.start()
+
+        self.assertEqual(emulator.tick, 1)
+        self.assertEqual(emulator.pc, 0)
+
+    def test_DoPerformAddi_WriteRegisterAndIncrementPC(self):
+        emulator = Emulator(int_tokens=[])
+        # (0000 101)5 (010)2 (111)7 (0000)ADDI
+        emulator.load_program([5488, 12], 0)
+        emulator.registers[2] = 5
+
+        emulator.start()
+
+        self.assertEqual(emulator.registers[7], 10)
+        self.assertEqual(emulator.pc, 1)
+        self.assertEqual(emulator.tick, 5)
+        self.assertEqual(emulator.positive_flag, 1)
+
+    def test_DoPerformSwOnOutputCell_SaveToken(self):
+        emulator = Emulator(int_tokens=[])
+        # sw x4, +121(ZR)
+        emulator.load_program([126998, 12], 0)
+        emulator.registers[4] = ord('a')
+
+        emulator.start()
+
+        self.assertEqual(emulator.saved_tokens, [ord('a')])
+
+    def test_DoPerformUndefinedOpcode_ThrowsError(self):
+        emulator = Emulator(int_tokens=[])
+        emulator.memory[0] = 13
+
+        with self.assertRaises(AttributeError):
+            emulator.start()
+
+    def test_TokenWithoutInterrupts_UpdateDipValue(self):
+        emulator = Emulator(int_tokens=[(2, 'a')])
+        # ld x4, +120(ZR)
+        emulator.load_program([122949, 12], 0)
+
+        emulator.start()
+
+        self.assertEqual(emulator.registers[4], ord('a'))
+        self.assertEqual(emulator.interrupt_request, 1)
+
+
+LOOP_PROGRAM = '''
+section .text
+_start:
+addi x4, x0, 100
+addi x5, x0, 7
+.loop:
+    add x2, x2, x1
+    rem x3, x2, x5
+    addi x1, x1, 1
+    cmp x1, +0(x4)
+    bne .loop
+sw x2, +121(ZR)
+halt
+'''
+
+
+class BlockCacheTests(unittest.TestCase):
+    """
+    1) Горячий цикл транслируется в блок и считает то же, что и без jit
+    2) Запись в память блока сбрасывает его
+    3) Токены и прерывания приходят в те же такты, что и в схеме
+    """
+
+    def test_HotLoop_SameResultAsWithoutJit(self):
+        _, codes = translate(LOOP_PROGRAM)
+        emulators = [Emulator(int_tokens=[], jit=jit) for jit in [True, False]]
+        for emulator in emulators:
+            emulator.load_program(codes, 0)
+            emulator.start()
+
+        with_jit, without_jit = emulators
+        self.assertIn(3, with_jit._blocks)  # pylint: disable=protected-access
+        self.assertEqual(with_jit.saved_tokens, [4950])
+        self.assertEqual(with_jit.state(), without_jit.state())
+        self.assertEqual((with_jit.ir, with_jit.alu_result, with_jit.rd2),
+                         (without_jit.ir, without_jit.alu_result, without_jit.rd2))
+
+    def test_WriteIntoBlock_InvalidateBlock(self):
+        _, codes = translate(LOOP_PROGRAM)
+        emulator = Emulator(int_tokens=[])
+        emulator.load_program(codes, 0)
+        emulator.start()
+        blocks = emulator._blocks  # pylint: disable=protected-access
+
+        emulator.write_memory(10, 0)
+        self.assertIn(3, blocks)
+        emulator.write_memory(5, 0)
+        self.assertNotIn(3, blocks)
+
+    def test_TokensDuringHotLoop_EnginesAgree(self):
+        _, codes = translate(LOOP_PROGRAM)
+        # Обработчик кладет код символа в x1, он меньше границы цикла
+        tokens = [(tick, 'a') for tick in range(1300, 1900, 23)]
+
+        for is_interrupts_allowed in [False, True]:
+            with self.subTest(interrupts=is_interrupts_allowed):
+                self.assertEqual(fast_simulation(codes, 0, is_interrupts_allowed, int_tokens=tokens),
+                                 circuit_simulation(codes, 0, is_interrupts_allowed, int_tokens=tokens))
+                self.assertEqual(cross_check(codes, 0, is_interrupts_allowed, int_tokens=tokens),
+                                 circuit_simulation(codes, 0, is_interrupts_allowed, int_tokens=tokens))
+
+
+class CrossCheckTests(unittest.TestCase):
+    """
+    1) Примеры совпадают потактово с interrupts и без
+    2) Расхождение обнаруживается
+    """
+
+    def test_Examples_EnginesAgree(self):
+        for name in ['hello', 'cat', 'prob5']:
+            codes = translate_example(name)
+            for is_interrupts_allowed in [False, True]:
+                with self.subTest(name=name, interrupts=is_interrupts_allowed):
+                    try:
+                        expected = simulation(codes, 0, is_interrupts_allowed)
+                    except ZeroDivisionError:
+                        with self.assertRaises(ZeroDivisionError):
+                            simulation(codes, 0, is_interrupts_allowed, engine='check')
+                        continue
+
+                    result = simulation(codes, 0, is_interrupts_allowed, engine='fast')
+
+                    self.assertEqual(result, expected)
+                    self.assertEqual(simulation(codes, 0, is_interrupts_allowed, engine='check'), expected)
+
+    def test_DifferentSchedules_EnginesAgree(self):
+        codes = translate_example('cat')
+
+        result = cross_check(codes, 0, True, int_tokens=[(3, 'x'), (4, 'y'), (9, 'z')])
+
+        self.assertEqual(result.output, [ord('z')])
+
+    def test_BrokenEngine_ReportDivergence(self):
+        codes = translate_example('hello')
+        original = Emulator._write_register
+
+        def broken(emulator, number, value):
+            original(emulator, number, value + 1)
+
+        Emulator._write_register = broken
+        try:
+            with self.assertRaises(EngineDivergence):
+                cross_check(codes, 0, False)
+        finally:
+            Emulator._write_register = original
+
+    def test_UnknownEngine_ThrowsError(self):
+        with self.assertRaises(AttributeError):
+            simulation([12], 0, engine='quantum')
+
+
+if __name__ == '__main__':
+    unittest.main()
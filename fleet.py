@@ -0,0 +1,151 @@
+# pylint: disable=missing-module-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-class-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-function-docstring  # чтобы не быть Капитаном Очевидностью
+# pylint: disable=line-too-long               # строки с ожидаемым выводом
+
+import json
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, Iterable, List, Tuple
+
+import numpy
+
+from isa import IMAGE_WORD, read_image
+from machine import simulation
+from schedule import parse_schedule
+from translator import translate
+
+
+class Job(namedtuple('Job', 'id program schedule interrupts engine memory_size',
+                     defaults=(None, False, 'fast', 512))):
+    """Задание: программа (.asm или образ), расписание ввода, прерывания, модель и размер памяти.
+
+    schedule -- None (по умолчанию), список [такт, символ] или строка для schedule.parse_schedule.
+    """
+
+
+class SharedProgram(namedtuple('SharedProgram', 'name length entry')):
+    """Слова программы в сегменте общей памяти name и точка входа."""
+
+
+class FleetSummary(namedtuple('FleetSummary', 'jobs failed programs elapsed')):
+    """Итог прогона: заданий, завершившихся ошибкой, уникальных программ и время в секундах."""
+
+    @property
+    def jobs_per_second(self) -> float:
+        return self.jobs / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def read_manifest(filename: str) -> List[Job]:
+    """Задания из JSONL: по объекту на строку с полями Job, id по умолчанию -- номер строки."""
+    jobs: List[Job] = []
+    with open(filename, encoding='utf-8') as file:
+        for number, line in enumerate(file):
+            if not line.strip():
+                continue
+            fields = json.loads(line)
+            fields.setdefault('id', number)
+            jobs.append(Job(**fields))
+    return jobs
+
+
+def load_program(filename: str) -> Tuple[numpy.ndarray, int]:
+    """Слова и точка входа: исходник .asm транслируется, образ читается."""
+    if filename.endswith('.asm'):
+        with open(filename, encoding='utf-8') as file:
+            _, codes = translate(file.read())
+        # Ячейка 0 хранит переход на _start
+        return numpy.asarray(codes, dtype=IMAGE_WORD), 0
+    image = read_image(filename)
+    return image.words, image.entry
+
+
+def share_programs(jobs: Iterable[Job]) -> Tuple[List[SharedMemory], Dict[str, SharedProgram]]:
+    """Загрузить каждую программу один раз и выложить её слова в общую память."""
+    segments: List[SharedMemory] = []
+    programs: Dict[str, SharedProgram] = {}
+    try:
+        for job in jobs:
+            if job.program in programs:
+                continue
+            words, entry = load_program(job.program)
+            segment = SharedMemory(create=True, size=max(words.nbytes, 1))
+            segments.append(segment)
+            numpy.ndarray(len(words), dtype=IMAGE_WORD, buffer=segment.buf)[:] = words
+            programs[job.program] = SharedProgram(segment.name, len(words), entry)
+    except BaseException:
+        release(segments)
+        raise
+    return segments, programs
+
+
+def release(segments: List[SharedMemory]) -> None:
+    for segment in segments:
+        segment.close()
+        segment.unlink()
+
+
+# Программы, подключенные рабочим процессом: путь -- (сегмент, слова, точка входа)
+_ATTACHED: Dict[str, Tuple[SharedMemory, numpy.ndarray, int]] = {}
+
+
+def attach_programs(programs: Dict[str, SharedProgram]) -> None:
+    """Инициализатор рабочего процесса: подключить сегменты программ без копирования."""
+    for filename, program in programs.items():
+        # Трекер ресурсов у рабочих общий с родителем, сегменты удаляет родитель в release
+        segment = SharedMemory(name=program.name)
+        words = numpy.ndarray(program.length, dtype=IMAGE_WORD, buffer=segment.buf)
+        _ATTACHED[filename] = (segment, words, program.entry)
+
+
+def run_job(job: Job) -> Dict[str, object]:
+    """Исполнить задание в рабочем процессе; ошибка модели -- причина завершения, а не исключение."""
+    _, words, entry = _ATTACHED[job.program]
+    schedule = job.schedule
+    if isinstance(schedule, str):
+        schedule = parse_schedule(schedule)
+    elif schedule is not None:
+        schedule = [(tick, value) for tick, value in schedule]
+
+    start = time.perf_counter()
+    try:
+        result = simulation(words.tolist(), entry, job.interrupts, job.memory_size, job.engine, schedule)
+    except Exception as error:  # pylint: disable=broad-exception-caught
+        return {'id': job.id, 'output': None, 'ticks': None, 'exit': f'{type(error).__name__}: {error}',
+                'seconds': time.perf_counter() - start}
+    return {'id': job.id, 'output': result.output, 'ticks': result.ticks, 'exit': 'halt',
+            'seconds': time.perf_counter() - start}
+
+
+def run_fleet(jobs: List[Job], results: str, workers: int | None = None) -> FleetSummary:
+    """Исполнить задания на пуле процессов по числу ядер, результаты дописываются в JSONL по мере готовности."""
+    start = time.perf_counter()
+    segments, programs = share_programs(jobs)
+    failed = 0
+    try:
+        with open(results, 'w', encoding='utf-8') as file, \
+                ProcessPoolExecutor(workers or os.cpu_count(), initializer=attach_programs,
+                                    initargs=(programs,)) as pool:
+            for future in as_completed([pool.submit(run_job, job) for job in jobs]):
+                record = future.result()
+                failed += record['exit'] != 'halt'
+                file.write(json.dumps(record) + '\n')
+                file.flush()
+    finally:
+        release(segments)
+    return FleetSummary(len(jobs), failed, len(programs), time.perf_counter() - start)
+
+
+def main(args):
+    manifest, results, *workers = args
+    summary = run_fleet(read_manifest(manifest), results, int(workers[0]) if workers else None)
+    print(f'{summary.jobs} jobs ({summary.failed} failed, {summary.programs} programs) '
+          f'in {summary.elapsed:.2f} s, {summary.jobs_per_second:.1f} jobs/s')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
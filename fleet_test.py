@@ -0,0 +1,62 @@
+# pylint: disable=missing-module-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-class-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-function-docstring  # чтобы не быть Капитаном Очевидностью
+# pylint: disable=line-too-long               # строки с ожидаемым выводом
+
+import json
+import os
+import tempfile
+import unittest
+from fleet import Job, read_manifest, release, run_fleet, share_programs
+
+
+class FleetTests(unittest.TestCase):
+    """
+    1) Манифест читается построчно, id по умолчанию -- номер строки
+    2) Каждая программа загружается в общую память один раз
+    3) Результаты всех заданий пишутся в JSONL, ошибка модели -- причина завершения
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_Manifest_DefaultIds(self):
+        manifest = os.path.join(self.directory.name, 'jobs.jsonl')
+        with open(manifest, 'w', encoding='utf-8') as file:
+            file.write('{"program": "examples/hello.asm"}\n\n{"id": "cat", "program": "examples/cat.out", "interrupts": true}\n')
+
+        self.assertEqual(read_manifest(manifest), [Job(0, 'examples/hello.asm'),
+                                                   Job('cat', 'examples/cat.out', None, True)])
+
+    def test_SameProgram_SharedOnce(self):
+        jobs = [Job(number, 'examples/hello.asm') for number in range(3)] + [Job(3, 'examples/prob5.out')]
+
+        segments, programs = share_programs(jobs)
+        release(segments)
+
+        self.assertEqual(len(segments), 2)
+        self.assertEqual(set(programs), {'examples/hello.asm', 'examples/prob5.out'})
+
+    def test_Jobs_ResultsInJsonl(self):
+        results = os.path.join(self.directory.name, 'results.jsonl')
+        jobs = [Job('hello', 'examples/hello.asm'),
+                Job('cat', 'examples/cat.asm', [[3, 'a'], [40, 'b']], True, 'circuit'),
+                Job('prob5', 'examples/prob5.out'),
+                Job('prob5_int', 'examples/prob5.out', None, True)]
+
+        summary = run_fleet(jobs, results, workers=2)
+
+        with open(results, encoding='utf-8') as file:
+            records = {record['id']: record for record in map(json.loads, file)}
+        self.assertEqual((summary.jobs, summary.failed, summary.programs), (4, 1, 3))
+        self.assertEqual(''.join(map(chr, records['hello']['output'])), 'hello world')
+        self.assertEqual(records['cat']['output'], [ord('a')])
+        self.assertEqual((records['prob5']['output'], records['prob5']['ticks']), ([232792560, 20, 232792560], 2125))
+        self.assertTrue(records['prob5_int']['exit'].startswith('ZeroDivisionError'))
+
+
+if __name__ == '__main__':
+    unittest.main()
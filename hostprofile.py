@@ -0,0 +1,152 @@
+# pylint: disable=missing-module-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-class-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-function-docstring  # чтобы не быть Капитаном Очевидностью
+# pylint: disable=line-too-long               # строки с ожидаемым выводом
+
+import sys
+from collections import namedtuple
+from time import perf_counter_ns
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from circuit import CircuitComponent
+from isa import read_image
+from machine import ControlUnit, DataPath, SimulationResult, build_machine, machine_result
+
+# Строки отчета, которые не являются компонентами схемы
+CHANGE_VALVES = 'ControlUnit._change_valves'
+UPDATE = 'ControlUnit.update'
+DO_TICK = 'DataPath.do_tick'
+
+
+class ComponentTiming(namedtuple('ComponentTiming', 'name calls nanoseconds')):
+    """Время хоста в наносекундах и число вызовов."""
+
+    @property
+    def per_call(self) -> float:
+        return self.nanoseconds / self.calls if self.calls else 0.0
+
+
+class TimedComponent():
+    """Замена компонента в списке EventScheduler: тот же do_tick и settled, но с замером времени."""
+
+    __slots__ = ('component', 'timing')
+
+    def __init__(self, component: CircuitComponent, timing: List[int]) -> None:
+        self.component = component
+        self.timing = timing
+
+    def do_tick(self) -> None:
+        start = perf_counter_ns()
+        self.component.do_tick()
+        timing = self.timing
+        timing[0] += 1
+        timing[1] += perf_counter_ns() - start
+
+    def settled(self) -> bool:
+        return self.component.settled()
+
+
+class TimedControlUnit(ControlUnit):
+    """ControlUnit, который замеряет такт по частям; слоты те же, поэтому подменяется на месте."""
+
+    __slots__ = ()
+
+    def apply_control_word(self, data_path: DataPath, control_word: Tuple[int, ...]) -> None:
+        change_valves, do_tick, update = data_path.host_profiler.control_timings
+        start = perf_counter_ns()
+        self._change_valves(control_word)
+        valves_set = perf_counter_ns()
+        data_path.do_tick()
+        ticked = perf_counter_ns()
+        self.update()
+        change_valves[1] += valves_set - start
+        do_tick[1] += ticked - valves_set
+        update[1] += perf_counter_ns() - ticked
+        change_valves[0] += 1
+        do_tick[0] += 1
+        update[0] += 1
+
+
+class HostProfiler():
+    """Время хоста по компонентам DataPath и частям такта ControlUnit.
+
+    Собранный такт (CompiledNetlist) сливает компоненты в одну функцию, поэтому под профилировщиком
+    компоненты вычисляются по одному в порядке DataPath.order, как в режиме compiled=False;
+    событийный такт сохраняется, замеряются только вычисленные им компоненты.
+    Время DataPath.do_tick включает время компонентов.
+    """
+
+    def __init__(self) -> None:
+        # Имя -- [вызовов, наносекунд]
+        self.timings: Dict[str, List[int]] = {}
+        self.control_timings = ([0, 0], [0, 0], [0, 0])
+        self.elapsed = 0
+
+    def attach(self, data_path: DataPath, control_unit: ControlUnit) -> None:
+        assert type(control_unit) is ControlUnit, 'Control unit is already instrumented'  # pylint: disable=unidiomatic-typecheck
+        self.timings = {name: [0, 0] for name in data_path.order}
+        self.timings.update(zip([CHANGE_VALVES, DO_TICK, UPDATE], self.control_timings))
+        data_path.host_profiler = self
+        control_unit.__class__ = TimedControlUnit
+
+        scheduler = data_path.scheduler
+        if scheduler is not None:
+            scheduler.components = [TimedComponent(component, self.timings[name])
+                                    for name, component in zip(scheduler.names, scheduler.components)]
+            return
+
+        components = [(data_path.components[name], self.timings[name]) for name in data_path.order]
+
+        def tick() -> None:
+            for component, timing in components:
+                start = perf_counter_ns()
+                component.do_tick()
+                timing[0] += 1
+                timing[1] += perf_counter_ns() - start
+        data_path._tick = tick  # pylint: disable=protected-access
+
+    def run(self, control_unit: ControlUnit, data_path: DataPath) -> None:
+        """start() с замером общего времени прогона."""
+        start = perf_counter_ns()
+        try:
+            control_unit.start(data_path)
+        finally:
+            self.elapsed += perf_counter_ns() - start
+
+    def report(self) -> List[ComponentTiming]:
+        """Компоненты и части такта по убыванию времени."""
+        return sorted((ComponentTiming(name, calls, nanoseconds) for name, (calls, nanoseconds) in self.timings.items()),
+                      key=lambda timing: -timing.nanoseconds)
+
+    def lines(self) -> Iterator[str]:
+        total = self.elapsed or 1
+        yield f'Total {self.elapsed / 1e6:.2f} ms'
+        yield f'{"name":<28} {"calls":>8} {"ms":>9} {"%":>6} {"ns/call":>8}'
+        for timing in self.report():
+            yield (f'{timing.name:<28} {timing.calls:8} {timing.nanoseconds / 1e6:9.2f} '
+                   f'{100 * timing.nanoseconds / total:6.2f} {timing.per_call:8.0f}')
+
+
+def host_profile(program: List[int], text_start_adr: int = 0, is_interrupts_allowed: bool = False,
+                 memory_size: int = 512, int_tokens: Iterable[Tuple[int, str]] = None,
+                 event_driven: bool = False) -> Tuple[SimulationResult, HostProfiler]:
+    """Прогнать схемную модель под профилировщиком хоста."""
+    control_unit, data_path = build_machine(program, text_start_adr, is_interrupts_allowed, memory_size, int_tokens,
+                                            event_driven=event_driven)
+    profiler = HostProfiler()
+    profiler.attach(data_path, control_unit)
+    profiler.run(control_unit, data_path)
+    return machine_result(data_path), profiler
+
+
+def main(args):
+    filename, is_interrupts_enabled, *engine = args
+    image = read_image(filename)
+    _, profiler = host_profile(image.words.tolist(), image.entry, is_interrupts_enabled == 'True',
+                               event_driven=engine == ['events'])
+    for line in profiler.lines():
+        print(line)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,54 @@
+# pylint: disable=missing-module-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-class-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-function-docstring  # чтобы не быть Капитаном Очевидностью
+# pylint: disable=line-too-long               # строки с ожидаемым выводом
+
+import unittest
+from hostprofile import CHANGE_VALVES, DO_TICK, UPDATE, HostProfiler, host_profile
+from machine import ControlUnit, build_machine, circuit_simulation
+from perfcounters import PerformanceCounters
+from testing import translate_example
+
+
+class HostProfilerTests(unittest.TestCase):
+    """
+    1) Под профилировщиком результат тот же, каждый компонент вызывается раз за такт
+    2) В событийном такте замеряются только вычисленные компоненты
+    3) Без attach модель не меняется, второй инструмент на том же ControlUnit не подключается
+    """
+
+    def test_Prob5_SameResultAndCallsPerTick(self):
+        program = translate_example('prob5')
+        result, profiler = host_profile(program)
+
+        self.assertEqual(result, circuit_simulation(program))
+        timings = {timing.name: timing for timing in profiler.report()}
+        self.assertEqual(len(timings), 14)
+        self.assertEqual({timing.calls for timing in timings.values()}, {result.ticks})
+        components = sum(timing.nanoseconds for name, timing in timings.items() if name not in (CHANGE_VALVES, DO_TICK, UPDATE))
+        self.assertGreaterEqual(timings[DO_TICK].nanoseconds, components)
+        self.assertGreaterEqual(profiler.elapsed, timings[DO_TICK].nanoseconds)
+
+    def test_HelloEvents_CallsMatchScheduler(self):
+        program = translate_example('hello')
+        result, profiler = host_profile(program, 0, True, event_driven=True)
+
+        self.assertEqual(result, circuit_simulation(program, 0, True))
+        calls = {timing.name: timing.calls for timing in profiler.report()}
+        self.assertEqual(calls[DO_TICK], result.ticks)
+        self.assertLess(calls['Sign_Expand'], result.ticks)
+
+    def test_WithoutAttach_ModelUntouched(self):
+        control_unit, data_path = build_machine(translate_example('hello'))
+
+        self.assertIs(type(control_unit), ControlUnit)
+        self.assertIsNone(data_path.host_profiler)
+        self.assertIs(data_path._tick, data_path.netlist.tick)  # pylint: disable=protected-access
+
+        PerformanceCounters().attach(data_path, control_unit)
+        with self.assertRaises(AssertionError):
+            HostProfiler().attach(data_path, control_unit)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,174 @@
+# pylint: disable=missing-module-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-class-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-function-docstring  # чтобы не быть Капитаном Очевидностью
+# pylint: disable=line-too-long               # строки с ожидаемым выводом
+
+import math
+import sys
+from collections import namedtuple
+from typing import Iterable, Iterator, List, Sequence, Tuple
+
+from isa import Opcode, read_image
+from machine import ControlUnit, DataPath, SimulationResult, build_machine, machine_result
+from schedule import TokenSchedule, parse_schedule
+
+PERCENTILES = (50, 90, 99)
+
+
+class InterruptRecord(namedtuple('InterruptRecord', 'raise_tick entry_tick exit_tick pc instruction coalesced')):
+    """Прерывание: такт запроса (первого токена, поднявшего IOInt), входа в обработчик и выхода из него.
+
+    pc -- адрес, на который вернется обработчик, instruction -- слово в IR при входе, т.е. прерванная
+    инструкция; coalesced -- сколько токенов до входа перезаписал более поздний. exit_tick -- None,
+    пока обработчик не завершился.
+    """
+
+    @property
+    def latency(self) -> int:
+        return self.entry_tick - self.raise_tick
+
+    @property
+    def duration(self) -> int | None:
+        return None if self.exit_tick is None else self.exit_tick - self.entry_tick
+
+    @property
+    def opcode(self) -> Opcode:
+        return Opcode(self.instruction & 15)
+
+
+class Distribution(namedtuple('Distribution', 'count minimum percentiles maximum histogram')):
+    """Сводка по выборке: percentiles -- {перцентиль: значение}, histogram -- (от, до, сколько) по степеням двойки."""
+
+
+def percentile(values: Sequence[int], rank: float) -> int:
+    """Перцентиль по ближайшему рангу; values отсортированы."""
+    return values[max(0, math.ceil(rank / 100 * len(values)) - 1)]
+
+
+def distribution(values: Iterable[int], ranks: Sequence[float] = PERCENTILES) -> Distribution:
+    ordered = sorted(values)
+    if not ordered:
+        return Distribution(0, None, {rank: None for rank in ranks}, None, [])
+    # Корзины [0, 1), [1, 2), [2, 4), ...
+    buckets: List[int] = [0] * (ordered[-1].bit_length() + 1)
+    for value in ordered:
+        buckets[value.bit_length()] += 1
+    histogram = [(0 if number == 0 else 1 << (number - 1), 1 << number, count) for number, count in enumerate(buckets)]
+    return Distribution(len(ordered), ordered[0], {rank: percentile(ordered, rank) for rank in ranks}, ordered[-1], histogram)
+
+
+class RecordingSchedule(TokenSchedule):
+    """Расписание IOHandler, которое сообщает InterruptRecorder о каждом пришедшем токене."""
+
+    # Задается в InterruptRecorder.attach
+    recorder: 'InterruptRecorder | None' = None
+
+    def pop(self) -> str:
+        self.recorder.token_arrived(self.next_tick)
+        return super().pop()
+
+
+class RecordingDataPath(DataPath):
+    """DataPath, который отмечает вход в обработчик и выход из него в data_path.interrupt_recorder."""
+
+    def enter_interrupt(self) -> None:
+        self.interrupt_recorder.entered(self)
+        super().enter_interrupt()
+
+    def exit_interrupt(self) -> None:
+        super().exit_interrupt()
+        self.interrupt_recorder.exited(self.tick)
+
+
+class InterruptRecorder():
+    """Записи о прерываниях схемной модели: задержка входа и длительность обработчика.
+
+    attach подменяет классы расписания токенов и DataPath, работа идет только на приходе токена, входе и выходе.
+    IOInt -- защелка: токены, пришедшие до входа, обслуживаются одним прерыванием, от всех, кроме
+    последнего, остается только запрос (coalesced). Токен, пришедший в обработчике, ждет выхода из него;
+    in_handler считает такие токены. Токены, не обслуженные к остановке, -- lost.
+    """
+
+    def __init__(self) -> None:
+        self.records: List[InterruptRecord] = []
+        # Такты токенов, пришедших после последнего входа
+        self.pending: List[int] = []
+        self.tokens = 0
+        self.in_handler = 0
+        self.data_path: DataPath | None = None
+
+    def attach(self, data_path: DataPath, control_unit: ControlUnit) -> None:  # pylint: disable=unused-argument
+        assert type(data_path) is DataPath, 'Data path is already instrumented'  # pylint: disable=unidiomatic-typecheck
+        self.data_path = data_path
+        data_path.interrupt_recorder = self
+        data_path.__class__ = RecordingDataPath
+        schedule = data_path.IO_Handler.schedule
+        schedule.__class__ = RecordingSchedule
+        schedule.recorder = self
+
+    def token_arrived(self, tick: int) -> None:
+        self.tokens += 1
+        self.pending.append(tick)
+        if self.data_path.in_interrupt:
+            self.in_handler += 1
+
+    def entered(self, data_path: DataPath) -> None:
+        raised = self.pending[0] if self.pending else data_path.tick
+        self.records.append(InterruptRecord(raised, data_path.tick, None, data_path.PC.state, data_path.IR.state,
+                                            max(0, len(self.pending) - 1)))
+        self.pending = []
+
+    def exited(self, tick: int) -> None:
+        self.records[-1] = self.records[-1]._replace(exit_tick=tick)
+
+    @property
+    def coalesced(self) -> int:
+        return sum(record.coalesced for record in self.records)
+
+    @property
+    def lost(self) -> int:
+        """Токены, пришедшие после последнего входа: до остановки их уже не обслужить."""
+        return len(self.pending)
+
+    def latency(self) -> Distribution:
+        return distribution(record.latency for record in self.records)
+
+    def duration(self) -> Distribution:
+        return distribution(record.duration for record in self.records if record.exit_tick is not None)
+
+    def report(self) -> Iterator[str]:
+        yield f'Interrupts {len(self.records)}\tTokens {self.tokens}\tIn handler {self.in_handler}\tCoalesced {self.coalesced}\tLost {self.lost}'
+        yield 'raise   entry   exit    latency  duration  pc    interrupted'
+        for record in self.records:
+            yield (f'{record.raise_tick:<7} {record.entry_tick:<7} {record.exit_tick if record.exit_tick is not None else "-":<7} '
+                   f'{record.latency:<8} {record.duration if record.duration is not None else "-":<9} {record.pc:<5} {record.opcode.name}')
+        for name, summary in (('Latency', self.latency()), ('Duration', self.duration())):
+            ranks = '  '.join(f'p{rank} {value}' for rank, value in summary.percentiles.items())
+            yield f'{name}: min {summary.minimum}  {ranks}  max {summary.maximum}'
+            for low, high, count in summary.histogram:
+                if count:
+                    yield f'  [{low}, {high})  {count:6}  {"#" * min(count, 60)}'
+
+
+def recorded_simulation(program: List[int], text_start_adr: int = 0, memory_size: int = 512,
+                        int_tokens: Iterable[Tuple[int, str]] = None) -> Tuple[SimulationResult, InterruptRecorder]:
+    """Прогнать схемную модель с разрешенными прерываниями и записью о каждом."""
+    control_unit, data_path = build_machine(program, text_start_adr, True, memory_size, int_tokens)
+    recorder = InterruptRecorder()
+    recorder.attach(data_path, control_unit)
+    control_unit.start(data_path)
+    return machine_result(data_path), recorder
+
+
+def main(args):
+    filename, *schedule = args
+    image = read_image(filename)
+    # Расписание как в machine.py: tokens.csv или input.txt:N
+    _, recorder = recorded_simulation(image.words.tolist(), image.entry,
+                                      int_tokens=parse_schedule(schedule[0]) if schedule else None)
+    for line in recorder.report():
+        print(line)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
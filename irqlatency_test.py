@@ -0,0 +1,56 @@
+# pylint: disable=missing-module-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-class-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-function-docstring  # чтобы не быть Капитаном Очевидностью
+# pylint: disable=line-too-long               # строки с ожидаемым выводом
+
+import unittest
+from irqlatency import distribution, recorded_simulation
+from isa import Opcode
+from machine import DataPath, build_machine, circuit_simulation
+from schedule import TokenSchedule
+from testing import translate_example
+
+
+class InterruptRecorderTests(unittest.TestCase):
+    """
+    1) Записи о прерываниях: запрос, вход, выход и прерванная инструкция; результат прогона тот же
+    2) Токены в обработчике ждут выхода, лишние до входа считаются слитыми, после последнего входа -- потерянными
+    3) Перцентили и гистограмма по степеням двойки, без attach модель не меняется
+    """
+
+    def test_Hello_Records(self):
+        program = translate_example('hello')
+        result, recorder = recorded_simulation(program)
+
+        self.assertEqual(result, circuit_simulation(program, 0, True))
+        self.assertEqual([(record.raise_tick, record.entry_tick, record.exit_tick) for record in recorder.records],
+                         [(1, 1, 6), (10, 10, 15), (20, 20, 25), (25, 26, 31), (100, 100, 105)])
+        self.assertEqual([record.opcode for record in recorder.records], [Opcode.JMP, Opcode.LD, Opcode.SW, Opcode.SW, Opcode.SW])
+        self.assertEqual((recorder.latency().maximum, recorder.duration().percentiles[50]), (1, 5))
+        self.assertEqual((recorder.tokens, recorder.in_handler, recorder.coalesced, recorder.lost), (5, 1, 0, 0))
+
+    def test_Cat_CoalescedInHandler(self):
+        result, recorder = recorded_simulation(translate_example('cat'), int_tokens=[(1, 'a'), (2, 'b'), (3, 'c'), (8, 'd')])
+
+        self.assertEqual(result.output, [ord('d')])
+        self.assertEqual([(record.raise_tick, record.entry_tick, record.coalesced) for record in recorder.records],
+                         [(1, 1, 0), (2, 7, 1), (8, 13, 0)])
+        self.assertEqual((recorder.tokens, recorder.in_handler, recorder.coalesced, recorder.lost), (4, 3, 1, 0))
+        self.assertEqual(recorder.latency().percentiles, {50: 5, 90: 5, 99: 5})
+
+    def test_Distribution_AndUntouchedWithoutAttach(self):
+        summary = distribution([0, 1, 3, 3, 9, 100])
+        self.assertEqual((summary.count, summary.minimum, summary.maximum), (6, 0, 100))
+        self.assertEqual(summary.percentiles, {50: 3, 90: 100, 99: 100})
+        self.assertEqual([(low, high, count) for low, high, count in summary.histogram if count],
+                         [(0, 1, 1), (1, 2, 1), (2, 4, 2), (8, 16, 1), (64, 128, 1)])
+        self.assertEqual(distribution([]).count, 0)
+
+        _, data_path = build_machine(translate_example('hello'), 0, True)
+        self.assertIs(type(data_path), DataPath)
+        self.assertIs(type(data_path.IO_Handler.schedule), TokenSchedule)
+        self.assertIsNone(data_path.interrupt_recorder)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,10 +4,14 @@
 # pylint: disable=line-too-long               # строки с ожидаемым выводом
 
 import json
+import mmap
+import struct
+from array import array
 from collections import namedtuple
 from enum import Enum
-from typing import Dict, List
-from numpy import int16, binary_repr
+from typing import Dict, List, Sequence, Tuple
+import numpy
+from numpy import int16
 
 
 class Opcode(int, Enum):
@@ -35,6 +39,151 @@ class Term(namedtuple('Term', 'line pos symbol')):
     """Описание выражения из исходного текста программы."""
 
 
+class BitField(namedtuple('BitField', 'operand mask shift')):
+    """Поле инструкции: биты операнда по маске mask, сдвинутые влево на shift."""
+
+
+class OperandLayout(str, Enum):
+    """Запись операндов инструкции в ассемблере."""
+
+    NONE = ''
+    LABEL = 'imm'
+    SHIFT = 'reg1, imm(reg2)'
+    IMMEDIATE = 'reg1, reg2, imm'
+    REGISTERS = 'reg1, reg2, reg3'
+
+
+class InstructionFormat(namedtuple('InstructionFormat', 'opcode layout fields')):
+    """Формат инструкции: опкод, запись операндов и их битовые поля в слове."""
+
+
+class Instruction(namedtuple('Instruction', 'opcode reg1 reg2 reg3 imm')):
+    """Декодированная инструкция."""
+
+
+OPERANDS = ('reg1', 'reg2', 'reg3', 'imm')
+
+_ARITHMETIC = (BitField('reg3', 7, 10), BitField('reg2', 7, 7), BitField('reg1', 7, 4))
+_IMMEDIATE = (BitField('imm', 127, 10), BitField('reg2', 7, 7), BitField('reg1', 7, 4))
+_STORE = (BitField('imm', 120, 10), BitField('reg1', 7, 10), BitField('reg2', 7, 7), BitField('imm', 7, 4))
+_BRANCH = (BitField('imm', 127, 10), BitField('reg1', 7, 7))
+
+# Таблица кодирования, общая для транслятора и симулятора (см. README)
+INSTRUCTIONS: Dict[str, InstructionFormat] = {
+    'addi': InstructionFormat(Opcode.ADDI, OperandLayout.IMMEDIATE, _IMMEDIATE),
+    'add': InstructionFormat(Opcode.ADD, OperandLayout.REGISTERS, _ARITHMETIC),
+    'rem': InstructionFormat(Opcode.REM, OperandLayout.REGISTERS, _ARITHMETIC),
+    'mul': InstructionFormat(Opcode.MUL, OperandLayout.REGISTERS, _ARITHMETIC),
+    'div': InstructionFormat(Opcode.DIV, OperandLayout.REGISTERS, _ARITHMETIC),
+    'ld': InstructionFormat(Opcode.LD, OperandLayout.SHIFT, _IMMEDIATE),
+    'sw': InstructionFormat(Opcode.SW, OperandLayout.SHIFT, _STORE),
+    'cmp': InstructionFormat(Opcode.CMP, OperandLayout.SHIFT, _STORE),
+    'jmp': InstructionFormat(Opcode.JMP, OperandLayout.LABEL, _BRANCH),
+    'jg': InstructionFormat(Opcode.JG, OperandLayout.LABEL, _BRANCH),
+    'bne': InstructionFormat(Opcode.BNE, OperandLayout.LABEL, _BRANCH),
+    'beq': InstructionFormat(Opcode.BEQ, OperandLayout.LABEL, _BRANCH),
+    'halt': InstructionFormat(Opcode.HALT, OperandLayout.NONE, ()),
+}
+
+FORMATS: Dict[Opcode, InstructionFormat] = {
+    instruction_format.opcode: instruction_format for instruction_format in INSTRUCTIONS.values()}
+
+OPCODE_MASK = 15
+MAX_FIELDS = 2
+
+
+def _field_tables() -> tuple:
+    """Маски и сдвиги полей по опкодам для пакетного кодирования: [opcode, operand, field]."""
+    masks = numpy.zeros((OPCODE_MASK + 1, len(OPERANDS), MAX_FIELDS), dtype=numpy.uint32)
+    shifts = numpy.zeros((OPCODE_MASK + 1, len(OPERANDS), MAX_FIELDS), dtype=numpy.uint32)
+
+    for instruction_format in INSTRUCTIONS.values():
+        used = [0] * len(OPERANDS)
+        for field in instruction_format.fields:
+            operand = OPERANDS.index(field.operand)
+            masks[instruction_format.opcode, operand, used[operand]] = field.mask
+            shifts[instruction_format.opcode, operand, used[operand]] = field.shift
+            used[operand] += 1
+
+    return masks, shifts
+
+
+FIELD_MASKS, FIELD_SHIFTS = _field_tables()
+
+
+def encode(mnemonic: str, reg1: int = 0, reg2: int = 0, reg3: int = 0, imm: int = 0) -> int:
+    """Закодировать одну инструкцию по таблице INSTRUCTIONS."""
+    instruction_format = INSTRUCTIONS[mnemonic]
+    operands = {'reg1': reg1, 'reg2': reg2, 'reg3': reg3, 'imm': imm}
+
+    word = int(instruction_format.opcode)
+    for field in instruction_format.fields:
+        word |= (operands[field.operand] & field.mask) << field.shift
+    return word
+
+
+def encode_batch(opcodes: Sequence[int], operands: Sequence[Sequence[int]]) -> numpy.ndarray:
+    """Закодировать программу целиком.
+
+    opcodes -- опкоды инструкций (N,), operands -- значения (N, 4) в порядке OPERANDS.
+    """
+    opcodes = numpy.asarray(opcodes, dtype=numpy.uint32)
+    values = numpy.asarray(operands, dtype=numpy.uint32).reshape(len(opcodes), len(OPERANDS), 1)
+
+    fields = (values & FIELD_MASKS[opcodes]) << FIELD_SHIFTS[opcodes]
+    return opcodes | numpy.bitwise_or.reduce(fields.reshape(len(opcodes), len(OPERANDS) * MAX_FIELDS), axis=1)
+
+
+def decode(word: int) -> Instruction:
+    """Разобрать машинное слово на операнды по таблице INSTRUCTIONS."""
+    opcode = word & OPCODE_MASK
+    operands = {'reg1': 0, 'reg2': 0, 'reg3': 0, 'imm': 0}
+
+    instruction_format = FORMATS.get(opcode)
+    if instruction_format is not None:
+        for field in instruction_format.fields:
+            operands[field.operand] |= (word >> field.shift) & field.mask
+
+    return Instruction(opcode, **operands)
+
+
+def operand_fields(instruction_format: InstructionFormat, operand: str) -> Tuple[BitField, ...]:
+    return tuple(field for field in instruction_format.fields if field.operand == operand)
+
+
+# Поля, которые тракт данных разбирает из IR независимо от опкода: адреса регистрового файла
+# и непосредственное значение по ImmSrc (ImmSrc = 1 не выставляет ни одна инструкция)
+REGISTER_PORTS: Dict[str, Tuple[BitField, ...]] = {
+    'A1': operand_fields(FORMATS[Opcode.ADD], 'reg2'),
+    'A2': operand_fields(FORMATS[Opcode.ADD], 'reg3'),
+    'A3': operand_fields(FORMATS[Opcode.ADD], 'reg1'),
+}
+IMMEDIATE_SOURCES: Dict[int, Tuple[BitField, ...]] = {
+    0: operand_fields(FORMATS[Opcode.ADDI], 'imm'),
+    1: (BitField('imm', 15, 13),),
+    2: operand_fields(FORMATS[Opcode.SW], 'imm'),
+}
+
+
+def extract(word, fields: Sequence[BitField]):
+    """Значение полей fields из слова word (int или массив NumPy)."""
+    value = 0
+    for field in fields:
+        value = value | ((word >> field.shift) & field.mask)
+    return value
+
+
+def extract_expression(word: str, fields: Sequence[BitField]) -> str:
+    """То же, что extract, выражением Python для сгенерированного кода."""
+    return ' | '.join(f'(({word} >> {field.shift}) & {field.mask})' for field in fields)
+
+
+def circuit_fields(word: int) -> Tuple[int, ...]:
+    """Порты A1, A2, A3 и непосредственные значения по ImmSrc, как их разбирает тракт данных."""
+    return tuple(extract(word, fields) for fields in REGISTER_PORTS.values()) + \
+        tuple(extract(word, fields) for fields in IMMEDIATE_SOURCES.values())
+
+
 def write_logs(filename, instrs: List[str], terms: List[Term]):
     """Записать машинный код в файл."""
     logs: List[Dict] = []
@@ -49,24 +198,122 @@ def write_logs(filename, instrs: List[str], terms: List[Term]):
         file.write(json.dumps(logs, indent=4))
 
 
-def write_code(filename, code: List[int16]) -> None:
+# Формат образа: заголовок, таблица секций, слова little-endian uint32
+IMAGE_MAGIC = b'CSA3'
+IMAGE_VERSION = 1
+IMAGE_HEADER = struct.Struct('<4sHHII')  # magic, version, sections, entry, words
+IMAGE_SECTION = struct.Struct('<8sII')  # name, start, length
+IMAGE_WORD = numpy.dtype('<u4')
+
+# Старый формат: каждое слово записано 17 символами '0'/'1'
+LEGACY_WORD_LENGTH = 17
+
+
+class Section(namedtuple('Section', 'name start length')):
+    """Непрерывный участок памяти одной секции."""
+
+
+class Image(namedtuple('Image', 'words entry sections')):
+    """Образ программы: машинные слова, точка входа и секции."""
+
+
+def write_code(filename, code: Sequence[int], entry: int = 0, sections: Sequence[Section] = ()) -> None:
     """Записать машинный код в файл."""
+    words = numpy.asarray(code, dtype=IMAGE_WORD)
+
     with open(filename, mode='wb') as file:
-        for instr in code:
-            instr_str = binary_repr(instr, 17)
-            file.write(instr_str.encode())
+        file.write(IMAGE_HEADER.pack(IMAGE_MAGIC, IMAGE_VERSION, len(sections), entry, len(words)))
+        for section in sections:
+            file.write(IMAGE_SECTION.pack(section.name.encode(), section.start, section.length))
+        file.write(words.tobytes())
+
+
+def read_image(filename: str) -> Image:
+    """Прочесть образ программы, слова отображаются из файла без копирования."""
+    with open(filename, mode='rb') as file:
+        if file.read(len(IMAGE_MAGIC)) != IMAGE_MAGIC:
+            return read_legacy_image(filename)
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    _, version, sections_count, entry, words_count = IMAGE_HEADER.unpack_from(buffer)
+    if version > IMAGE_VERSION:
+        raise AttributeError('Unsupported image version: ' + str(version))
+
+    sections: List[Section] = []
+    for num in range(sections_count):
+        name, start, length = IMAGE_SECTION.unpack_from(buffer, IMAGE_HEADER.size + num * IMAGE_SECTION.size)
+        sections.append(Section(name.rstrip(b'\0').decode(), start, length))
+
+    words = numpy.frombuffer(buffer, dtype=IMAGE_WORD, count=words_count,
+                             offset=IMAGE_HEADER.size + sections_count * IMAGE_SECTION.size)
+    return Image(words, entry, sections)
+
+
+def read_legacy_image(filename: str) -> Image:
+    """Прочесть образ в старом текстовом формате."""
+    digits = numpy.fromfile(filename, dtype=numpy.uint8)
+    assert len(digits) % LEGACY_WORD_LENGTH == 0, 'Broken legacy image'
+
+    bits = digits.reshape(-1, LEGACY_WORD_LENGTH).astype(numpy.uint32) - ord('0')
+    weights = numpy.uint32(1) << numpy.arange(LEGACY_WORD_LENGTH - 1, -1, -1, dtype=numpy.uint32)
+    return Image(bits @ weights, 0, [])
 
 
 def read_code(filename: str) -> List[int16]:
     """Прочесть машинный код из файла."""
-    codes: List[int16] = []
+    return read_image(filename).words.tolist()
+
+
+# Слово памяти машины: знаковое 32-битное, ширины слова образа
+MEMORY_TYPECODE = 'i'
+WORD_BITS = 32
+
+assert array(MEMORY_TYPECODE).itemsize * 8 == WORD_BITS, 'Unsupported C int width'
+
+
+def to_word(value: int) -> int:
+    """Значение, усеченное до машинного слова с переносом."""
+    return ((value & 0xFFFFFFFF) ^ 0x80000000) - 0x80000000
+
+
+def to_words(values: Sequence[int]) -> array:
+    """Слова памяти из последовательности значений, не влезающие в слово переносятся."""
+    try:
+        return array(MEMORY_TYPECODE, values)
+    except OverflowError:
+        return array(MEMORY_TYPECODE, map(to_word, values))
+
+
+def new_memory(memory_size: int) -> array:
+    """Обнуленная память на memory_size слов."""
+    assert memory_size > 0, 'Memory size is not positive'
+    return array(MEMORY_TYPECODE, bytes(memory_size * (WORD_BITS // 8)))
+
+
+def map_memory(filename: str, memory_size: int) -> memoryview:
+    """Память, отображенная из образа или файла сырых слов без чтения целиком.
+
+    Отображение копируется при записи: изменения памяти не попадают в файл. Если в файле меньше
+    memory_size слов, память -- обнуленное анонимное отображение, в начало которого скопированы слова файла.
+    """
+    assert memory_size > 0, 'Memory size is not positive'
+    word_size = WORD_BITS // 8
+    with open(filename, mode='rb') as file:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
 
-    with open(filename, encoding="utf-8") as file:
-        while True:
-            code_str = file.read(17)
-            if code_str == '':
-                break
+    offset = 0
+    words_count = len(buffer) // word_size
+    if buffer[:len(IMAGE_MAGIC)] == IMAGE_MAGIC:
+        _, _, sections_count, _, words_count = IMAGE_HEADER.unpack_from(buffer)
+        offset = IMAGE_HEADER.size + sections_count * IMAGE_SECTION.size
+        words_count = min(words_count, (len(buffer) - offset) // word_size)
 
-            codes.append(int(code_str.encode(), 2))
+    size = memory_size * word_size
+    if words_count >= memory_size:
+        return memoryview(buffer)[offset:offset + size].cast(MEMORY_TYPECODE)
 
-    return codes
+    # Нетронутые страницы анонимного отображения не занимают памяти
+    memory = mmap.mmap(-1, size)
+    memory[:words_count * word_size] = buffer[offset:offset + words_count * word_size]
+    buffer.close()
+    return memoryview(memory).cast(MEMORY_TYPECODE)
@@ -4,9 +4,13 @@
 # pylint: disable=line-too-long               # строки с ожидаемым выводом
 
 import json
+import os
+import tempfile
+import unittest
 from typing import List
 from numpy import binary_repr
-from isa import write_logs, write_code, read_code, Term
+from isa import write_logs, write_code, read_code, read_image, Term, Opcode, Instruction, Section, encode, encode_batch, decode, \
+    IMAGE_HEADER, IMAGE_SECTION, IMAGE_MAGIC, IMAGE_VERSION
 
 
 def write_logs_test() -> bool:
@@ -49,9 +53,11 @@ def write_code_test() -> bool:
     write_code(test_file, code)
 
     with open(test_file, mode='rb') as file:
-        if file.read(16).decode() != binary_repr(code[0], 16):
+        if file.read(IMAGE_HEADER.size) != IMAGE_HEADER.pack(IMAGE_MAGIC, IMAGE_VERSION, 0, 0, len(code)):
             return False
-        if file.read(16).decode() != binary_repr(code[1], 16):
+        if int.from_bytes(file.read(4), 'little') != code[0]:
+            return False
+        if int.from_bytes(file.read(4), 'little') != code[1]:
             return False
 
     return True
@@ -66,8 +72,8 @@ def read_code_test() -> bool:
     ]
 
     with open(test_file, mode='wb') as file:
-        file.write(binary_repr(codes[0], 16).encode())
-        file.write(binary_repr(codes[1], 16).encode())
+        file.write(binary_repr(codes[0], 17).encode())
+        file.write(binary_repr(codes[1], 17).encode())
 
     received_codes: List[int] = read_code(test_file)
 
@@ -79,6 +85,75 @@ def read_code_test() -> bool:
     return True
 
 
+class ImageTests(unittest.TestCase):
+    """
+    1) Образ читается обратно вместе с точкой входа и секциями
+    2) Старый текстовый формат читается
+    3) Образ более новой версии не читается
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.filename = os.path.join(self.directory.name, 'code.bin')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_WriteAndRead_SameImage(self):
+        sections = [Section('.text', 0, 1), Section('.data', 1, 2)]
+
+        write_code(self.filename, [1032, 104, 101], 0, sections)
+        image = read_image(self.filename)
+
+        self.assertEqual(image.words.tolist(), [1032, 104, 101])
+        self.assertEqual(image.entry, 0)
+        self.assertEqual(image.sections, sections)
+        self.assertEqual(os.path.getsize(self.filename), IMAGE_HEADER.size + 2 * IMAGE_SECTION.size + 3 * 4)
+
+    def test_ReadLegacyImage_ReceiveWords(self):
+        with open(self.filename, mode='wb') as file:
+            file.write(binary_repr(126998, 17).encode() + binary_repr(12, 17).encode())
+
+        image = read_image(self.filename)
+
+        self.assertEqual(image.words.tolist(), [126998, 12])
+        self.assertEqual(image.entry, 0)
+
+    def test_ReadNewerVersion_ThrowsError(self):
+        with open(self.filename, mode='wb') as file:
+            file.write(IMAGE_HEADER.pack(IMAGE_MAGIC, IMAGE_VERSION + 1, 0, 0, 0))
+
+        with self.assertRaises(AttributeError):
+            read_image(self.filename)
+
+
+class EncodingTests(unittest.TestCase):
+    """
+    1) Кодирование по таблице совпадает с README
+    2) Пакетное кодирование совпадает с поштучным
+    3) Декодирование обратно кодированию
+    """
+
+    def test_EncodeStore_SplitImmediate(self):
+        # (1111) 100 000 (001) 0110 sw x4, +121(ZR)
+        self.assertEqual(encode('sw', reg1=4, imm=121), 126998)
+        # (0001) 100 000 (000) 0110 sw x4, +8(ZR)
+        self.assertEqual(encode('sw', reg1=4, imm=8), 12294)
+
+    def test_EncodeBatch_SameAsSingle(self):
+        program = [('addi', 4, 0, 0, 1), ('add', 1, 0, 4, 0), ('cmp', 5, 6, 0, 20), ('jg', 0, 0, 0, 42), ('halt', 0, 0, 0, 0)]
+
+        words = encode_batch([Opcode[mnemonic.upper()] for mnemonic, *_ in program],
+                             [operands for _, *operands in program])
+
+        self.assertEqual(words.tolist(), [encode(*instruction) for instruction in program])
+
+    def test_Decode_ReceiveOperands(self):
+        self.assertEqual(decode(126998), Instruction(Opcode.SW, 4, 0, 0, 121))
+        self.assertEqual(decode(encode('rem', 1, 1, 2)), Instruction(Opcode.REM, 1, 1, 2, 0))
+        self.assertEqual(decode(encode('bne', imm=99)), Instruction(Opcode.BNE, 0, 0, 0, 99))
+
+
 def main():
     print(write_logs_test())
     print(write_code_test())
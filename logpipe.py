@@ -0,0 +1,121 @@
+# pylint: disable=missing-module-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-class-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-function-docstring  # чтобы не быть Капитаном Очевидностью
+# pylint: disable=line-too-long               # строки с ожидаемым выводом
+
+import logging
+import queue
+import threading
+from logging.handlers import QueueHandler
+from typing import List
+
+LOG_FORMAT = '%(levelname)s %(message)s'
+
+
+class LogFlags():
+    """Уровни логирования, вычисленные заранее: в горячем цикле проверяется атрибут, а не логгер.
+
+    Пересчитываются при запуске моделей и при смене конвейера логирования.
+    """
+
+    def __init__(self) -> None:
+        self.debug = False
+        self.info = False
+        self.warning = True
+        self.refresh()
+
+    def refresh(self) -> None:
+        root = logging.root
+        self.debug = root.isEnabledFor(logging.DEBUG)
+        self.info = root.isEnabledFor(logging.INFO)
+        self.warning = root.isEnabledFor(logging.WARNING)
+
+
+LOG_FLAGS = LogFlags()
+
+
+class DeferredQueueHandler(QueueHandler):
+    """Кладет запись в очередь как есть: форматирование переносится в поток записи."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class LogWriter(threading.Thread):
+    """Фоновый поток: забирает из очереди всё накопившееся и пишет в файл одной пачкой."""
+
+    def __init__(self, log_queue: queue.SimpleQueue, filename: str, batch_size: int = 4096) -> None:
+        super().__init__(name='log-writer', daemon=True)
+        self.queue = log_queue
+        self.filename = filename
+        self.batch_size = batch_size
+        self.formatter = logging.Formatter(LOG_FORMAT)
+        # Файл открывается сразу, чтобы ошибки пути были видны вызывающему
+        self.file = open(filename, 'w', encoding='utf-8')  # pylint: disable=consider-using-with
+
+    def run(self) -> None:
+        stopped = False
+        while not stopped:
+            record = self.queue.get()
+            batch: List[str] = []
+            while True:
+                if record is None:
+                    stopped = True
+                    break
+                batch.append(self.formatter.format(record))
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    record = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self.file.write('\n'.join(batch) + '\n')
+        self.file.close()
+
+    def stop(self) -> None:
+        self.queue.put(None)
+        self.join()
+
+
+class LogPipeline():
+    """Лог симуляции в файл; asynchronous=True -- через очередь и фоновый поток записи."""
+
+    def __init__(self, filename: str, level: int = logging.INFO, asynchronous: bool = True) -> None:
+        self.writer: LogWriter | None = None
+        if asynchronous:
+            log_queue: queue.SimpleQueue = queue.SimpleQueue()
+            self.writer = LogWriter(log_queue, filename)
+            handler: logging.Handler = DeferredQueueHandler(log_queue)
+        else:
+            handler = logging.FileHandler(filename, mode='w', encoding='utf-8')
+            handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        self.handler = handler
+
+        # Обработчики корневого логгера снимаются без закрытия и возвращаются в stop()
+        self._saved_handlers = logging.root.handlers[:]
+        self._saved_level = logging.root.level
+        for saved in self._saved_handlers:
+            logging.root.removeHandler(saved)
+        logging.root.addHandler(handler)
+        logging.root.setLevel(level)
+        LOG_FLAGS.refresh()
+        if self.writer is not None:
+            self.writer.start()
+
+    def stop(self) -> None:
+        """Дописать очередь, закрыть файл и вернуть корневой логгер в исходное состояние."""
+        logging.root.removeHandler(self.handler)
+        self.handler.close()
+        if self.writer is not None:
+            self.writer.stop()
+        for saved in self._saved_handlers:
+            logging.root.addHandler(saved)
+        logging.root.setLevel(self._saved_level)
+        LOG_FLAGS.refresh()
+
+    def __enter__(self) -> 'LogPipeline':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
@@ -0,0 +1,60 @@
+# pylint: disable=missing-module-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-class-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-function-docstring  # чтобы не быть Капитаном Очевидностью
+# pylint: disable=line-too-long               # строки с ожидаемым выводом
+
+import logging
+import os
+import tempfile
+import unittest
+from unittest import mock
+from isa import read_image
+from logpipe import LOG_FLAGS, LogPipeline
+from machine import simulation
+
+
+class LogPipelineTests(unittest.TestCase):
+    """
+    1) Лог через очередь совпадает с синхронным символ в символ
+    2) Без INFO горячий цикл не вызывает логгер
+    3) После остановки корневой логгер и флаги возвращаются в исходное состояние
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.filename = os.path.join(self.directory.name, 'run.logs')
+        image = read_image('examples/hello.out')
+        self.program, self.entry = image.words.tolist(), image.entry
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_Asynchronous_SameAsGoldenLog(self):
+        for asynchronous in [True, False]:
+            with self.subTest(asynchronous=asynchronous):
+                with LogPipeline(self.filename, asynchronous=asynchronous):
+                    simulation(self.program, self.entry, True)
+
+                with open(self.filename, encoding='utf-8') as file, open('logs/hello_with_interrupts.logs', encoding='utf-8') as expected:
+                    self.assertEqual(file.read(), expected.read())
+
+    def test_Silent_LoggerNotCalled(self):
+        with mock.patch('logging.info') as info, mock.patch('logging.debug') as debug:
+            simulation(self.program, self.entry, True)
+
+        info.assert_not_called()
+        debug.assert_not_called()
+
+    def test_Stop_RootLoggerRestored(self):
+        handlers, level = logging.root.handlers[:], logging.root.level
+        with LogPipeline(self.filename) as pipeline:
+            self.assertTrue(LOG_FLAGS.info)
+            self.assertEqual(logging.root.handlers, [pipeline.handler])
+
+        self.assertEqual((logging.root.handlers, logging.root.level), (handlers, level))
+        self.assertFalse(LOG_FLAGS.info)
+        self.assertTrue(LOG_FLAGS.warning)
+
+
+if __name__ == '__main__':
+    unittest.main()
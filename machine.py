@@ -5,21 +5,87 @@
 
 import logging
 import sys
-from typing import Dict, List
-from circuit import CircuitComponent, CircuitWire
+from collections import namedtuple
+from functools import partial
+from typing import Callable, Dict, Iterable, List, Mapping, Tuple
+from circuit import CircuitComponent, CircuitWire, EventWire, RegisterView, wire_slice
 from components import SignExpand, Trigger, Memory, RegisterFile, ALU, MUX, IOHandler, Register
+from emulator import Block, Emulator, MachineState
+from netlist import Net, CompiledNetlist, EventScheduler, build, evaluation_order
 
-from isa import read_code, Opcode
+from isa import read_image, Opcode
+from logpipe import LOG_FLAGS, LogPipeline
+from schedule import parse_schedule
+from sinks import OutputSink, FileSink
+from tracing import Tracer
+
+
+class SimulationResult(namedtuple('SimulationResult', 'output ticks registers zero_flag positive_flag memory')):
+    """Итоговое состояние машины после останова."""
 
 
 class DataPath():
-    def __init__(self, memory_size: int = 512) -> None:
+    # Провода схемы: имя и порты 'Component.Port'; направление задают OUTPUTS компонентов
+    NETLIST: Tuple[Net, ...] = (
+        # Pipes
+        Net('alu_result', ('ALU.Result', 'PC.In', 'Adr_Src_Mux.In_1', 'WD_Src_Mux.In_1')),
+        Net('pc', ('PC.Out', 'Adr_Src_Mux.In_0', 'Alu_Src_A_Mux.In_1')),
+        Net('adr', ('Adr_Src_Mux.Out', 'Memory.A', 'IO_Handler.In')),
+        Net('rd', ('Memory.RD', 'IR.In', 'WD_Src_Mux.In_0', 'IO_Handler.Out')),
+        Net('wd', ('WD_Src_Mux.Out', 'Register_File.WD')),
+        Net('instr', ('IR.Out', 'Register_File.A1', 'Register_File.A2', 'Register_File.A3', 'Sign_Expand.In')),
+        Net('rd1', ('Register_File.RD1', 'Alu_Src_A_Mux.In_0')),
+        Net('rd2', ('Register_File.RD2', 'Alu_Src_B_Mux.In_00', 'Memory.WD', 'IO_Handler.WD')),
+        Net('ext_imm', ('Sign_Expand.Out', 'Alu_Src_B_Mux.In_01')),
+        Net('pc_inc', ('Alu_Src_B_Mux.In_10',), 1),
+        Net('src_a', ('Alu_Src_A_Mux.Out', 'ALU.srcA')),
+        Net('src_b', ('Alu_Src_B_Mux.Out', 'ALU.srcB')),
+        # Signals: сначала вентили в порядке ControlUnit.VALVES, чтобы слово управления писалось одним срезом
+        Net('PCWrite', ('PC.EN',)),
+        Net('AdrSrc', ('Adr_Src_Mux.AdrSrc',)),
+        Net('MemWrite', ('Memory.WE',)),
+        Net('IRWrite', ('IR.EN',)),
+        Net('WDSrc', ('WD_Src_Mux.WDSrc',)),
+        Net('ImmSrc', ('Sign_Expand.ImmSrc',)),
+        Net('ALUControl', ('ALU.ALUControl',)),
+        Net('ALUSrcB', ('Alu_Src_B_Mux.ALUSrcB',)),
+        Net('ALUSrcA', ('Alu_Src_A_Mux.ALUSrcA',)),
+        Net('RegWrite', ('Register_File.WE3',)),
+        Net('IOOp', ('IO_Handler.IOOp',)),
+        Net('EF', ('ALU.EF',)),
+        Net('ZeroFlag', ('ALU.ZeroFlag',)),
+        Net('PositiveFlag', ('ALU.PositiveFlag',)),
+        Net('IOInt', ('IO_Handler.IOInt',)),
+    )
+    # Порты, читающие значение провода с прошлого такта
+    LATCHED_INPUTS = frozenset(['PC.In', 'Adr_Src_Mux.In_1', 'WD_Src_Mux.In_1', 'Memory.WD', 'IO_Handler.WD'])
+    # Провода, которые видит устройство управления
+    CONTROL_WIRES: Dict[str, str] = {'OPCODE': 'instr', 'PCWrite': 'PCWrite', 'AdrSrc': 'AdrSrc',
+                                     'MemWrite': 'MemWrite', 'IRWrite': 'IRWrite', 'WDSrc': 'WDSrc',
+                                     'ImmSrc': 'ImmSrc', 'ALUControl': 'ALUControl', 'ALUSrcB': 'ALUSrcB',
+                                     'ALUSrcA': 'ALUSrcA', 'RegWrite': 'RegWrite', 'ZeroFlag': 'ZeroFlag',
+                                     'PositiveFlag': 'PositiveFlag', 'EF': 'EF', 'IOOp': 'IOOp', 'IOInt': 'IOInt'}
+
+    def __init__(self, memory_size: int = 512, int_tokens: Iterable[Tuple[int, str]] = None,
+                 compiled: bool = True, output: OutputSink = None, memory_image: str | None = None,
+                 event_driven: bool = False) -> None:
         self.tick = 0
         self.in_interrupt = False
+        # Двоичная трасса вместо текстового лога, подключается через Tracer.attach
+        self.tracer: Tracer | None = None
+        # Инструменты ниже подключаются через attach до start(): подменяют класс ControlUnit (или DataPath)
+        # подклассом со счетом и кладут себя сюда. Без attach модель не меняется и ничего не стоит;
+        # два инструмента, подменяющих один класс, вместе не подключаются.
+        # Замер времени хоста по компонентам, подключается через hostprofile.HostProfiler.attach
+        self.host_profiler = None
+        # Аппаратные счетчики, подключаются через perfcounters.PerformanceCounters.attach
+        self.counters = None
+        # Записи о прерываниях, подключаются через irqlatency.InterruptRecorder.attach
+        self.interrupt_recorder = None
 
         self.PC = Trigger()
         self.Adr_Src_Mux = MUX(1, 'AdrSrc')
-        self.Memory = Memory(memory_size)
+        self.Memory = Memory(memory_size, memory_image)
         self.IR = Trigger()
         self.WD_Src_Mux = MUX(1, 'WDSrc')
         self.Register_File = RegisterFile()
@@ -27,138 +93,35 @@ class DataPath():
         self.Alu_Src_A_Mux = MUX(1, 'ALUSrcA')
         self.Alu_Src_B_Mux = MUX(2, 'ALUSrcB')
         self.ALU = ALU()
-        self.IO_Handler = IOHandler()
-
-        self.control_wires: Dict[str, CircuitWire] = {}
+        self.IO_Handler = IOHandler(int_tokens, output)
+
+        self.components: Dict[str, CircuitComponent] = {
+            name: getattr(self, name) for name in ['PC', 'Adr_Src_Mux', 'Memory', 'IR', 'WD_Src_Mux', 'Register_File',
+                                                   'Sign_Expand', 'Alu_Src_A_Mux', 'Alu_Src_B_Mux', 'ALU', 'IO_Handler']}
+        self.wires: Dict[str, CircuitWire] = build(self.components, self.NETLIST,
+                                                   EventWire if event_driven else CircuitWire)
+        self.control_wires: Dict[str, CircuitWire] = {name: self.wires[net] for name, net in self.CONTROL_WIRES.items()}
+        self.order: List[str] = evaluation_order(self.components, self.NETLIST, self.LATCHED_INPUTS)
+
+        # Событийный такт вычисляет только компоненты с изменившимися входами, compiled при нем не действует
+        self.netlist: CompiledNetlist | None = None
+        self.scheduler: EventScheduler | None = None
+        if event_driven:
+            self.scheduler = EventScheduler(self.components, self.wires, self.NETLIST, self.order)
+            self._tick = self.scheduler.tick
+        elif compiled:
+            self.netlist = CompiledNetlist(self.components, self.wires, self.order)
+            self._tick = self.netlist.tick
+        else:
+            self._tick = self._interpret_tick
 
-        # Pipes
-        alu_result_pipe = CircuitWire()
-        pc_pipe = CircuitWire()
-        adr_pipe = CircuitWire()
-        rd_pipe = CircuitWire()
-        wd_pipe = CircuitWire()
-        instr_pipe = CircuitWire()
-        rd1_pipe = CircuitWire()
-        rd2_pipe = CircuitWire()
-        ext_imm_pipe = CircuitWire()
-        pc_inc_pipe = CircuitWire(1)
-        src_a_pipe = CircuitWire()
-        src_b_pipe = CircuitWire()
-
-        # Attach pipes
-        self.ALU.attach('Result', alu_result_pipe)
-        self.PC.attach('In', alu_result_pipe)
-        self.Adr_Src_Mux.attach('In_1', alu_result_pipe)
-        self.WD_Src_Mux.attach('In_1', alu_result_pipe)
-
-        self.PC.attach('Out', pc_pipe)
-        self.Adr_Src_Mux.attach('In_0', pc_pipe)
-        self.Alu_Src_A_Mux.attach('In_1', pc_pipe)
-
-        self.Adr_Src_Mux.attach('Out', adr_pipe)
-        self.Memory.attach('A', adr_pipe)
-        self.IO_Handler.attach('In', adr_pipe)
-
-        self.Memory.attach('RD', rd_pipe)
-        self.IR.attach('In', rd_pipe)
-        self.WD_Src_Mux.attach('In_0', rd_pipe)
-        self.IO_Handler.attach('Out', rd_pipe)
-
-        self.WD_Src_Mux.attach('Out', wd_pipe)
-        self.Register_File.attach('WD', wd_pipe)
-
-        self.IR.attach('Out', instr_pipe)
-        self.Register_File.attach('A1', instr_pipe)
-        self.Register_File.attach('A2', instr_pipe)
-        self.Register_File.attach('A3', instr_pipe)
-        self.Sign_Expand.attach('In', instr_pipe)
-
-        self.Register_File.attach('RD1', rd1_pipe)
-        self.Alu_Src_A_Mux.attach('In_0', rd1_pipe)
-
-        self.Register_File.attach('RD2', rd2_pipe)
-        self.Alu_Src_B_Mux.attach('In_00', rd2_pipe)
-        self.Memory.attach('WD', rd2_pipe)
-        self.IO_Handler.attach('WD', rd2_pipe)
-
-        self.Sign_Expand.attach('Out', ext_imm_pipe)
-        self.Alu_Src_B_Mux.attach('In_01', ext_imm_pipe)
-
-        self.Alu_Src_B_Mux.attach('In_10', pc_inc_pipe)
-
-        self.Alu_Src_A_Mux.attach('Out', src_a_pipe)
-        self.ALU.attach('srcA', src_a_pipe)
-
-        self.Alu_Src_B_Mux.attach('Out', src_b_pipe)
-        self.ALU.attach('srcB', src_b_pipe)
-
-        # Signals
-        pc_write_signal = CircuitWire()
-        adr_src_signal = CircuitWire()
-        mem_write_signal = CircuitWire()
-        ir_write_signal = CircuitWire()
-        wd_src_signal = CircuitWire()
-        imm_src_signal = CircuitWire()
-        alu_control_signal = CircuitWire()
-        alu_src_b_signal = CircuitWire()
-        alu_src_a_signal = CircuitWire()
-        reg_write_signal = CircuitWire()
-        zero_signal = CircuitWire()
-        io_operation_signal = CircuitWire()
-        io_inerrupt_signal = CircuitWire()
-        positive_signal = CircuitWire()
-        edit_flags_signal = CircuitWire()
-
-        # Attach signals
-        self.PC.attach('EN', pc_write_signal)
-        self.Adr_Src_Mux.attach('AdrSrc', adr_src_signal)
-        self.Memory.attach('WE', mem_write_signal)
-        self.IR.attach('EN', ir_write_signal)
-        self.WD_Src_Mux.attach('WDSrc', wd_src_signal)
-        self.Sign_Expand.attach('ImmSrc', imm_src_signal)
-        self.Register_File.attach('WE3', reg_write_signal)
-        self.Alu_Src_A_Mux.attach('ALUSrcA', alu_src_a_signal)
-        self.Alu_Src_B_Mux.attach('ALUSrcB', alu_src_b_signal)
-        self.ALU.attach('ALUControl', alu_control_signal)
-        self.ALU.attach('ZeroFlag', zero_signal)
-        self.ALU.attach('PositiveFlag', positive_signal)
-        self.ALU.attach('EF', edit_flags_signal)
-        self.IO_Handler.attach('IOOp', io_operation_signal)
-        self.IO_Handler.attach('IOInt', io_inerrupt_signal)
-
-        # Register control wires
-        self.control_wires['OPCODE'] = instr_pipe
-        self.control_wires['PCWrite'] = pc_write_signal
-        self.control_wires['PCWrite'] = pc_write_signal
-        self.control_wires['AdrSrc'] = adr_src_signal
-        self.control_wires['MemWrite'] = mem_write_signal
-        self.control_wires['IRWrite'] = ir_write_signal
-        self.control_wires['WDSrc'] = wd_src_signal
-        self.control_wires['ImmSrc'] = imm_src_signal
-        self.control_wires['ALUControl'] = alu_control_signal
-        self.control_wires['ALUSrcB'] = alu_src_b_signal
-        self.control_wires['ALUSrcA'] = alu_src_a_signal
-        self.control_wires['RegWrite'] = reg_write_signal
-        self.control_wires['ZeroFlag'] = zero_signal
-        self.control_wires['PositiveFlag'] = positive_signal
-        self.control_wires['EF'] = edit_flags_signal
-        self.control_wires['IOOp'] = io_operation_signal
-        self.control_wires['IOInt'] = io_inerrupt_signal
+    def _interpret_tick(self) -> None:
+        for name in self.order:
+            self.components[name].do_tick()
 
     def do_tick(self) -> None:
         self.tick += 1
-
-        self.PC.do_tick()
-        self.Adr_Src_Mux.do_tick()
-        self.Memory.do_tick()
-        self.IO_Handler.do_tick()
-        self.IR.do_tick()
-        self.WD_Src_Mux.do_tick()
-        self.Register_File.do_tick()
-        self.Sign_Expand.do_tick()
-        self.Alu_Src_A_Mux.do_tick()
-        self.Alu_Src_B_Mux.do_tick()
-        self.ALU.do_tick()
+        self._tick()
 
     def enter_interrupt(self) -> None:
         self.in_interrupt = True
@@ -167,9 +130,11 @@ class DataPath():
         self.PC.state = self.Register_File.inner_registers[Register.x6]
         self.Register_File.inner_registers[Register.x7] = prev_pc
         # Save ALU Result
-        self.Memory.memory[256] = self.ALU.get_register('Result')
+        self.Memory.write(256, self.ALU.get_register('Result'))
         # Save current command
-        self.Memory.memory[257] = self.IR.state
+        self.Memory.write(257, self.IR.state)
+        if self.scheduler is not None:
+            self.scheduler.invalidate()
 
     def exit_interrupt(self) -> None:
         self.in_interrupt = False
@@ -180,21 +145,45 @@ class DataPath():
             'Result', self.Memory.memory[256])
         # Restore prev instr
         self.IR.state = self.Memory.memory[257]
+        if self.scheduler is not None:
+            self.scheduler.invalidate()
 
     def log_state(self) -> None:
+        if not (LOG_FLAGS.warning if self.in_interrupt else LOG_FLAGS.info):
+            return
         msg = (f'Tick {self.tick}\tPC: {self.PC.state}\tRegisters: {list(self.Register_File.inner_registers.values())}\tSrcA: {self.ALU.get_register("srcA")} | SrcB: {self.ALU.get_register("srcB")} | Result: {self.ALU.get_register("Result")}\tA1: {self.Register_File.get_register("A1")} | A2: {self.Register_File.get_register("A2")} | A3: {self.Register_File.get_register("A3")}PF: {self.ALU.get_register("PositiveFlag")} | ZF: {self.ALU.get_register("ZeroFlag")}')
         if self.in_interrupt:
             logging.warning('(Int) %s', msg)
         else:
             logging.info(msg)
 
+    def state(self) -> MachineState:
+        return MachineState(self.tick, self.PC.state, tuple(self.Register_File.inner_registers.values()),
+                            self.ALU.get_register('ZeroFlag'), self.ALU.get_register('PositiveFlag'),
+                            self.IO_Handler.output.count)
+
 
 class ControlUnit(CircuitComponent):
+    __slots__ = ('__is_interrupts_allowed', 'in_interrupt_context', 'instruction_hook', '_instruction_transitions',
+                 '_fetch_word', '_transition_table', '_valve_wires', '_valve_cells', '_wire_list', '_opcode_link',
+                 '_context', '_context_view', '_interrupted_words', '_interrupted_position',
+                 '_opcode', '_zero_flag', '_positive_flag', '_io_int', 'halted', 'pause_requested')
+
+    # Вентили, которые выставляет устройство управления; остальные регистры только читаются
+    VALVES: Tuple[str, ...] = ('PCWrite', 'AdrSrc', 'MemWrite', 'IRWrite', 'WDSrc', 'ImmSrc', 'ALUControl',
+                               'ALUSrcB', 'ALUSrcA', 'RegWrite', 'IOOp', 'EF')
+    FETCH: Dict[str, int] = {'IRWrite': 1}
+    SKIP_TRANSITIONS: List[Dict[str, int]] = [{'ALUSrcA': 1, 'ALUSrcB': 2, 'ALUControl': 0},
+                                              {'PCWrite': 1}]
 
     def __init__(self, is_interrupts_allowed: bool = False) -> None:
         self.__is_interrupts_allowed: bool = is_interrupts_allowed
 
         self.in_interrupt_context: bool = False
+        # start() вернулся на HALT; pause_requested -- вернуться после текущей инструкции, повторный start() продолжит
+        self.halted = False
+        self.pause_requested = False
+        self.instruction_hook: Callable[[DataPath], None] | None = None
         self._instruction_transitions: Dict[Opcode, List[Dict[str, int]]] = {
             Opcode.ADDI: [{'IRWrite': 1, 'ALUSrcB': 1, 'EF': 1},
                           {'WDSrc': 1, 'RegWrite': 1,
@@ -234,126 +223,358 @@ class ControlUnit(CircuitComponent):
         super().__init__(['OPCODE', 'PCWrite', 'AdrSrc', 'MemWrite', 'IRWrite', 'WDSrc', 'IOOp',
                           'ImmSrc', 'ALUControl', 'ALUSrcB', 'ALUSrcA', 'RegWrite', 'ZeroFlag', 'PositiveFlag', 'EF', 'IOInt'])
 
+        # Слова управления собираются один раз: переход по (opcode, ZF, PF) -- индекс в таблице
+        self._fetch_word: Tuple[int, ...] = self.control_word(self.FETCH)
+        self._transition_table: List[Tuple[Tuple[int, ...], ...] | None] = [None] * (16 << 2)
+        for opcode in range(16):
+            for zero_flag in [0, 1]:
+                for positive_flag in [0, 1]:
+                    transitions = self.__get_op_transitions(opcode, zero_flag, positive_flag)
+                    if transitions is not None:
+                        self._transition_table[self.transition_index(opcode, zero_flag, positive_flag)] = \
+                            tuple(self.control_word(valves_state) for valves_state in transitions)
+
+        self._valve_wires: List[CircuitWire] = []
+        self._valve_cells: Tuple[List[int], slice] | None = None
+        self._wire_list: List[Tuple[int, CircuitWire]] = []
+        self._opcode_link: Tuple[int, CircuitWire] | None = None
+        # Индексы регистров, которые читает цикл start()
+        self._opcode, self._zero_flag, self._positive_flag, self._io_int = \
+            (self.ports[name] for name in ['OPCODE', 'ZeroFlag', 'PositiveFlag', 'IOInt'])
+
+        # Область сохранения контекста и прерванная инструкция, выделяются один раз
+        self._context: List[int] = list(self.values)
+        self._context_view = RegisterView(self.ports, self._context)
+        self._interrupted_words: Tuple[Tuple[int, ...], ...] = ()
+        self._interrupted_position = 0
+
+    @staticmethod
+    def transition_index(opcode: int, zero_flag: int, positive_flag: int) -> int:
+        return (opcode << 2) | (zero_flag << 1) | positive_flag
+
+    def control_word(self, valves_state: Dict[str, int]) -> Tuple[int, ...]:
+        """Значения вентилей в порядке VALVES, неиспользуемые обнуляются."""
+        for register_name in valves_state:
+            assert register_name in self.ports, 'Указанный регистр не существует'
+        return tuple(valves_state.get(register_name, 0) for register_name in self.VALVES)
+
     def start(self, data_path: DataPath = None) -> None:
+        """Цикл выборки и исполнения, прерывания обрабатываются в нем же без рекурсии.
+
+        position -- сколько тактов инструкции уже выполнено: 0 -- впереди выборка,
+        1 -- выборка выполнена, инструкция декодируется, len(control_words) + 1 -- инструкция завершена.
+        При входе в прерывание прерванная инструкция запоминается в _interrupted_words/_interrupted_position,
+        HALT обработчика возвращает исполнение на такт, после которого пришло прерывание.
+        С pause_requested цикл возвращается после инструкции, повторный вызов продолжает со следующей.
+        """
         self.attach_wires(data_path.control_wires)
+        LOG_FLAGS.refresh()
+        self.halted = False
 
+        values = self.values
+        opcode_index, zero_flag_index, positive_flag_index = self._opcode, self._zero_flag, self._positive_flag
+        control_words: Tuple[Tuple[int, ...], ...] = ()
+        position = 0
         while True:
-            self.change_state(data_path, {'IRWrite': 1})
+            self.apply_control_word(data_path, self._fetch_word if position == 0 else control_words[position - 1])
+            position += 1
+
+            if self.__interrupt_pending():
+                self._interrupted_words, self._interrupted_position = control_words, position
+                self.save_context()
+                # Goto interrupt vector
+                data_path.enter_interrupt()
+                position = 0
+                continue
 
-            opcode = self.get_register('OPCODE')
-            if opcode == Opcode.HALT:
+            while True:
+                if position == 1:
+                    opcode = values[opcode_index]
+                    if opcode == Opcode.HALT:
+                        if not self.in_interrupt_context:
+                            self.halted = True
+                            return
+                        # Back to prev PC and continue interrupted instruction after its tick
+                        data_path.exit_interrupt()
+                        self.restore_context(self._context_view)
+                        control_words, position = self._interrupted_words, self._interrupted_position
+                        continue
+
+                    control_words = self._transition_table[
+                        (opcode << 2) | (values[zero_flag_index] << 1) | values[positive_flag_index]]
+                    if control_words is None:
+                        raise AttributeError('Unsupported opcode: ' + str(opcode))
+                elif position > len(control_words):
+                    if data_path.tracer is not None:
+                        data_path.tracer.instruction(data_path)
+                    elif LOG_FLAGS.warning:
+                        if LOG_FLAGS.info:
+                            logging.info(Opcode(values[opcode_index]).name)
+                        data_path.log_state()
+                    if self.instruction_hook is not None:
+                        self.instruction_hook(data_path)
+                    position = 0
+                    if self.pause_requested:
+                        self.pause_requested = False
+                        return
                 break
 
-            op_transitions = self.__get_op_transitions(opcode)
-            if op_transitions is not None:
-                for valves_state in op_transitions:
-                    self.change_state(data_path, valves_state)
-            else:
-                raise AttributeError('Unsupported opcode: ' + str(opcode))
-
-            logging.info(Opcode(opcode).name)
-            data_path.log_state()
-
     def update(self):
-        for wire_name, wire in self._wires.items():
-            match wire_name:
-                case 'OPCODE':
-                    self.registers[wire_name] = wire.get() & 15
-                case _:
-                    self.registers[wire_name] = wire.get()
+        values = self.values
+        for index, wire in self._wire_list:
+            values[index] = wire.get()
+        if self._opcode_link is not None:
+            index, wire = self._opcode_link
+            values[index] = wire.get() & 15
+
+    def attach(self, register_name: str, wire: CircuitWire) -> None:
+        super().attach(register_name, wire)
+        self._wire_list = [(index, linked) for index, linked in self._links if index != self._opcode]
+        if 'OPCODE' in self._wires:
+            self._opcode_link = (self._opcode, self._wires['OPCODE'])
+        if all(name in self._wires for name in self.VALVES):
+            self._valve_wires = [self._wires[name] for name in self.VALVES]
+            self._valve_cells = wire_slice(self._valve_wires)
 
     def attach_wires(self, wires: Dict[str, CircuitWire]):
         for wire_name, wire in wires.items():
             self.attach(wire_name, wire)
 
-    def save_context(self) -> Dict[str, int]:
+    def save_context(self) -> RegisterView:
         # Set interrupt mode and receive INT signal
         self.in_interrupt_context = True
         self.set_register('IOInt', 0)
 
-        # Save control unit state
-        return self.registers.copy()
+        # Save control unit state into preallocated area
+        self._context[:] = self.values
+        return self._context_view
 
-    def restore_context(self, registers: Dict[str, int]) -> None:
+    def restore_context(self, registers: Mapping[str, int]) -> None:
         # Restore state after handling interrupt
-        self.registers = registers
+        if registers is self._context_view:
+            self.values[:] = self._context
+        else:
+            self.registers.update(registers)
         self.in_interrupt_context = False
 
-    def _change_valves(self, new_state: Dict[str, int] | None) -> None:
-        for register_name in self.registers.keys():
-            # Volatile registers
-            if register_name in ['OPCODE', 'ZeroFlag', 'PositiveFlag', 'IOInt']:
-                continue
-
-            if new_state.get(register_name) is not None:
-                self.set_register(register_name, new_state[register_name])
-            else:
-                # Set to zero all unused registers to easily handle instructions
-                self.set_register(register_name, 0)
+    def _change_valves(self, control_word: Tuple[int, ...]) -> None:
+        # Регистры вентилей обновятся из проводов в update() после такта
+        if self._valve_cells is not None:
+            cells, valves = self._valve_cells
+            cells[valves] = control_word
+        else:
+            for wire, value in zip(self._valve_wires, control_word):
+                wire.set(value)
 
     def change_state(self, data_path: DataPath, new_state: Dict[str, int] = None) -> None:
-        self._change_valves(new_state)
+        self.apply_control_word(data_path, self.control_word(new_state or {}))
+
+    def apply_control_word(self, data_path: DataPath, control_word: Tuple[int, ...]) -> None:
+        self._change_valves(control_word)
         data_path.do_tick()
         self.update()
-        self.__handle_interrupt(data_path)
-
-    def __handle_interrupt(self, data_path: DataPath) -> None:
-        if (self.__is_interrupts_allowed and (not self.in_interrupt_context) and self.get_register('IOInt') == 1):
-            registers = self.save_context()
-
-            # Goto interrupt vector
-            data_path.enter_interrupt()
-            # Start executing
-            self.start(data_path)
-            # Back to prev PC
-            data_path.exit_interrupt()
 
-            self.restore_context(registers)
+    def __interrupt_pending(self) -> bool:
+        # IOInt защелкивается IOHandler и сбрасывается в save_context
+        return self.__is_interrupts_allowed and (not self.in_interrupt_context) and self.values[self._io_int] == 1
 
-    def __get_op_transitions(self, op: int) -> None | List[Dict[str, int]]:
-        skip_transitions = [{'ALUSrcA': 1, 'ALUSrcB': 2, 'ALUControl': 0},
-                            {'PCWrite': 1}]
+    def __get_op_transitions(self, op: int, zero_flag: int, positive_flag: int) -> None | List[Dict[str, int]]:
         match op:
             case Opcode.JG:
-                if self.get_register('PositiveFlag') == 1:
+                if positive_flag == 1:
                     return self._instruction_transitions.get(Opcode.JMP)
             case Opcode.BNE:
-                if self.get_register('ZeroFlag') != 1:
+                if zero_flag != 1:
                     return self._instruction_transitions.get(Opcode.JMP)
             case Opcode.BEQ:
-                if self.get_register('ZeroFlag') == 1:
+                if zero_flag == 1:
                     return self._instruction_transitions.get(Opcode.JMP)
             case _:
                 return self._instruction_transitions.get(op)
 
-        return skip_transitions
+        return self.SKIP_TRANSITIONS
 
 
-def simulation(program: List[int], text_start_adr: int = 0, is_interrupts_allowed: bool = False,
-               memory_size: int = 512) -> None:
+# Обработчик прерывания: ld x1, +120(ZR); halt
+INTERRUPT_PROGRAM = [122901, 12]
+INTERRUPT_VECTOR = 200
+
+
+def build_machine(program: List[int], text_start_adr: int = 0, is_interrupts_allowed: bool = False,
+                  memory_size: int = 512, int_tokens: Iterable[Tuple[int, str]] = None,
+                  output: OutputSink = None, memory_image: str | None = None,
+                  event_driven: bool = False) -> Tuple[ControlUnit, DataPath]:
+    """Устройство управления и DataPath с загруженной программой и обработчиком прерывания."""
     control_unit = ControlUnit(is_interrupts_allowed)
-    data_path = DataPath(memory_size)
+    data_path = DataPath(memory_size, int_tokens, output=output, memory_image=memory_image,
+                         event_driven=event_driven)
 
     data_path.Memory.load_program(program, 0)
     data_path.PC.state = text_start_adr
 
-    interrupt_program = [122901, 12]
     # Interrupt vector address
-    data_path.Register_File.inner_registers[6] = 200
-    data_path.Memory.load_program(interrupt_program, 200)
+    data_path.Register_File.inner_registers[6] = INTERRUPT_VECTOR
+    data_path.Memory.load_program(INTERRUPT_PROGRAM, INTERRUPT_VECTOR)
+    return control_unit, data_path
+
+
+def machine_result(data_path: DataPath) -> SimulationResult:
+    return SimulationResult(data_path.IO_Handler.saved_tokens, data_path.tick,
+                            list(data_path.Register_File.inner_registers.values()),
+                            data_path.ALU.get_register('ZeroFlag'), data_path.ALU.get_register('PositiveFlag'),
+                            data_path.Memory.memory)
+
+
+def circuit_simulation(program: List[int], text_start_adr: int = 0, is_interrupts_allowed: bool = False,
+                       memory_size: int = 512, int_tokens: Iterable[Tuple[int, str]] = None,
+                       instruction_hook: Callable[[DataPath], None] = None,
+                       output: OutputSink = None, tracer: Tracer = None,
+                       memory_image: str | None = None, event_driven: bool = False) -> SimulationResult:
+    control_unit, data_path = build_machine(program, text_start_adr, is_interrupts_allowed, memory_size, int_tokens,
+                                            output, memory_image, event_driven)
+    control_unit.instruction_hook = instruction_hook
+    if tracer is not None:
+        tracer.attach(data_path)
 
     control_unit.start(data_path)
 
+    return machine_result(data_path)
+
+
+def fast_simulation(program: List[int], text_start_adr: int = 0, is_interrupts_allowed: bool = False,
+                    memory_size: int = 512, int_tokens: Iterable[Tuple[int, str]] = None,
+                    instruction_hook: Callable[[Emulator], None] = None,
+                    output: OutputSink = None, memory_image: str | None = None,
+                    block_hook: Callable[[Emulator, Block, bool], None] = None) -> SimulationResult:
+    emulator = Emulator(memory_size, is_interrupts_allowed, int_tokens, output=output, memory_image=memory_image)
+    emulator.instruction_hook = instruction_hook
+    emulator.block_hook = block_hook
+
+    emulator.load_program(program, 0)
+    emulator.pc = text_start_adr
+
+    emulator.registers[Register.x6] = INTERRUPT_VECTOR
+    emulator.load_program(INTERRUPT_PROGRAM, INTERRUPT_VECTOR)
+
+    emulator.start()
+
+    return SimulationResult(emulator.saved_tokens, emulator.tick, list(emulator.registers),
+                            emulator.zero_flag, emulator.positive_flag, emulator.memory)
+
+
+class EngineDivergence(AssertionError):
+    """Модели circuit и fast разошлись."""
+
+
+def cross_check(program: List[int], text_start_adr: int = 0, is_interrupts_allowed: bool = False,
+                memory_size: int = 512, int_tokens: Iterable[Tuple[int, str]] = None,
+                instruction_hook: Callable[[DataPath], None] = None, output: OutputSink = None,
+                tracer: Tracer = None, memory_image: str | None = None) -> SimulationResult:
+    """Прогнать программу на обеих моделях и упасть на первом расхождении.
+
+    Вывод в output и трассу получает только схемная модель, вывод быстрой сравнивается по количеству.
+    """
+    trace: List[MachineState] = []
+    fast_error: Exception | None = None
+    try:
+        fast_result = fast_simulation(program, text_start_adr, is_interrupts_allowed, memory_size, int_tokens,
+                                      lambda emulator: trace.append(emulator.state()), memory_image=memory_image)
+    except Exception as error:  # pylint: disable=broad-exception-caught
+        fast_error = error
+
+    position = 0
+
+    def compare(data_path: DataPath) -> None:
+        nonlocal position
+        state = data_path.state()
+        expected = trace[position] if position < len(trace) else None
+        if state != expected:
+            raise EngineDivergence(f'Engines diverged at instruction {position}: circuit {state}, fast {expected}')
+        position += 1
+        if instruction_hook is not None:
+            instruction_hook(data_path)
+
+    try:
+        result = circuit_simulation(program, text_start_adr, is_interrupts_allowed, memory_size, int_tokens, compare,
+                                    output, tracer, memory_image)
+    except EngineDivergence:
+        raise
+    except Exception as error:
+        if type(error) is not type(fast_error) or position != len(trace):
+            raise EngineDivergence(f'Engines diverged at instruction {position}: '
+                                   f'circuit raised {error!r}, fast {fast_error!r}') from error
+        raise
+
+    if fast_error is not None:
+        raise EngineDivergence(f'Engines diverged at instruction {position}: circuit halted, '
+                               f'fast raised {fast_error!r}') from fast_error
+    if position != len(trace):
+        raise EngineDivergence(f'Engines diverged at instruction {position}: circuit halted, fast {trace[position]}')
+    for field in SimulationResult._fields:
+        if field == 'output' and output is not None:
+            continue
+        if getattr(result, field) != getattr(fast_result, field):
+            raise EngineDivergence(f'Engines diverged after halt in {field}: '
+                                   f'circuit {getattr(result, field)}, fast {getattr(fast_result, field)}')
+
+    return result
+
+
+ENGINES: Dict[str, Callable[..., SimulationResult]] = {
+    'circuit': circuit_simulation,
+    # Схема с событийным тактом: пропускает компоненты, входы которых не изменились
+    'events': partial(circuit_simulation, event_driven=True),
+    'fast': fast_simulation,
+    'check': cross_check,
+}
 
-def main(args):
-    filename, start_code, is_interrupts_enabled, logs_file_name = args
 
-    logging.basicConfig(level=logging.INFO,
-                        filename=logs_file_name, filemode="w", format="%(levelname)s %(message)s")
+def simulation(program: List[int], text_start_adr: int = 0, is_interrupts_allowed: bool = False,
+               memory_size: int = 512, engine: str = 'circuit',
+               int_tokens: Iterable[Tuple[int, str]] = None, output: OutputSink = None,
+               tracer: Tracer = None, memory_image: str | None = None) -> SimulationResult:
+    """Прогнать программу выбранной моделью; memory_image -- файл, из которого отображается память."""
+    if engine not in ENGINES:
+        raise AttributeError('Unsupported engine: ' + engine)
+    options: Dict[str, object] = {'output': output, 'memory_image': memory_image}
+    if tracer is not None:
+        if engine == 'fast':
+            raise AttributeError('Binary trace is recorded by the circuit engine only')
+        options['tracer'] = tracer
+
+    return ENGINES[engine](program, text_start_adr, is_interrupts_allowed, memory_size, int_tokens, **options)
 
-    codes = read_code(filename)
 
-    simulation(codes, int(start_code), is_interrupts_enabled == 'True')
+def main(args):
+    args = list(args)
+    # Адрес старта берется из образа, если не указан явно
+    start_code = int(args.pop(1)) if args[1].isdigit() else None
+    filename, is_interrupts_enabled, logs_file_name, *options = args
+    engine = options[0] if options else 'circuit'
+    # Расписание ввода: tokens.csv или input.txt:N (символ каждые N тактов), '-' -- по умолчанию
+    int_tokens = parse_schedule(options[1]) if len(options) > 1 and options[1] != '-' else None
+    # Вывод символами в файл вместо списка в памяти
+    output = FileSink(options[2]) if len(options) > 2 else None
+
+    # Лог с расширением .trace пишется двоичной трассой, текст из нее восстанавливает tracing.py
+    tracer = Tracer(logs_file_name) if logs_file_name.endswith('.trace') else None
+    # Текстовый лог пишется фоновым потоком через очередь
+    log_pipeline = LogPipeline(logs_file_name) if tracer is None else None
+
+    image = read_image(filename)
+    if start_code is None:
+        start_code = image.entry
+
+    try:
+        simulation(image.words.tolist(), start_code, is_interrupts_enabled == 'True', engine=engine,
+                   int_tokens=int_tokens, output=output, tracer=tracer)
+    finally:
+        if output is not None:
+            output.close()
+        if tracer is not None:
+            tracer.close()
+        if log_pipeline is not None:
+            log_pipeline.stop()
 
 
 if __name__ == '__main__':
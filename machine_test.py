@@ -5,7 +5,9 @@
 
 import unittest
 from circuit import CircuitWire
-from machine import ControlUnit, DataPath
+from isa import Opcode
+from machine import ControlUnit, DataPath, cross_check
+from translator import translate
 
 
 class ControlUnitTests(unittest.TestCase):
@@ -16,6 +18,10 @@ class ControlUnitTests(unittest.TestCase):
     4) Подсунуть несуществующую операцию
     5) Чекнуть сохранение контекста прерывания
     6) Чекнуть восстановление контекста прерывания
+    7) Слово управления обнуляет неиспользуемые вентили
+    8) Переход выбирается по таблице (opcode, ZF, PF)
+    9) Слово управления пишется одним срезом в общий массив проводов
+    10) Частые прерывания обрабатываются в одном цикле без рекурсии
     """
 
     def test_DoTick_MaskFirstFourBitsFromOPCODE(self):
@@ -76,6 +82,60 @@ class ControlUnitTests(unittest.TestCase):
         self.assertEqual(control_unit.get_register('IRWrite'), 1)
         self.assertEqual(control_unit.get_register('ALUSrcA'), 1)
 
+    def test_ControlWord_ZeroUnusedValves(self):
+        control_unit = ControlUnit()
+
+        control_word = control_unit.control_word({'IRWrite': 1, 'ALUSrcB': 2})
+
+        self.assertEqual(dict(zip(ControlUnit.VALVES, control_word)),
+                         {valve: {'IRWrite': 1, 'ALUSrcB': 2}.get(valve, 0) for valve in ControlUnit.VALVES})
+
+    def test_TransitionTable_ResolveBranchByFlags(self):
+        control_unit = ControlUnit()
+        jump = tuple(control_unit.control_word(state) for state in control_unit._instruction_transitions[Opcode.JMP])
+        skip = tuple(control_unit.control_word(state) for state in ControlUnit.SKIP_TRANSITIONS)
+
+        # pylint: disable=protected-access
+        table = control_unit._transition_table
+        self.assertEqual(table[ControlUnit.transition_index(Opcode.BEQ, 1, 0)], jump)
+        self.assertEqual(table[ControlUnit.transition_index(Opcode.BEQ, 0, 1)], skip)
+        self.assertEqual(table[ControlUnit.transition_index(Opcode.JG, 0, 1)], jump)
+        self.assertEqual(table[ControlUnit.transition_index(Opcode.BNE, 1, 1)], skip)
+        self.assertIsNone(table[ControlUnit.transition_index(13, 0, 0)])
+
+    def test_CompiledDataPath_WriteControlWordBySlice(self):
+        control_unit = ControlUnit()
+        data_path = DataPath()
+
+        control_unit.attach_wires(data_path.control_wires)
+        control_unit._change_valves(control_unit.control_word({'PCWrite': 1, 'EF': 1}))  # pylint: disable=protected-access
+
+        self.assertIsNotNone(control_unit._valve_cells)  # pylint: disable=protected-access
+        self.assertEqual(data_path.control_wires['PCWrite'].get(), 1)
+        self.assertEqual(data_path.control_wires['EF'].get(), 1)
+        self.assertEqual(data_path.control_wires['IRWrite'].get(), 0)
+
+    def test_FrequentInterrupts_HandleWithoutRecursion(self):
+        with open('examples/hello.asm', encoding='utf-8') as file:
+            _, codes = translate(file.read())
+        tokens = [(tick, 'a') for tick in range(1, 3000, 6)]
+        calls = []
+        original = ControlUnit.start
+
+        def counted(control_unit, data_path):
+            calls.append(data_path)
+            original(control_unit, data_path)
+
+        ControlUnit.start = counted
+        try:
+            result = cross_check(codes, 0, True, int_tokens=tokens)
+        finally:
+            ControlUnit.start = original
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(result.output), len('hello world'))
+        self.assertGreater(result.ticks, 500)
+
 
 class InstructionPerformTests(unittest.TestCase):
     def test_ADDIFirstTick(self):
@@ -0,0 +1,212 @@
+# pylint: disable=missing-module-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-class-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-function-docstring  # чтобы не быть Капитаном Очевидностью
+# pylint: disable=line-too-long               # строки с ожидаемым выводом
+
+import heapq
+import logging
+from collections import namedtuple
+from typing import Callable, Dict, FrozenSet, List, Tuple, Type
+from circuit import CircuitComponent, CircuitWire, PortNames
+from logpipe import LOG_FLAGS
+
+
+class Net(namedtuple('Net', 'name ports initial', defaults=(0,))):
+    """Провод схемы и подключенные к нему порты вида 'Component.Port'."""
+
+
+def split_port(port: str) -> Tuple[str, str]:
+    component, name = port.split('.')
+    return component, name
+
+
+def build(components: Dict[str, CircuitComponent], nets: Tuple[Net, ...],
+          wire_type: Type[CircuitWire] = CircuitWire) -> Dict[str, CircuitWire]:
+    """Создать провода и подключить их к портам компонентов."""
+    wires: Dict[str, CircuitWire] = {}
+    for net in nets:
+        wire = wires[net.name] = wire_type(net.initial)
+        for port in net.ports:
+            component, name = split_port(port)
+            components[component].attach(name, wire)
+    return wires
+
+
+def evaluation_order(components: Dict[str, CircuitComponent], nets: Tuple[Net, ...],
+                     latched: FrozenSet[str] = frozenset()) -> List[str]:
+    """Порядок вычисления компонентов за такт по графу проводов.
+
+    Читатель провода вычисляется после всех его источников, кроме портов из latched:
+    они видят значение прошлого такта, поэтому вычисляются до источника.
+    Источники одного провода вычисляются в порядке объявления, последний перекрывает значение.
+    При равных условиях сохраняется порядок объявления компонентов.
+    """
+    names = list(components)
+    edges: Dict[str, set] = {name: set() for name in names}
+    for net in nets:
+        ports = [split_port(port) for port in net.ports]
+        drivers = [component for component, name in ports if name in components[component].OUTPUTS]
+        for earlier, later in zip(drivers, drivers[1:]):
+            edges[earlier].add(later)
+        for port, (component, name) in zip(net.ports, ports):
+            if name in components[component].OUTPUTS:
+                continue
+            for driver in drivers:
+                if driver == component:
+                    continue
+                if port in latched:
+                    edges[component].add(driver)
+                else:
+                    edges[driver].add(component)
+
+    incoming = {name: 0 for name in names}
+    for targets in edges.values():
+        for target in targets:
+            incoming[target] += 1
+
+    ready = [names.index(name) for name in names if incoming[name] == 0]
+    heapq.heapify(ready)
+    order: List[str] = []
+    while ready:
+        name = names[heapq.heappop(ready)]
+        order.append(name)
+        for target in edges[name]:
+            incoming[target] -= 1
+            if incoming[target] == 0:
+                heapq.heappush(ready, names.index(target))
+
+    if len(order) != len(names):
+        raise AssertionError('Combinational loop: ' + ', '.join(name for name in names if name not in order))
+    return order
+
+
+def generate(components: Dict[str, CircuitComponent], order: List[str],
+             slots: Dict[int, int]) -> Tuple[str, List[str]]:
+    """Исходник фабрики функции такта и имена её аргументов."""
+    arguments = ['cells', 'logging', 'log_flags']
+    body: List[str] = []
+    for name in order:
+        component = components[name]
+        # pylint: disable=protected-access
+        ports = PortNames(name, {port: slots[id(wire)] for port, wire in component._wires.items()}, component.ports)
+        code = component.netlist_code(ports)
+        arguments.append(name)
+        if code is None:
+            body.append(f'{name}.do_tick()')
+            continue
+
+        arguments.append(f'{name}_values')
+        # update(): подключенные порты переходят с проводов в регистры,
+        # кроме выходов, которые шаблон всё равно перезапишет
+        for port, slot in ports.slots.items():
+            if port in ports.driven and port not in ports.used:
+                continue
+            value = component.netlist_read(port, f'cells[{slot}]')
+            if port in ports.used:
+                body.append(f"{ports[port]} = {ports.value(port)} = {value}")
+            else:
+                body.append(f"{ports.value(port)} = {value}")
+        for port in ports.used:
+            if port not in ports.slots:
+                body.append(f"{ports[port]} = {ports.value(port)}")
+        body += code
+
+    source = '\n'.join([f"def make_tick({', '.join(arguments)}):",
+                        '    def tick():',
+                        '        debug = log_flags.debug',
+                        '        info = log_flags.info'] +
+                       ['        ' + line for line in body] +
+                       ['    return tick'])
+    return source, arguments
+
+
+class CompiledNetlist():
+    """Такт схемы, собранный в одну функцию над общим массивом значений проводов."""
+
+    def __init__(self, components: Dict[str, CircuitComponent], wires: Dict[str, CircuitWire],
+                 order: List[str]) -> None:
+        self.cells: List[int] = [0] * len(wires)
+        slots: Dict[int, int] = {}
+        for slot, wire in enumerate(wires.values()):
+            wire.bind(self.cells, slot)
+            slots[id(wire)] = slot
+
+        self.source, arguments = generate(components, order, slots)
+        namespace: Dict[str, object] = {}
+        exec(compile(self.source, '<netlist>', 'exec'), namespace)  # pylint: disable=exec-used
+
+        values = {'cells': self.cells, 'logging': logging, 'log_flags': LOG_FLAGS}
+        for name, component in components.items():
+            values[name] = component
+            values[f'{name}_values'] = component.values
+        self.tick: Callable[[], None] = namespace['make_tick'](*[values[argument] for argument in arguments])
+
+
+class EventScheduler():
+    """Событийный такт: вычисляются только компоненты, входы которых изменились.
+
+    Изменение провода (EventWire) помечает его читателей. Читатель позже текущего компонента
+    в порядке вычисления вычисляется в этом же такте, остальные (защелкнутые входы) -- на следующем.
+    Источники провода с несколькими источниками тоже считаются читателями: перекрытое значение выставляется заново.
+    """
+
+    def __init__(self, components: Dict[str, CircuitComponent], wires: Dict[str, CircuitWire],
+                 nets: Tuple[Net, ...], order: List[str]) -> None:
+        self.names = list(order)
+        self.components = [components[name] for name in order]
+        position = {name: index for index, name in enumerate(order)}
+        for net in nets:
+            ports = [split_port(port) for port in net.ports]
+            drivers = {component for component, name in ports if name in components[component].OUTPUTS}
+            readers = {component for component, name in ports if name not in components[component].OUTPUTS}
+            if len(drivers) > 1:
+                readers |= drivers
+            wire = wires[net.name]
+            wire.scheduler = self
+            wire.readers = sum(1 << position[component] for component in readers)
+
+        # Битовые маски позиций: вычислить в текущем такте, на следующем и уже пройденные в текущем
+        self.pending = (1 << len(order)) - 1
+        self.deferred = 0
+        self.boundary = 0
+
+        self.ticks = 0
+        self.evaluations: List[int] = [0] * len(order)
+
+    def mark(self, readers: int) -> None:
+        boundary = self.boundary
+        self.pending |= readers & ~boundary
+        self.deferred |= readers & boundary
+
+    def invalidate(self) -> None:
+        """Состояние изменено в обход проводов: на следующем такте вычисляются все компоненты."""
+        self.pending = (1 << len(self.components)) - 1
+
+    def tick(self) -> None:
+        components, evaluations = self.components, self.evaluations
+        self.ticks += 1
+        while self.pending:
+            pending = self.pending
+            lowest = pending & -pending
+            self.pending = pending ^ lowest
+            self.boundary = (lowest << 1) - 1
+            position = lowest.bit_length() - 1
+            component = components[position]
+            component.do_tick()
+            evaluations[position] += 1
+            if not component.settled():
+                self.deferred |= lowest
+        self.boundary = 0
+        self.pending, self.deferred = self.deferred, 0
+
+    @property
+    def evaluated(self) -> int:
+        return sum(self.evaluations)
+
+    @property
+    def skipped(self) -> int:
+        return self.ticks * len(self.components) - self.evaluated
+
+    def counters(self) -> Dict[str, Tuple[int, int]]:
+        """Вычислено и пропущено тактов по компонентам."""
+        return {name: (evaluated, self.ticks - evaluated) for name, evaluated in zip(self.names, self.evaluations)}
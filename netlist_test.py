@@ -0,0 +1,103 @@
+# pylint: disable=missing-module-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-class-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-function-docstring  # чтобы не быть Капитаном Очевидностью
+# pylint: disable=line-too-long               # строки с ожидаемым выводом
+
+import unittest
+from components import Trigger, MUX
+from machine import DataPath, ControlUnit, INTERRUPT_PROGRAM, INTERRUPT_VECTOR, simulation
+from netlist import Net, build, evaluation_order
+from testing import tick_state
+from translator import translate
+
+
+class NetlistTests(unittest.TestCase):
+    """
+    1) Порядок вычисления выводится из графа и совпадает с ручным
+    2) Защелкнутый вход разрывает цикл, комбинационный цикл запрещен
+    3) Скомпилированный такт совпадает с интерпретируемым потактово
+    4) Событийный такт совпадает со скомпилированным и пропускает компоненты без изменений на входах
+    """
+
+    def test_DataPath_OrderFromGraph(self):
+        data_path = DataPath(compiled=False)
+
+        self.assertEqual(data_path.order, ['PC', 'Adr_Src_Mux', 'Memory', 'IO_Handler', 'IR', 'WD_Src_Mux',
+                                           'Register_File', 'Sign_Expand', 'Alu_Src_A_Mux', 'Alu_Src_B_Mux', 'ALU'])
+
+    def test_Loop_LatchedInputBreaksLoop(self):
+        components = {'Mux': MUX(1), 'Reg': Trigger()}
+        nets = (Net('out', ('Mux.Out', 'Reg.In')), Net('state', ('Reg.Out', 'Mux.In_0')))
+        build(components, nets)
+
+        self.assertEqual(evaluation_order(components, nets, frozenset(['Reg.In'])), ['Reg', 'Mux'])
+        with self.assertRaises(AssertionError):
+            evaluation_order(components, nets)
+
+    def test_Compiled_SameTicksAsInterpreted(self):
+        with open('examples/prob5.asm', encoding='utf-8') as file:
+            _, codes = translate(file.read())
+
+        traces = {}
+        original = DataPath.do_tick
+
+        def record(data_path: DataPath) -> None:
+            original(data_path)
+            traces[data_path.netlist is not None].append(tick_state(data_path))
+
+        DataPath.do_tick = record
+        try:
+            for compiled in [True, False]:
+                traces[compiled] = []
+                data_path = DataPath(int_tokens=[(1, 'h'), (10, 'e'), (20, 'l')], compiled=compiled)
+                data_path.Memory.load_program(codes, 0)
+                data_path.Register_File.inner_registers[6] = INTERRUPT_VECTOR
+                data_path.Memory.load_program(INTERRUPT_PROGRAM, INTERRUPT_VECTOR)
+                ControlUnit(True).start(data_path)
+        finally:
+            DataPath.do_tick = original
+
+        self.assertGreater(len(traces[True]), 100)
+        self.assertEqual(traces[True], traces[False])
+
+    def test_EventDriven_SameTicksAsCompiled(self):
+        with open('examples/hello.asm', encoding='utf-8') as file:
+            _, codes = translate(file.read())
+
+        traces = {}
+        schedulers = []
+        original = DataPath.do_tick
+
+        def record(data_path: DataPath) -> None:
+            original(data_path)
+            traces[data_path.scheduler is not None].append(tick_state(data_path))
+
+        DataPath.do_tick = record
+        try:
+            for event_driven in [True, False]:
+                traces[event_driven] = []
+                data_path = DataPath(int_tokens=[(1, 'h'), (10, 'e'), (20, 'l'), (25, 'l'), (100, 'o')],
+                                     event_driven=event_driven)
+                data_path.Memory.load_program(codes, 0)
+                data_path.Register_File.inner_registers[6] = INTERRUPT_VECTOR
+                data_path.Memory.load_program(INTERRUPT_PROGRAM, INTERRUPT_VECTOR)
+                ControlUnit(True).start(data_path)
+                schedulers.append(data_path.scheduler)
+        finally:
+            DataPath.do_tick = original
+
+        scheduler = schedulers[0]
+        self.assertEqual(traces[True], traces[False])
+        self.assertEqual(scheduler.ticks, len(traces[True]))
+        self.assertGreater(scheduler.skipped, 0)
+        self.assertEqual(scheduler.counters()['IO_Handler'], (scheduler.ticks, 0))
+
+    def test_EventsEngine_SameResultAsCircuit(self):
+        with open('examples/prob5.asm', encoding='utf-8') as file:
+            _, codes = translate(file.read())
+
+        self.assertEqual(simulation(codes, engine='events'), simulation(codes, engine='circuit'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,189 @@
+# pylint: disable=missing-module-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-class-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-function-docstring  # чтобы не быть Капитаном Очевидностью
+# pylint: disable=line-too-long               # строки с ожидаемым выводом
+
+import json
+import sys
+from collections import namedtuple
+from typing import Dict, Iterable, List, Tuple
+
+from components import IOMemoryCell
+from isa import Opcode, read_image
+from machine import ControlUnit, DataPath, SimulationResult, build_machine, machine_result
+
+# Индексы вентилей в слове управления
+MEM_WRITE, REG_WRITE, IO_OP = (ControlUnit.VALVES.index(name) for name in ['MemWrite', 'RegWrite', 'IOOp'])
+# Регистров, которые читает инструкция: база адреса, операнды и сохраняемое значение
+REGISTER_READS: Dict[Opcode, int] = {Opcode.ADDI: 1, Opcode.ADD: 2, Opcode.REM: 2, Opcode.MUL: 2, Opcode.DIV: 2,
+                                     Opcode.LD: 1, Opcode.SW: 2, Opcode.CMP: 2, Opcode.JMP: 1, Opcode.JG: 1,
+                                     Opcode.BNE: 1, Opcode.BEQ: 1, Opcode.HALT: 0}
+# Запись в память при входе в прерывание: результат АЛУ и IR
+CONTEXT_WRITES = 2
+BRANCHES = (Opcode.JMP, Opcode.JG, Opcode.BNE, Opcode.BEQ)
+
+
+class CounterValues(namedtuple('CounterValues', 'ticks instructions opcodes instruction_fetches data_reads memory_writes '
+                                                'io_reads io_writes branches_taken branches_not_taken interrupts '
+                                                'interrupt_ticks register_reads register_writes')):
+    """Значения счетчиков; opcodes -- имя кода операции: завершено инструкций."""
+
+    @property
+    def memory_reads(self) -> int:
+        return self.instruction_fetches + self.data_reads
+
+    def to_json(self) -> str:
+        return json.dumps(dict(self._asdict(), memory_reads=self.memory_reads), indent=4)
+
+
+class CountingControlUnit(ControlUnit):
+    """ControlUnit, который на выборке и тактах IOOp обновляет data_path.counters; слоты те же, поэтому подменяется на месте."""
+
+    __slots__ = ()
+
+    def apply_control_word(self, data_path: DataPath, control_word: Tuple[int, ...]) -> None:
+        self._change_valves(control_word)
+        data_path.do_tick()
+        self.update()
+
+        if control_word is self._fetch_word:
+            # Тот же индекс, по которому start() выберет слова инструкции: флаги и код операции уже защелкнуты
+            values = self.values
+            counters = data_path.counters
+            opcode = values[self._opcode]
+            counters.transitions[(opcode << 2) | (values[self._zero_flag] << 1) | values[self._positive_flag]] += 1
+            if data_path.in_interrupt:
+                counters.handler_fetched(data_path.tick, opcode)
+        elif control_word[IO_OP]:
+            data_path.counters.accessed(data_path.counters.address.get(), self.values[self._opcode])
+
+    def start(self, data_path: DataPath = None) -> None:
+        super().start(data_path)
+        if self.halted:
+            data_path.counters.halt()
+
+
+class PerformanceCounters():
+    """Аппаратные счетчики схемной модели, читаются в любой момент через values().
+
+    На выборке счетчики запоминают индекс перехода в ControlUnit._transition_table (код операции и флаги),
+    на такте IOOp -- адрес; остальное выводится из числа переходов при чтении: их слова управления дают
+    выборки, записи в регистры и исход переходов. Завершенные инструкции -- выборки без HALT обработчика
+    (возврат из прерывания ничего не завершает), к остановке их столько же, сколько вызовов instruction_hook
+    и HALT программы; посреди прогона прерванная инструкция уже учтена. Такты обработчика считаются
+    от входа до выборки его HALT.
+    В память программа не пишет (MemWrite не выставляется): записи -- сохранение контекста
+    прерывания. Чтения регистров считаются по кодам операций, без сохранения контекста.
+    """
+
+    def __init__(self, dump: str | None = None) -> None:
+        # Куда записать JSON на HALT
+        self.dump = dump
+        self.data_path: DataPath | None = None
+        self.control_unit: ControlUnit | None = None
+        # Индекс перехода -- выборок
+        self.transitions: List[int] = [0] * (16 << 2)
+        # Адрес порта -- обращений
+        self.ports: Dict[int, int] = {int(IOMemoryCell.IN): 0, int(IOMemoryCell.OUT): 0}
+        self.data_reads = 0
+        self.interrupts = 0
+        self.interrupt_ticks = 0
+        # Выборки HALT обработчика: возврат из прерывания, а не завершенная инструкция
+        self.handler_halts = 0
+        self.in_interrupt = False
+        self._entry_tick = 0
+        self.address = None
+
+    def attach(self, data_path: DataPath, control_unit: ControlUnit) -> None:
+        assert type(control_unit) is ControlUnit, 'Control unit is already instrumented'  # pylint: disable=unidiomatic-typecheck
+        self.data_path = data_path
+        self.control_unit = control_unit
+        self.address = data_path.wires['adr']
+        data_path.counters = self
+        control_unit.__class__ = CountingControlUnit
+
+    def handler_fetched(self, tick: int, opcode: int) -> None:
+        """Выборка в обработчике: первая после входа начинает прерывание, выборка HALT его заканчивает."""
+        if not self.in_interrupt:
+            # Вход в обработчик был после прошлого такта
+            self.interrupts += 1
+            self._entry_tick = tick - 1
+            self.in_interrupt = True
+        if opcode == Opcode.HALT:
+            self.handler_halts += 1
+            self.interrupt_ticks += tick - self._entry_tick
+            self.in_interrupt = False
+
+    def accessed(self, address: int, opcode: int) -> None:
+        if address in self.ports:
+            self.ports[address] += 1
+        elif opcode == Opcode.LD:
+            self.data_reads += 1
+
+    def halt(self) -> None:
+        """Остановка на HALT: записать счетчики в dump."""
+        if self.dump is not None:
+            with open(self.dump, 'w', encoding='utf-8') as file:
+                file.write(self.values().to_json())
+
+    def values(self) -> CounterValues:
+        opcodes: Dict[str, int] = {}
+        words: Dict[Tuple[int, ...], int] = {}
+        taken = not_taken = 0
+        table = self.control_unit._transition_table if self.control_unit is not None else []  # pylint: disable=protected-access
+        for transition, count in enumerate(self.transitions):
+            if not count:
+                continue
+            opcode = Opcode(transition >> 2)
+            opcodes[opcode.name] = opcodes.get(opcode.name, 0) + count
+            control_words = table[transition] or ()
+            for word in control_words:
+                words[word] = words.get(word, 0) + count
+            if opcode in BRANCHES:
+                if control_words == table[ControlUnit.transition_index(Opcode.JMP, 0, 0)]:
+                    taken += count
+                else:
+                    not_taken += count
+        if self.handler_halts:
+            opcodes[Opcode.HALT.name] -= self.handler_halts
+            if not opcodes[Opcode.HALT.name]:
+                del opcodes[Opcode.HALT.name]
+        return CounterValues(
+            self.data_path.tick if self.data_path is not None else 0,
+            sum(opcodes.values()),
+            opcodes,
+            sum(self.transitions),
+            self.data_reads,
+            sum(count for word, count in words.items() if word[MEM_WRITE]) + CONTEXT_WRITES * self.interrupts,
+            self.ports[IOMemoryCell.IN],
+            self.ports[IOMemoryCell.OUT],
+            taken,
+            not_taken,
+            self.interrupts,
+            self.interrupt_ticks,
+            sum(REGISTER_READS[Opcode[name]] * count for name, count in opcodes.items()),
+            sum(count for word, count in words.items() if word[REG_WRITE]),
+        )
+
+
+def counted_simulation(program: List[int], text_start_adr: int = 0, is_interrupts_allowed: bool = False,
+                       memory_size: int = 512, int_tokens: Iterable[Tuple[int, str]] = None,
+                       dump: str | None = None) -> Tuple[SimulationResult, PerformanceCounters]:
+    """Прогнать схемную модель со счетчиками."""
+    control_unit, data_path = build_machine(program, text_start_adr, is_interrupts_allowed, memory_size, int_tokens)
+    counters = PerformanceCounters(dump)
+    counters.attach(data_path, control_unit)
+    control_unit.start(data_path)
+    return machine_result(data_path), counters
+
+
+def main(args):
+    filename, is_interrupts_enabled, *dump = args
+    image = read_image(filename)
+    _, counters = counted_simulation(image.words.tolist(), image.entry, is_interrupts_enabled == 'True',
+                                     dump=dump[0] if dump else None)
+    print(counters.values().to_json())
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,83 @@
+# pylint: disable=missing-module-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-class-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-function-docstring  # чтобы не быть Капитаном Очевидностью
+# pylint: disable=line-too-long               # строки с ожидаемым выводом
+
+import json
+import os
+import tempfile
+import unittest
+from machine import ControlUnit, build_machine, circuit_simulation
+from perfcounters import PerformanceCounters, counted_simulation
+from profiler import profile
+from testing import translate_example
+
+
+class PerformanceCountersTests(unittest.TestCase):
+    """
+    1) Счетчики сходятся с профилем программы, результат прогона тот же
+    2) Прерывания: вход, такты обработчика, порты и сохранение контекста; JSON пишется на HALT
+    3) Счетчики читаются посреди прогона, без attach модель не меняется
+    4) Завершенные инструкции -- вызовы instruction_hook и HALT программы, без HALT обработчика
+    """
+
+    def test_Prob5_MatchesProfiler(self):
+        program = translate_example('prob5')
+        result, counters = counted_simulation(program)
+        _, profiler = profile(program)
+        values = counters.values()
+
+        self.assertEqual(result, circuit_simulation(program))
+        self.assertEqual((values.ticks, values.instructions, values.instruction_fetches), (2125, 595, 595))
+        self.assertEqual(values.opcodes, {row.opcode.name: row.instructions for row in profiler.by_opcode()})
+        self.assertEqual((values.branches_taken, values.branches_not_taken),
+                         (sum(profiler.taken.values()), sum(profiler.not_taken.values())))
+        self.assertEqual((values.io_reads, values.io_writes, values.data_reads, values.memory_writes), (0, 3, 0, 0))
+        self.assertEqual((values.register_reads, values.register_writes), (914, 222))
+
+    def test_HelloWithInterrupts_DumpedAtHalt(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            dump = os.path.join(tmpdir, 'counters.json')
+            result, counters = counted_simulation(translate_example('hello'), 0, True, dump=dump)
+            with open(dump, encoding='utf-8') as file:
+                dumped = json.load(file)
+
+        values = counters.values()
+        self.assertEqual(dumped['ticks'], result.ticks)
+        self.assertEqual(dumped['memory_reads'], values.memory_reads)
+        self.assertEqual((values.interrupts, values.interrupt_ticks, values.memory_writes), (5, 25, 10))
+        self.assertEqual((values.instructions, values.instruction_fetches), (29, 34))
+        self.assertEqual((values.io_reads, values.io_writes, values.data_reads), (5, 11, 11))
+        self.assertEqual(values.opcodes, {'LD': 16, 'SW': 11, 'JMP': 1, 'HALT': 1})
+
+    def test_QueriedMidRun_AndUntouchedWithoutAttach(self):
+        control_unit, data_path = build_machine(translate_example('prob5'))
+        self.assertIs(type(control_unit), ControlUnit)
+        self.assertIsNone(data_path.counters)
+
+        counters = PerformanceCounters()
+        counters.attach(data_path, control_unit)
+        seen = []
+        control_unit.instruction_hook = lambda data_path: seen.append(counters.values())
+        control_unit.start(data_path)
+
+        self.assertEqual([(values.ticks, values.instructions) for values in seen[:3]], [(3, 1), (7, 2), (11, 3)])
+        self.assertEqual(seen[-1].instructions + 1, counters.values().instructions)
+
+    def test_InterruptWithHandler_RetiredAsHooked(self):
+        control_unit, data_path = build_machine(translate_example('interrupt'), 0, True)
+        counters = PerformanceCounters()
+        counters.attach(data_path, control_unit)
+        hooked = []
+        control_unit.instruction_hook = hooked.append
+        control_unit.start(data_path)
+
+        values = counters.values()
+        self.assertEqual(values.interrupts, 2)
+        self.assertEqual(values.instructions, len(hooked) + 1)
+        self.assertEqual(values.instruction_fetches, values.instructions + values.interrupts)
+        self.assertEqual(values.opcodes['HALT'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,266 @@
+# pylint: disable=missing-module-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-class-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-function-docstring  # чтобы не быть Капитаном Очевидностью
+# pylint: disable=line-too-long               # строки с ожидаемым выводом
+
+import sys
+from collections import namedtuple
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from emulator import BRANCH_TICKS, HALT_TICKS, INSTRUCTION_TICKS, Block, Emulator
+from isa import Opcode, read_image
+from machine import ENGINES, INTERRUPT_VECTOR, DataPath, SimulationResult, fast_simulation
+from translator import SymbolTable, new_symbol_table, read_symbols, translate
+
+BRANCHES = (Opcode.JMP, Opcode.JG, Opcode.BNE, Opcode.BEQ)
+
+
+class PcProfile(namedtuple('PcProfile', 'pc opcode instructions ticks taken not_taken')):
+    """Строка плоского профиля: адрес, код операции, исполнено раз, тактов, переходов выполнено и нет."""
+
+
+class OpcodeProfile(namedtuple('OpcodeProfile', 'opcode instructions ticks')):
+    """Такты и инструкции по коду операции."""
+
+    @property
+    def cpi(self) -> float:
+        return self.ticks / self.instructions if self.instructions else 0.0
+
+
+class HotLoop(namedtuple('HotLoop', 'head tail iterations instructions ticks')):
+    """Цикл по обратному переходу tail -> head: число переходов, инструкции и такты адресов head..tail."""
+
+
+class Profiler():
+    """Профиль гостевой программы по instruction_hook: такты и инструкции по адресам, переходы.
+
+    Хук получает состояние после инструкции, поэтому адрес завершенной инструкции -- следующий PC
+    с прошлого вызова. При входе в прерывание это вектор из x6, при возврате -- PC, на котором
+    прервалась программа: прерванная инструкция завершается после обработчика.
+    Повторный вход в обработчик узнается по тому, что прошлый PC указывал на HALT.
+    Такты считаются между вызовами хука: начало прерванной инструкции достается обработчику,
+    HALT обработчика -- возобновленной инструкции.
+
+    На модели fast блоки JIT не вызывают хук на каждой инструкции: fast_block копит прогоны блока
+    по (начало, конец, следующий PC), а finish раскладывает их по адресам. Внутри блока токены
+    и прерывания не приходят, поэтому такты его инструкций постоянны.
+    """
+
+    def __init__(self, text_start_adr: int = 0, symbols: SymbolTable | None = None) -> None:
+        self.symbols = symbols if symbols is not None else new_symbol_table()
+        self.instructions: Dict[int, int] = {}
+        self.ticks: Dict[int, int] = {}
+        self.opcodes: Dict[int, int] = {}
+        self.not_taken: Dict[int, int] = {}
+        # Выполненные переходы: (откуда, куда) -- сколько раз
+        self.taken: Dict[Tuple[int, int], int] = {}
+        # Адреса, исполненные в обработчике прерывания
+        self.interrupt_pcs: set = set()
+        # Прогоны блоков модели fast: (начало, конец, следующий PC, в обработчике) -- сколько раз
+        self.block_runs: Dict[Tuple[int, int, int, bool], int] = {}
+
+        self._pc = text_start_adr
+        self._tick = 0
+        self._in_interrupt = False
+        self._vector = INTERRUPT_VECTOR
+        self._interrupted_pc = 0
+
+    def circuit_hook(self, data_path: DataPath) -> None:
+        self._retire(data_path.tick, data_path.PC.state, data_path.IR.state, data_path.in_interrupt,
+                     data_path.Register_File.inner_registers[6], data_path.Memory.memory)
+
+    def fast_hook(self, emulator: Emulator) -> None:
+        self._retire(emulator.tick, emulator.pc, emulator.ir, emulator.in_interrupt,
+                     emulator.registers[6], emulator.memory)
+
+    def fast_block(self, emulator: Emulator, block: Block, halted: bool) -> None:
+        """Блок JIT исполнен целиком (протокол Emulator.block_hook)."""
+        in_interrupt = emulator.in_interrupt
+        if in_interrupt is not self._in_interrupt or emulator.memory[self._pc] & 15 == Opcode.HALT:
+            self._current_pc(in_interrupt, emulator.memory)
+        next_pc, tick = emulator.pc, emulator.tick
+        key = (block.start, block.end, next_pc, in_interrupt)
+        runs = self.block_runs
+        runs[key] = runs.get(key, 0) + 1
+        # Такты сверх постоянных -- начало прерванной инструкции перед входом в обработчик, как в хуке
+        if tick - self._tick != block.ticks:
+            self.ticks[block.start] = self.ticks.get(block.start, 0) + tick - self._tick - block.ticks
+        if halted:
+            # HALT учитывается как в хуке: его такт достается следующей инструкции или finish
+            self._pc, self._tick = block.end - 1, tick - HALT_TICKS
+        else:
+            self._pc, self._tick = next_pc, tick
+        self._vector = emulator.registers[6]
+
+    def _current_pc(self, in_interrupt: bool, memory) -> int:
+        """Адрес инструкции, завершившейся после прошлого вызова, с учетом входа в обработчик и возврата."""
+        pc = self._pc
+        if in_interrupt != self._in_interrupt or memory[pc] & 15 == Opcode.HALT:
+            if in_interrupt and not self._in_interrupt:
+                self._interrupted_pc = pc
+            pc = self._vector if in_interrupt else self._interrupted_pc
+            self._in_interrupt = in_interrupt
+        return pc
+
+    def _retire(self, tick: int, next_pc: int, ir: int, in_interrupt: bool, vector: int, memory) -> None:
+        pc = self._current_pc(in_interrupt, memory)
+        if in_interrupt:
+            self.interrupt_pcs.add(pc)
+
+        instructions = self.instructions
+        instructions[pc] = instructions.get(pc, 0) + 1
+        self.ticks[pc] = self.ticks.get(pc, 0) + tick - self._tick
+        opcode = self.opcodes[pc] = ir & 15
+        if opcode in BRANCHES:
+            if opcode == Opcode.JMP or next_pc != pc + 1:
+                self.taken[pc, next_pc] = self.taken.get((pc, next_pc), 0) + 1
+            else:
+                self.not_taken[pc] = self.not_taken.get(pc, 0) + 1
+
+        self._pc, self._tick, self._vector = next_pc, tick, vector
+
+    def _expand_blocks(self, memory: Sequence[int]) -> None:
+        instructions, ticks = self.instructions, self.ticks
+        for (start, end, next_pc, in_interrupt), count in self.block_runs.items():
+            for pc in range(start, end):
+                opcode = memory[pc] & 15
+                if opcode == Opcode.HALT:
+                    break
+                instructions[pc] = instructions.get(pc, 0) + count
+                ticks[pc] = ticks.get(pc, 0) + count * (BRANCH_TICKS if opcode in BRANCHES else INSTRUCTION_TICKS)
+                self.opcodes[pc] = opcode
+                if in_interrupt:
+                    self.interrupt_pcs.add(pc)
+                if opcode in BRANCHES:
+                    if opcode == Opcode.JMP or next_pc != pc + 1:
+                        self.taken[pc, next_pc] = self.taken.get((pc, next_pc), 0) + count
+                    else:
+                        self.not_taken[pc] = self.not_taken.get(pc, 0) + count
+        self.block_runs = {}
+
+    def finish(self, result: SimulationResult) -> None:
+        """Разложить прогоны блоков и учесть HALT, на котором остановилась программа: хук после него не вызывается."""
+        self._expand_blocks(result.memory)
+        pc = self._pc
+        self.instructions[pc] = self.instructions.get(pc, 0) + 1
+        self.ticks[pc] = self.ticks.get(pc, 0) + result.ticks - self._tick
+        self.opcodes[pc] = Opcode.HALT
+        self._tick = result.ticks
+
+    @property
+    def total_ticks(self) -> int:
+        return sum(self.ticks.values())
+
+    @property
+    def total_instructions(self) -> int:
+        return sum(self.instructions.values())
+
+    def flat(self) -> List[PcProfile]:
+        """Адреса по убыванию тактов."""
+        taken: Dict[int, int] = {}
+        for (source, _), count in self.taken.items():
+            taken[source] = taken.get(source, 0) + count
+        rows = [PcProfile(pc, Opcode(self.opcodes[pc]), count, self.ticks[pc], taken.get(pc, 0), self.not_taken.get(pc, 0))
+                for pc, count in self.instructions.items()]
+        return sorted(rows, key=lambda row: (-row.ticks, row.pc))
+
+    def by_opcode(self) -> List[OpcodeProfile]:
+        totals: Dict[int, List[int]] = {}
+        for pc, count in self.instructions.items():
+            total = totals.setdefault(self.opcodes[pc], [0, 0])
+            total[0] += count
+            total[1] += self.ticks[pc]
+        return sorted((OpcodeProfile(Opcode(opcode), *total) for opcode, total in totals.items()),
+                      key=lambda row: (-row.ticks, row.opcode))
+
+    def hot_loops(self) -> List[HotLoop]:
+        """Циклы по выполненным обратным переходам, по убыванию тактов в теле."""
+        loops = []
+        for (source, target), count in self.taken.items():
+            if target > source:
+                continue
+            body = [pc for pc in self.instructions if target <= pc <= source]
+            loops.append(HotLoop(target, source, count, sum(self.instructions[pc] for pc in body),
+                                 sum(self.ticks[pc] for pc in body)))
+        return sorted(loops, key=lambda loop: (-loop.ticks, loop.head))
+
+    def function(self, pc: int) -> str:
+        """Метка, к которой относится адрес; код вне таблицы символов -- по адресу."""
+        label = self.symbols.label_of(pc)
+        if label is not None:
+            return label
+        return '[interrupt]' if pc in self.interrupt_pcs else f'[{pc}]'
+
+    def location(self, pc: int) -> str:
+        lines = self.symbols.lines
+        return f'line {lines[pc]}' if 0 <= pc < len(lines) and lines[pc] else f'pc {pc}'
+
+    def report(self) -> Iterator[str]:
+        """Плоский профиль, CPI по кодам операций и горячие циклы."""
+        total = self.total_ticks or 1
+        yield f'Ticks {self.total_ticks}\tInstructions {self.total_instructions}'
+        yield '  %ticks    ticks   instrs  pc      opcode  taken  not taken  label'
+        for row in self.flat():
+            yield (f'{100 * row.ticks / total:7.2f} {row.ticks:8} {row.instructions:8}  {row.pc:<6}  {row.opcode.name:<6}  '
+                   f'{row.taken:5}  {row.not_taken:9}  {self.function(row.pc)} ({self.location(row.pc)})')
+        yield 'opcode  instrs    ticks   CPI'
+        for row in self.by_opcode():
+            yield f'{row.opcode.name:<6}  {row.instructions:6} {row.ticks:8} {row.cpi:5.2f}'
+        yield 'Hot loops'
+        for loop in self.hot_loops():
+            yield (f'{self.function(loop.head)} ({self.location(loop.head)} .. {self.location(loop.tail)}): '
+                   f'{loop.iterations} iterations, {loop.instructions} instrs, {loop.ticks} ticks ({100 * loop.ticks / total:.2f}%)')
+
+    def collapsed(self) -> Iterator[str]:
+        """Строки для flamegraph.pl: обработчик прерывания -- отдельный корень, далее метка и строка исходника."""
+        stacks: Dict[str, int] = {}
+        for pc, ticks in self.ticks.items():
+            frames = [self.function(pc), f'{self.location(pc)} {Opcode(self.opcodes[pc]).name}']
+            if pc in self.interrupt_pcs:
+                frames.insert(0, 'interrupt')
+            stack = ';'.join(frames)
+            stacks[stack] = stacks.get(stack, 0) + ticks
+        for stack, ticks in sorted(stacks.items()):
+            yield f'{stack} {ticks}'
+
+
+def profile(program: List[int], text_start_adr: int = 0, is_interrupts_allowed: bool = False,
+            memory_size: int = 512, engine: str = 'fast', int_tokens: Sequence[Tuple[int, str]] | None = None,
+            symbols: SymbolTable | None = None) -> Tuple[SimulationResult, Profiler]:
+    """Прогнать программу с профилировщиком на хуке инструкций выбранной модели."""
+    if engine not in ENGINES or engine == 'check':
+        raise AttributeError('Unsupported engine: ' + engine)
+    profiler = Profiler(text_start_adr, symbols)
+    if engine == 'fast':
+        result = fast_simulation(program, text_start_adr, is_interrupts_allowed, memory_size, int_tokens,
+                                 instruction_hook=profiler.fast_hook, block_hook=profiler.fast_block)
+    else:
+        result = ENGINES[engine](program, text_start_adr, is_interrupts_allowed, memory_size, int_tokens,
+                                 instruction_hook=profiler.circuit_hook)
+    profiler.finish(result)
+    return result, profiler
+
+
+def main(args):
+    filename, is_interrupts_enabled, *files = args
+    symbols = new_symbol_table()
+    if filename.endswith('.asm'):
+        with open(filename, encoding='utf-8') as file:
+            _, program = translate(file.read(), symbols)
+        entry = 0
+    else:
+        image = read_image(filename)
+        program, entry = image.words.tolist(), image.entry
+        if len(files) > 1:
+            symbols = read_symbols(files[1])
+
+    _, profiler = profile(program, entry, is_interrupts_enabled == 'True', symbols=symbols)
+    for line in profiler.report():
+        print(line)
+    if files:
+        with open(files[0], 'w', encoding='utf-8') as file:
+            file.writelines(line + '\n' for line in profiler.collapsed())
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
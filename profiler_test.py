@@ -0,0 +1,71 @@
+# pylint: disable=missing-module-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-class-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-function-docstring  # чтобы не быть Капитаном Очевидностью
+# pylint: disable=line-too-long               # строки с ожидаемым выводом
+
+import unittest
+from isa import Opcode
+from profiler import profile
+from testing import translate_example
+from translator import new_symbol_table, translate
+from workload import WorkloadSpec, generate_workload
+
+
+class ProfilerTests(unittest.TestCase):
+    """
+    1) Такты и инструкции профиля сходятся с прогоном, модели дают одинаковый профиль
+    2) Переходы и горячие циклы привязаны к меткам и строкам исходника
+    3) Инструкции обработчика прерывания отделены от программы
+    4) Прогоны блоков JIT раскладываются по адресам так же, как хук на каждой инструкции
+    """
+
+    def test_Prob5_TotalsMatchSimulation(self):
+        symbols = new_symbol_table()
+        program = translate_example('prob5', symbols)
+        result, fast = profile(program, symbols=symbols)
+        _, circuit = profile(program, engine='circuit', symbols=symbols)
+
+        self.assertEqual(fast.total_ticks, result.ticks)
+        self.assertEqual(fast.total_instructions, 595)
+        self.assertEqual(fast.flat(), circuit.flat())
+        self.assertEqual(fast.taken, circuit.taken)
+        cpi = {row.opcode: row.cpi for row in fast.by_opcode()}
+        self.assertEqual((cpi[Opcode.ADD], cpi[Opcode.JMP], cpi[Opcode.HALT]), (4.0, 3.0, 1.0))
+
+    def test_Prob5_BranchesAndLoopsMappedToLabels(self):
+        symbols = new_symbol_table()
+        program = translate_example('prob5', symbols)
+        _, profiler = profile(program, symbols=symbols)
+
+        beq = next(row for row in profiler.flat() if row.opcode == Opcode.BEQ)
+        self.assertEqual((beq.instructions, beq.taken, beq.not_taken), (58, 19, 39))
+        self.assertEqual((profiler.function(beq.pc), profiler.location(beq.pc)), ('.looptop', 'line 31'))
+
+        inner = profiler.hot_loops()[1]
+        self.assertEqual((profiler.function(inner.head), inner.iterations), ('.looptop', 39))
+        self.assertIn('.looptop;line 30 CMP 232', list(profiler.collapsed()))
+
+    def test_HelloWithInterrupts_HandlerSeparated(self):
+        symbols = new_symbol_table()
+        program = translate_example('hello', symbols)
+        result, profiler = profile(program, 0, True, symbols=symbols)
+
+        self.assertEqual(profiler.total_ticks, result.ticks)
+        self.assertEqual(profiler.total_instructions, 29)
+        self.assertEqual(profiler.instructions[200], 5)
+        self.assertEqual(profiler.function(200), '[interrupt]')
+        self.assertTrue(any(line.startswith('interrupt;[interrupt];pc 200 LD ') for line in profiler.collapsed()))
+
+    def test_WorkloadWithInterrupts_BlocksMatchCircuit(self):
+        workload = generate_workload(WorkloadSpec(3000, interrupt_period=37))
+        _, program = translate(workload.source)
+        result, fast = profile(program, 0, True, int_tokens=workload.schedule)
+        _, circuit = profile(program, 0, True, engine='circuit', int_tokens=workload.schedule)
+
+        self.assertEqual(fast.total_ticks, result.ticks)
+        self.assertEqual(fast.flat(), circuit.flat())
+        self.assertEqual((fast.taken, fast.interrupt_pcs), (circuit.taken, circuit.interrupt_pcs))
+
+
+if __name__ == '__main__':
+    unittest.main()
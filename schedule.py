@@ -0,0 +1,105 @@
+# pylint: disable=missing-module-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-class-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-function-docstring  # чтобы не быть Капитаном Очевидностью
+# pylint: disable=line-too-long               # строки с ожидаемым выводом
+
+import csv
+import heapq
+from typing import Iterable, Iterator, List, Tuple
+
+# Расписание по умолчанию для IOHandler и Emulator
+DEFAULT_TOKENS: List[Tuple[int, str]] = [(1, 'h'), (10, 'e'), (20, 'l'), (25, 'l'), (100, 'o')]
+
+
+class TokenSchedule():
+    """Курсор по расписанию токенов ввода (такт, символ) с тактом ближайшего события.
+
+    Список сортируется целиком (устойчиво: при совпадении тактов побеждает последний токен).
+    Любой другой источник читается лениво и должен идти по неубыванию тактов.
+    Токены с тактом меньше единицы никогда не приходят и пропускаются.
+    """
+
+    def __init__(self, tokens: Iterable[Tuple[int, str]] | None = None) -> None:
+        if tokens is None:
+            tokens = DEFAULT_TOKENS
+        if isinstance(tokens, (list, tuple)):
+            tokens = sorted(tokens, key=lambda token: token[0])
+        self._tokens: Iterator[Tuple[int, str]] = iter(tokens)
+        # Такт ближайшего токена, -1 -- расписание исчерпано; consumed -- сколько токенов забрано
+        self.next_tick = -1
+        self.consumed = 0
+        self._next_value = ''
+        self._advance()
+
+    def _advance(self) -> None:
+        for token_tick, token_value in self._tokens:
+            if token_tick < 1:
+                continue
+            assert token_tick >= self.next_tick, f'Token schedule is not sorted at tick {token_tick}'
+            self.next_tick, self._next_value = token_tick, token_value
+            return
+        self.next_tick = -1
+
+    def pop(self) -> str:
+        """Забрать символ токена, пришедшего в такт next_tick."""
+        value = self._next_value
+        self.consumed += 1
+        self._advance()
+        return value
+
+    def __iter__(self) -> Iterator[Tuple[int, str]]:
+        while self.next_tick != -1:
+            token_tick = self.next_tick
+            yield token_tick, self.pop()
+
+
+class CsvSchedule():
+    """Расписание из CSV со строками 'такт,символ', читается заново при каждом обходе."""
+
+    def __init__(self, filename: str) -> None:
+        self.filename = filename
+
+    def __iter__(self) -> Iterator[Tuple[int, str]]:
+        with open(self.filename, encoding='utf-8', newline='') as file:
+            for row in csv.reader(file):
+                if not row or not row[0].strip().lstrip('-').isdigit():
+                    continue
+                yield int(row[0]), row[1]
+
+
+class TextSchedule():
+    """Символы текстового файла по одному каждые period тактов, начиная с такта start."""
+
+    CHUNK_SIZE = 1 << 16
+
+    def __init__(self, filename: str, period: int, start: int | None = None) -> None:
+        assert period > 0, 'Token period is not positive'
+        self.filename = filename
+        self.period = period
+        self.start = period if start is None else start
+
+    def __iter__(self) -> Iterator[Tuple[int, str]]:
+        token_tick = self.start
+        with open(self.filename, encoding='utf-8') as file:
+            while chunk := file.read(self.CHUNK_SIZE):
+                for symbol in chunk:
+                    yield token_tick, symbol
+                    token_tick += self.period
+
+
+class MergedSchedule():
+    """Несколько упорядоченных расписаний, слитые по тактам через кучу."""
+
+    def __init__(self, *schedules: Iterable[Tuple[int, str]]) -> None:
+        self.schedules = schedules
+
+    def __iter__(self) -> Iterator[Tuple[int, str]]:
+        return heapq.merge(*self.schedules, key=lambda token: token[0])
+
+
+def parse_schedule(spec: str) -> Iterable[Tuple[int, str]]:
+    """Расписание из аргумента командной строки: 'tokens.csv' или 'input.txt:N'."""
+    filename, _, period = spec.rpartition(':')
+    if filename and period.isdigit():
+        return TextSchedule(filename, int(period))
+    return CsvSchedule(spec)
@@ -0,0 +1,93 @@
+# pylint: disable=missing-module-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-class-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-function-docstring  # чтобы не быть Капитаном Очевидностью
+# pylint: disable=line-too-long               # строки с ожидаемым выводом
+
+import os
+import tempfile
+import unittest
+from components import IOHandler
+from machine import cross_check
+from schedule import TokenSchedule, CsvSchedule, TextSchedule, MergedSchedule, parse_schedule
+from translator import translate
+
+
+class TokenScheduleTests(unittest.TestCase):
+    """
+    1) Список сортируется, при совпадении тактов побеждает последний токен, токены до первого такта пропускаются
+    2) Ленивый источник должен идти по неубыванию тактов
+    3) Слияние расписаний
+    """
+
+    def test_List_SortedByTick(self):
+        schedule = TokenSchedule([(5, 'b'), (2, 'a'), (5, 'c'), (0, 'z')])
+
+        self.assertEqual(list(schedule), [(2, 'a'), (5, 'b'), (5, 'c')])
+        self.assertEqual(schedule.next_tick, -1)
+
+    def test_UnsortedStream_ThrowsAssert(self):
+        schedule = TokenSchedule(iter([(5, 'b'), (2, 'a')]))
+
+        with self.assertRaises(AssertionError):
+            schedule.pop()
+
+    def test_MergedStreams_OrderedByTick(self):
+        schedule = TokenSchedule(MergedSchedule([(1, 'a'), (7, 'c')], iter([(3, 'b'), (9, 'd')])))
+
+        self.assertEqual(list(schedule), [(1, 'a'), (3, 'b'), (7, 'c'), (9, 'd')])
+
+
+class ScheduleFilesTests(unittest.TestCase):
+    """
+    1) CSV читается построчно, символ может быть запятой
+    2) Текст приходит по символу каждые N тактов
+    3) Источник из файла обходится заново, модели получают одно и то же расписание
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name: str, text: str) -> str:
+        filename = os.path.join(self.directory.name, name)
+        with open(filename, 'w', encoding='utf-8') as file:
+            file.write(text)
+        return filename
+
+    def test_Csv_ReceiveTokens(self):
+        filename = self.write('tokens.csv', 'tick,char\n3,a\n7,","\n')
+
+        self.assertEqual(list(parse_schedule(filename)), [(3, 'a'), (7, ',')])
+
+    def test_Text_OneCharEveryNTicks(self):
+        filename = self.write('input.txt', 'cat' * 50000)
+
+        schedule = parse_schedule(filename + ':4')
+
+        self.assertIsInstance(schedule, TextSchedule)
+        self.assertEqual(list(zip(range(4), schedule)), [(0, (4, 'c')), (1, (8, 'a')), (2, (12, 't')), (3, (16, 'c'))])
+
+    def test_TextOnIOHandler_SetDipAtTicks(self):
+        io_handler = IOHandler(TextSchedule(self.write('input.txt', 'ab'), 3))
+        dip_values = []
+
+        for _ in range(7):
+            io_handler.do_tick()
+            dip_values.append(io_handler.dip_value)
+
+        self.assertEqual(dip_values, [0, 0, ord('a'), ord('a'), ord('a'), ord('b'), ord('b')])
+
+    def test_CsvForBothEngines_EnginesAgree(self):
+        with open('examples/hello.asm', encoding='utf-8') as file:
+            _, codes = translate(file.read())
+        filename = self.write('tokens.csv', ''.join(f'{tick},x\n' for tick in range(4, 400, 9)))
+
+        result = cross_check(codes, 0, True, int_tokens=CsvSchedule(filename))
+
+        self.assertEqual(len(result.output), len('hello world'))
+
+
+if __name__ == '__main__':
+    unittest.main()
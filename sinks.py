@@ -0,0 +1,119 @@
+# pylint: disable=missing-module-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-class-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-function-docstring  # чтобы не быть Капитаном Очевидностью
+# pylint: disable=line-too-long               # строки с ожидаемым выводом
+
+from collections import deque
+from typing import Callable, List, TextIO
+
+
+class OutputSink():
+    """Приемник значений, записанных в порт вывода; сам по себе ничего не хранит.
+
+    count -- сколько значений записано, tokens() -- значения, которые приемник сохранил.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+
+    def write(self, value: int) -> None:  # pylint: disable=unused-argument
+        self.count += 1
+
+    def tokens(self) -> List[int]:
+        return []
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> 'OutputSink':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class NullSink(OutputSink):
+    """Только считает вывод, для прогонов, где важны такты, а не результат."""
+
+
+class ListSink(OutputSink):
+    """Весь вывод в списке в памяти, поведение по умолчанию."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.values: List[int] = []
+
+    def write(self, value: int) -> None:
+        self.values.append(value)
+        self.count += 1
+
+    def tokens(self) -> List[int]:
+        return self.values
+
+
+class RingSink(OutputSink):
+    """Последние capacity значений вывода."""
+
+    def __init__(self, capacity: int) -> None:
+        assert capacity > 0, 'Ring capacity is not positive'
+        super().__init__()
+        self.values: deque = deque(maxlen=capacity)
+
+    def write(self, value: int) -> None:
+        self.values.append(value)
+        self.count += 1
+
+    def tokens(self) -> List[int]:
+        return list(self.values)
+
+
+class CallbackSink(OutputSink):
+    def __init__(self, callback: Callable[[int], None]) -> None:
+        super().__init__()
+        self.callback = callback
+
+    def write(self, value: int) -> None:
+        self.callback(value)
+        self.count += 1
+
+
+class FileSink(OutputSink):
+    """Вывод в текстовый файл пачками по batch_size значений.
+
+    Значения пишутся символами, а если as_chars=False -- числами по одному в строке.
+    Значение, которое не является символом Unicode (отрицательное, суррогат, больше 0x10FFFF),
+    и в режиме символов пишется числом.
+    """
+
+    def __init__(self, target: str | TextIO, batch_size: int = 4096, as_chars: bool = True) -> None:
+        assert batch_size > 0, 'Batch size is not positive'
+        super().__init__()
+        self._owns_file = isinstance(target, str)
+        self.file: TextIO = open(target, 'w', encoding='utf-8') if self._owns_file else target  # pylint: disable=consider-using-with
+        self.batch_size = batch_size
+        self.as_chars = as_chars
+        # Уже переведенные в текст значения
+        self._batch: List[str] = []
+
+    def write(self, value: int) -> None:
+        if not self.as_chars:
+            self._batch.append(f'{value}\n')
+        elif 0 <= value < 0xD800 or 0xE000 <= value <= 0x10FFFF:
+            self._batch.append(chr(value))
+        else:
+            self._batch.append(str(value))
+        self.count += 1
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        self.file.write(''.join(self._batch))
+        self._batch.clear()
+        self.file.flush()
+
+    def close(self) -> None:
+        if self.file.closed:
+            return
+        self.flush()
+        if self._owns_file:
+            self.file.close()
@@ -0,0 +1,83 @@
+# pylint: disable=missing-module-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-class-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-function-docstring  # чтобы не быть Капитаном Очевидностью
+# pylint: disable=line-too-long               # строки с ожидаемым выводом
+
+import io
+import os
+import tempfile
+import unittest
+from machine import simulation, cross_check
+from sinks import NullSink, RingSink, CallbackSink, FileSink
+from testing import translate_example
+
+
+class SinksTests(unittest.TestCase):
+    """
+    1) Кольцо хранит только последние значения, но считает все
+    2) Файл пишется пачками и дописывается при закрытии, не символы -- числами
+    3) Обе модели пишут вывод в переданный приемник
+    """
+
+    def test_Ring_KeepsLastValues(self):
+        sink = RingSink(3)
+
+        for value in range(10):
+            sink.write(value)
+
+        self.assertEqual(sink.tokens(), [7, 8, 9])
+        self.assertEqual(sink.count, 10)
+
+    def test_File_FlushedByBatches(self):
+        target = io.StringIO()
+
+        with FileSink(target, batch_size=2) as sink:
+            for symbol in 'abc':
+                sink.write(ord(symbol))
+            self.assertEqual(target.getvalue(), 'ab')
+
+        self.assertEqual(target.getvalue(), 'abc')
+        self.assertEqual(sink.tokens(), [])
+
+    def test_FileAsNumbers_OnePerLine(self):
+        target = io.StringIO()
+
+        with FileSink(target, as_chars=False) as sink:
+            sink.write(232792560)
+            sink.write(20)
+
+        self.assertEqual(target.getvalue(), '232792560\n20\n')
+
+    def test_FileAsChars_NotCharAsNumber(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'output.txt')
+            with FileSink(filename) as sink:
+                for value in [ord('a'), -1, 0xD800, 0x110000, ord('b')]:
+                    sink.write(value)
+
+            with open(filename, encoding='utf-8') as file:
+                self.assertEqual(file.read(), 'a' + '-1' + '55296' + '1114112' + 'b')
+        self.assertEqual(sink.count, 5)
+
+    def test_BothEngines_WriteToSink(self):
+        for engine in ['circuit', 'fast']:
+            with self.subTest(engine=engine):
+                target = io.StringIO()
+                with FileSink(target) as sink:
+                    result = simulation(translate_example('hello'), 0, False, engine=engine, output=sink)
+
+                self.assertEqual(target.getvalue(), 'hello world')
+                self.assertEqual(result.output, [])
+
+    def test_CrossCheck_CallbackAndNull(self):
+        values = []
+
+        result = cross_check(translate_example('hello'), 0, False, output=CallbackSink(values.append))
+        null_result = simulation(translate_example('hello'), 0, False, output=NullSink())
+
+        self.assertEqual(''.join(map(chr, values)), 'hello world')
+        self.assertEqual(null_result.ticks, result.ticks)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,25 @@
+# pylint: disable=missing-module-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-class-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-function-docstring  # чтобы не быть Капитаном Очевидностью
+# pylint: disable=line-too-long               # строки с ожидаемым выводом
+
+from typing import List
+
+from machine import DataPath
+from translator import SymbolTable, translate
+
+
+def translate_example(name: str, symbols: SymbolTable | None = None) -> List[int]:
+    """Машинный код examples/<name>.asm; symbols, если передана, заполняется метками программы."""
+    with open(f'examples/{name}.asm', encoding='utf-8') as file:
+        _, codes = translate(file.read(), symbols)
+    return codes
+
+
+def tick_state(data_path: DataPath):
+    """Все состояние тракта данных на такте: регистры, память, токены и провода."""
+    return (data_path.tick, data_path.PC.state, data_path.IR.state, list(data_path.Memory.memory),
+            dict(data_path.Register_File.inner_registers), list(data_path.IO_Handler.saved_tokens),
+            data_path.IO_Handler.dip_value,
+            {name: dict(component.registers) for name, component in data_path.components.items()},
+            {name: wire.get() for name, wire in data_path.wires.items()})
@@ -0,0 +1,217 @@
+# pylint: disable=missing-module-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-class-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-function-docstring  # чтобы не быть Капитаном Очевидностью
+# pylint: disable=line-too-long               # строки с ожидаемым выводом
+
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from typing import List, Sequence, Tuple
+
+from checkpoint import restore, snapshot
+from isa import read_image
+from machine import DataPath, build_machine
+from schedule import TokenSchedule
+
+# Оценка байт на запись журнала изменений: номер инструкции, цель и два значения
+DELTA_SIZE = 2 * 8 + 2 * 32
+
+
+class Snapshot(namedtuple('Snapshot', 'position tick data')):
+    """Снимок checkpoint.snapshot перед инструкцией номер position."""
+
+
+class TimeMachine():
+    """Отладка с обратным ходом: снимки каждые interval тактов и журнал изменений по инструкциям.
+
+    Позиция -- число исполненных инструкций, машина стоит между инструкциями.
+    Журнал хранит для каждой инструкции такт её завершения и изменения регистров и памяти (было, стало).
+    Переход назад восстанавливает ближайший снимок и исполняет вперед не больше interval тактов.
+    При превышении memory_cap байт старые снимки вместе с их частью журнала отбрасываются.
+    """
+
+    def __init__(self, program: Sequence[int], text_start_adr: int = 0, is_interrupts_allowed: bool = False,
+                 memory_size: int = 512, int_tokens: Sequence[Tuple[int, str]] | None = None,
+                 interval: int = 1000, memory_cap: int = 64 << 20) -> None:
+        assert interval > 0, 'Snapshot interval is not positive'
+        # Расписание обходится заново при каждом восстановлении, поэтому не может быть одноразовым итератором
+        self.int_tokens = list(int_tokens) if int_tokens is not None else None
+        self.interval = interval
+        self.memory_cap = memory_cap
+
+        self.control_unit, self.data_path = build_machine(list(program), text_start_adr, is_interrupts_allowed,
+                                                          memory_size, self.int_tokens)
+        self.control_unit.instruction_hook = self._on_instruction
+        self.data_path.Memory.tracer = self
+
+        self.position = 0
+        # Позиция остановки по HALT, когда она уже известна; в ней машина стоит после такта выборки HALT
+        self.end: int | None = None
+        self._target: int | None = None
+        self._target_tick: int | None = None
+
+        # Журнал с позиции base: такт завершения каждой инструкции и изменения
+        self.base = 0
+        self.ticks = array('q')
+        self.delta_position = array('q')
+        # Адрес памяти или -1 - номер регистра
+        self.delta_target = array('q')
+        self.delta_old: List[int] = []
+        self.delta_new: List[int] = []
+
+        self.snapshots: List[Snapshot] = []
+        self._snapshot_bytes = 0
+        self._registers: List[int] = []
+        self._sync()
+        self._take_snapshot()
+
+    @property
+    def tick(self) -> int:
+        return self.data_path.tick
+
+    @property
+    def recorded(self) -> int:
+        """Позиция, до которой записан журнал."""
+        return self.base + len(self.ticks)
+
+    @property
+    def memory_used(self) -> int:
+        return self._snapshot_bytes + self.ticks.itemsize * len(self.ticks) + DELTA_SIZE * len(self.delta_old)
+
+    def _sync(self) -> None:
+        self._registers = list(self.data_path.Register_File.inner_registers.values())
+
+    def _take_snapshot(self) -> None:
+        data = snapshot(self.data_path, self.control_unit)
+        self.snapshots.append(Snapshot(self.position, self.tick, data))
+        self._snapshot_bytes += len(data)
+        while self.memory_used > self.memory_cap and len(self.snapshots) > 1:
+            self._drop_oldest()
+
+    def _drop_oldest(self) -> None:
+        self._snapshot_bytes -= len(self.snapshots.pop(0).data)
+        base = self.snapshots[0].position
+        del self.ticks[:base - self.base]
+        cut = bisect_left(self.delta_position, base)
+        del self.delta_position[:cut], self.delta_target[:cut], self.delta_old[:cut], self.delta_new[:cut]
+        self.base = base
+
+    def memory_write(self, address: int, value: int, previous: int) -> None:
+        """Запись в память (протокол трассы Memory.tracer): значение до записи передает Memory.write."""
+        if self.position == self.recorded and previous != value:
+            self._record(address, previous, value)
+
+    def _record(self, target: int, old: int, new: int) -> None:
+        self.delta_position.append(self.position)
+        self.delta_target.append(target)
+        self.delta_old.append(old)
+        self.delta_new.append(new)
+
+    def _on_instruction(self, data_path: DataPath) -> None:
+        if self.position == self.recorded:
+            registers = list(data_path.Register_File.inner_registers.values())
+            for number, (old, new) in enumerate(zip(self._registers, registers)):
+                if old != new:
+                    self._record(-1 - number, old, new)
+            self._registers = registers
+            self.ticks.append(data_path.tick)
+            self.position += 1
+            if data_path.tick - self.snapshots[-1].tick >= self.interval:
+                self._take_snapshot()
+        else:
+            self.position += 1
+            self._registers = list(data_path.Register_File.inner_registers.values())
+
+        if self.position == self._target or (self._target_tick is not None and data_path.tick >= self._target_tick):
+            self.control_unit.pause_requested = True
+
+    def _run(self) -> bool:
+        if self.end is not None and self.position == self.end:
+            return True
+        self.control_unit.start(self.data_path)
+        self._target = self._target_tick = None
+        if self.control_unit.halted:
+            self.end = self.position
+        return self.control_unit.halted
+
+    def run(self, instructions: int | None = None) -> bool:
+        """Исполнить вперед instructions инструкций или до HALT; True -- машина остановилась."""
+        if instructions is not None:
+            if instructions <= 0:
+                return False
+            self._target = self.position + instructions
+        return self._run()
+
+    def step(self) -> bool:
+        return self.run(1)
+
+    def goto_position(self, position: int) -> None:
+        """Встать после position инструкций; назад -- от ближайшего снимка, не больше interval тактов."""
+        assert position >= self.base, 'Position is dropped from history'
+        if self.end is not None:
+            position = min(position, self.end)
+        if position < self.position:
+            found = self.snapshots[bisect_right([snap.position for snap in self.snapshots], position) - 1]
+            # Расписание восстанавливается проматыванием, поэтому обходится с начала
+            self.data_path.IO_Handler.schedule = TokenSchedule(self.int_tokens)
+            restore(found.data, self.data_path, self.control_unit)
+            self.control_unit.halted = False
+            self.position = found.position
+            self._sync()
+        self.run(position - self.position)
+
+    def step_back(self) -> None:
+        self.goto_position(max(self.position - 1, self.base))
+
+    def goto(self, tick: int) -> None:
+        """Встать на последнюю границу инструкций не позже такта tick."""
+        if tick >= self.tick and (self.end is None or self.position < self.end):
+            self._target_tick = tick
+            self._run()
+        index = bisect_right(self.ticks, tick)
+        self.goto_position(max(self.base + index, self.snapshots[0].position))
+
+    def back_to_write(self, address: int, register: bool = False) -> int | None:
+        """Вернуться сразу за последнюю до текущей позиции инструкцию, записавшую address.
+
+        register=True -- номер регистра вместо адреса памяти. Возвращает такт записи или None, если её нет в журнале.
+        """
+        target = -1 - address if register else address
+        for number in range(bisect_left(self.delta_position, self.position) - 1, -1, -1):
+            if self.delta_target[number] == target:
+                position = self.delta_position[number]
+                self.goto_position(position + 1)
+                return self.ticks[position - self.base]
+        return None
+
+    def state(self) -> str:
+        return (f'Position {self.position}\tTick {self.tick}\tPC: {self.data_path.PC.state}\t'
+                f'Registers: {list(self.data_path.Register_File.inner_registers.values())}\t'
+                f'Output: {self.data_path.IO_Handler.saved_tokens}')
+
+
+def main(args):
+    filename, is_interrupts_enabled, *interval = args
+    image = read_image(filename)
+    machine = TimeMachine(image.words.tolist(), image.entry, is_interrupts_enabled == 'True',
+                          interval=int(interval[0]) if interval else 1000)
+    # Команды: s [n] -- вперед, b -- назад, g T -- на такт, w A / r N -- назад к записи адреса / регистра, c -- до HALT
+    for line in sys.stdin:
+        command, *operands = line.split() or ['']
+        if command == 's':
+            machine.run(int(operands[0]) if operands else 1)
+        elif command == 'b':
+            machine.step_back()
+        elif command == 'g':
+            machine.goto(int(operands[0]))
+        elif command in ('w', 'r'):
+            if machine.back_to_write(int(operands[0]), command == 'r') is None:
+                print('No write in history')
+        elif command == 'c':
+            machine.run()
+        print(machine.state())
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,71 @@
+# pylint: disable=missing-module-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-class-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-function-docstring  # чтобы не быть Капитаном Очевидностью
+# pylint: disable=line-too-long               # строки с ожидаемым выводом
+
+import unittest
+from machine import circuit_simulation
+from timetravel import TimeMachine
+from testing import translate_example
+
+
+def reference(program, is_interrupts_allowed: bool):
+    """Такт, PC и регистры после каждой инструкции прогона без остановок."""
+    states = []
+    circuit_simulation(program, 0, is_interrupts_allowed, instruction_hook=lambda data_path: states.append(
+        (data_path.tick, data_path.PC.state, list(data_path.Register_File.inner_registers.values()))))
+    return states
+
+
+def state(machine: TimeMachine):
+    return machine.tick, machine.data_path.PC.state, list(machine.data_path.Register_File.inner_registers.values())
+
+
+class TimeMachineTests(unittest.TestCase):
+    """
+    1) Шаг назад и переход к такту дают то же состояние, что и прогон без остановок
+    2) Возврат к последней записи регистра и ячейки памяти
+    3) Ограничение памяти отбрасывает старые снимки вместе с журналом
+    """
+
+    def test_StepBackAndGoto_SameAsForwardRun(self):
+        program = translate_example('prob5')
+        states = reference(program, False)
+        machine = TimeMachine(program, interval=100)
+
+        self.assertTrue(machine.run())
+        for position in [len(states) - 1, 300, 1, 450, 2]:
+            machine.goto_position(position)
+            self.assertEqual(state(machine), states[position - 1])
+            machine.step_back()
+            self.assertEqual(state(machine), states[position - 2] if position > 1 else (0, 0, [0] * 6 + [200, 0]))
+
+        for tick in [1000, 17, 2000]:
+            machine.goto(tick)
+            self.assertEqual(state(machine), [entry for entry in states if entry[0] <= tick][-1])
+
+    def test_BackToWrite_StopsAfterWrite(self):
+        program = translate_example('hello')
+        machine = TimeMachine(program, is_interrupts_allowed=True, interval=16)
+        machine.run()
+
+        tick = machine.back_to_write(1, register=True)
+        self.assertEqual(machine.tick, tick)
+        self.assertEqual(machine.data_path.Register_File.inner_registers[1], ord('o'))
+        self.assertIsNotNone(machine.back_to_write(256))
+        self.assertTrue(machine.data_path.in_interrupt)
+        self.assertIsNone(machine.back_to_write(300))
+
+    def test_MemoryCap_DropsOldHistory(self):
+        machine = TimeMachine(translate_example('prob5'), interval=50, memory_cap=4000)
+        machine.run()
+
+        self.assertGreater(machine.base, 0)
+        self.assertLessEqual(len(machine.snapshots), 8)
+        machine.goto_position(machine.base + 1)
+        with self.assertRaises(AssertionError):
+            machine.goto_position(machine.base - 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
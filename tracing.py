@@ -0,0 +1,197 @@
+# pylint: disable=missing-module-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-class-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-function-docstring  # чтобы не быть Капитаном Очевидностью
+# pylint: disable=line-too-long               # строки с ожидаемым выводом
+
+import struct
+import sys
+from enum import Enum
+from operator import itemgetter
+from typing import BinaryIO, Callable, Iterator, List, TextIO
+
+import numpy
+
+from isa import Opcode, to_word
+
+
+class TraceKind(int, Enum):
+    INSTRUCTION = 0  # Завершенная инструкция, register/value -- измененный ей регистр
+    REGISTER = 1     # Еще один регистр, измененный с прошлой инструкции (вход в прерывание)
+    INPUT = 2        # Чтение из порта ввода, value -- прочитанное значение
+    OUTPUT = 3       # Запись в порт вывода
+    MEMORY = 4       # Запись в память, address/value
+    HIGH = 5         # Старшие 32 бита значений следующей записи, если они не влезли в int32
+
+
+# Биты поля flags
+FLAG_ZERO = 1
+FLAG_POSITIVE = 2
+FLAG_INTERRUPT = 4
+# Инструкция не изменила регистров
+NO_REGISTER = 255
+
+# Запись трассы фиксированной длины, little-endian без выравнивания.
+# tick -- 64 бита: долгие прогоны уходят за 2**32 тактов; pc и address -- 32 бита: память бывает больше 64K ячеек.
+# У инструкции в address лежат адреса регистрового файла A1 | A2 << 3 | A3 << 6
+TRACE_RECORD = numpy.dtype([('kind', 'u1'), ('flags', 'u1'), ('register', 'u1'), ('reserved', 'u1'),
+                            ('tick', '<u8'), ('pc', '<u4'), ('address', '<u4'), ('ir', '<u4'),
+                            ('value', '<i4'), ('src_a', '<i4'), ('src_b', '<i4'), ('result', '<i4')])
+RECORD = struct.Struct('<BBBxQIIIiiii')
+# Заголовок файла: сигнатура, версия, длина записи, число регистров
+TRACE_MAGIC = b'CSATRACE'
+TRACE_VERSION = 2
+HEADER = struct.Struct('<8sHHI')
+
+assert RECORD.size == TRACE_RECORD.itemsize, 'Trace record layout mismatch'
+
+
+class Tracer():
+    """Запись трассы DataPath в двоичный файл вместо текстового лога.
+
+    Записи копятся в буфере на buffer_records штук и дописываются в файл целиком.
+    Регистры пишутся только измененные, полный список восстанавливает декодер.
+    """
+
+    def __init__(self, target: str | BinaryIO, register_count: int = 8, buffer_records: int = 4096) -> None:
+        assert buffer_records > 0, 'Trace buffer is empty'
+        self._owns_file = isinstance(target, str)
+        self.file: BinaryIO = open(target, 'wb') if self._owns_file else target  # pylint: disable=consider-using-with
+        self.file.write(HEADER.pack(TRACE_MAGIC, TRACE_VERSION, RECORD.size, register_count))
+
+        self.count = 0
+        self._buffer = bytearray(RECORD.size * buffer_records)
+        self._offset = 0
+        self._registers: List[int] = [0] * register_count
+        self.data_path = None
+        self._alu_ports: Callable[[List[int]], tuple] | None = None
+        self._address_ports: Callable[[List[int]], tuple] | None = None
+
+    def _append(self, *fields: int) -> None:
+        try:
+            RECORD.pack_into(self._buffer, self._offset, *fields)
+        except struct.error:
+            # Значения вне int32: сначала запись со старшими словами, затем младшие
+            RECORD.pack_into(self._buffer, self._offset, TraceKind.HIGH, 0, NO_REGISTER, *fields[3:7],
+                             *(value >> 32 for value in fields[7:]))
+            self.count += 1
+            self._offset += RECORD.size
+            if self._offset == len(self._buffer):
+                self.flush()
+            RECORD.pack_into(self._buffer, self._offset, *fields[:7], *map(to_word, fields[7:]))
+        self.count += 1
+        self._offset += RECORD.size
+        if self._offset == len(self._buffer):
+            self.flush()
+
+    def attach(self, data_path) -> None:
+        """Подключить трассу к DataPath: события ввода-вывода и памяти пишутся с его тактом."""
+        self.data_path = data_path
+        data_path.tracer = self
+        data_path.Memory.tracer = self
+        data_path.IO_Handler.tracer = self
+        # Порты, которые пишутся в запись инструкции, выбираются из списков значений по индексам
+        alu, register_file = data_path.ALU.ports, data_path.Register_File.ports
+        self._alu_ports = itemgetter(*(alu[name] for name in ['ZeroFlag', 'PositiveFlag', 'srcA', 'srcB', 'Result']))
+        self._address_ports = itemgetter(*(register_file[name] for name in ['A1', 'A2', 'A3']))
+
+    def instruction(self, data_path) -> None:
+        """Состояние DataPath после инструкции, вызывается вместо DataPath.log_state; нужен attach."""
+        tick = data_path.tick
+        registers = list(data_path.Register_File.inner_registers.values())
+        changed, value = NO_REGISTER, 0
+        if registers != self._registers:
+            for number, (old, new) in enumerate(zip(self._registers, registers)):
+                if old == new:
+                    continue
+                if changed != NO_REGISTER:
+                    self._append(TraceKind.REGISTER, 0, changed, tick, 0, 0, 0, value, 0, 0, 0)
+                changed, value = number, new
+            self._registers = registers
+
+        zero_flag, positive_flag, src_a, src_b, result = self._alu_ports(data_path.ALU.values)
+        a1, a2, a3 = self._address_ports(data_path.Register_File.values)
+        flags = zero_flag | positive_flag << 1 | data_path.in_interrupt << 2
+        self._append(TraceKind.INSTRUCTION, flags, changed, tick, data_path.PC.state, a1 | a2 << 3 | a3 << 6,
+                     data_path.IR.state, value, src_a, src_b, result)
+
+    def input(self, value: int) -> None:
+        self._append(TraceKind.INPUT, 0, NO_REGISTER, self.data_path.tick, 0, 0, 0, value, 0, 0, 0)
+
+    def output(self, value: int) -> None:
+        self._append(TraceKind.OUTPUT, 0, NO_REGISTER, self.data_path.tick, 0, 0, 0, value, 0, 0, 0)
+
+    def memory_write(self, address: int, value: int, _previous: int = 0) -> None:
+        self._append(TraceKind.MEMORY, 0, NO_REGISTER, self.data_path.tick, 0, address, 0, value, 0, 0, 0)
+
+    def flush(self) -> None:
+        self.file.write(memoryview(self._buffer)[:self._offset])
+        self._offset = 0
+        self.file.flush()
+
+    def close(self) -> None:
+        if self.file.closed:
+            return
+        self.flush()
+        if self._owns_file:
+            self.file.close()
+
+    def __enter__(self) -> 'Tracer':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def read_trace(filename: str) -> tuple[numpy.ndarray, int]:
+    """Записи трассы и число регистров."""
+    with open(filename, 'rb') as file:
+        magic, version, record_size, register_count = HEADER.unpack(file.read(HEADER.size))
+        assert magic == TRACE_MAGIC, 'Not a trace file'
+        if version != TRACE_VERSION:
+            raise AttributeError('Unsupported trace version: ' + str(version))
+        assert record_size == TRACE_RECORD.itemsize, 'Unsupported trace record size'
+        return numpy.fromfile(file, dtype=TRACE_RECORD), register_count
+
+
+def render(records: numpy.ndarray, register_count: int = 8) -> Iterator[str]:
+    """Строки текстового лога, которые писал DataPath.log_state, и строки ввода-вывода."""
+    registers = [0] * register_count
+    high = None
+    for kind, flags, register, _, tick, pc, address, ir, *values in records.tolist():
+        if kind == TraceKind.HIGH:
+            high = values
+            continue
+        if high is not None:
+            values = [upper << 32 | lower & 0xFFFFFFFF for upper, lower in zip(high, values)]
+            high = None
+        value, src_a, src_b, result = values
+
+        if register != NO_REGISTER:
+            registers[register] = value
+        if kind == TraceKind.INSTRUCTION:
+            yield f'INFO {Opcode(ir & 15).name}'
+            msg = f'Tick {tick}\tPC: {pc}\tRegisters: {registers}\tSrcA: {src_a} | SrcB: {src_b} | Result: {result}\tA1: {address & 7} | A2: {(address >> 3) & 7} | A3: {address >> 6}PF: {(flags & FLAG_POSITIVE) >> 1} | ZF: {flags & FLAG_ZERO}'
+            yield f'WARNING (Int) {msg}' if flags & FLAG_INTERRUPT else f'INFO {msg}'
+        elif kind == TraceKind.INPUT:
+            yield f'INFO Readed: {value}'
+        elif kind == TraceKind.OUTPUT:
+            yield f'INFO Saved: {value}'
+
+
+def decode(filename: str, output: TextIO) -> None:
+    records, register_count = read_trace(filename)
+    for line in render(records, register_count):
+        output.write(line + '\n')
+
+
+def main(args):
+    trace_file_name, *logs_file_name = args
+    if not logs_file_name:
+        decode(trace_file_name, sys.stdout)
+        return
+    with open(logs_file_name[0], 'w', encoding='utf-8') as file:
+        decode(trace_file_name, file)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
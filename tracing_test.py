@@ -0,0 +1,95 @@
+# pylint: disable=missing-module-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-class-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-function-docstring  # чтобы не быть Капитаном Очевидностью
+# pylint: disable=line-too-long               # строки с ожидаемым выводом
+
+import io
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from isa import read_image
+from machine import simulation
+from tracing import HEADER, NO_REGISTER, RECORD, TRACE_MAGIC, TRACE_VERSION, Tracer, TraceKind, read_trace, render
+
+
+class TracingTests(unittest.TestCase):
+    """
+    1) Декодер восстанавливает текстовый лог символ в символ
+    2) Значения вне int32 проходят через запись старших слов, PC и адрес -- 32 бита, такт -- 64
+    3) Трасса другой версии не читается
+    4) Трассу пишет только схемная модель
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.filename = os.path.join(self.directory.name, 'run.trace')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def assertRendersLog(self, name: str, is_interrupts_allowed: bool, logs: str):
+        image = read_image(f'examples/{name}.out')
+        with Tracer(self.filename, buffer_records=16) as tracer:
+            simulation(image.words.tolist(), image.entry, is_interrupts_allowed, tracer=tracer)
+
+        records, register_count = read_trace(self.filename)
+        with open(logs, encoding='utf-8') as file:
+            self.assertEqual(list(render(records, register_count)), file.read().splitlines())
+        self.assertEqual(len(records), tracer.count)
+
+    def test_HelloWithInterrupts_SameAsTextLog(self):
+        self.assertRendersLog('hello', True, 'logs/hello_with_interrupts.logs')
+
+    def test_Prob5_SameAsTextLog(self):
+        self.assertRendersLog('prob5', False, 'logs/prob5.logs')
+
+    def test_WideValues_RestoredFromHighWords(self):
+        with Tracer(self.filename) as tracer:
+            tracer.data_path = SimpleNamespace(tick=3)
+            tracer.output(-1)
+            tracer.output(4655851200)
+            tracer.output(-(1 << 40))
+
+        records, _ = read_trace(self.filename)
+
+        self.assertEqual(list(records['kind']), [TraceKind.OUTPUT, TraceKind.HIGH, TraceKind.OUTPUT, TraceKind.HIGH, TraceKind.OUTPUT])
+        self.assertEqual(list(render(records)), ['INFO Saved: -1', 'INFO Saved: 4655851200', f'INFO Saved: {-(1 << 40)}'])
+
+    def test_WidePc_KeptInRecord(self):
+        with Tracer(self.filename) as tracer:
+            tracer._append(TraceKind.INSTRUCTION, 0, NO_REGISTER, 10, 70000, 0, 12, 1 << 40, 0, 0, 0)  # pylint: disable=protected-access
+            tracer.data_path = SimpleNamespace(tick=11)
+            tracer.memory_write(70001, 5)
+
+        records, _ = read_trace(self.filename)
+
+        self.assertEqual(list(records['kind']), [TraceKind.HIGH, TraceKind.INSTRUCTION, TraceKind.MEMORY])
+        self.assertEqual((int(records['pc'][1]), int(records['address'][2])), (70000, 70001))
+
+    def test_LongRun_TickPastInt32(self):
+        with Tracer(self.filename) as tracer:
+            tracer.data_path = SimpleNamespace(tick=5 << 32)
+            tracer.output(7)
+            tracer.output(1 << 40)
+
+        records, _ = read_trace(self.filename)
+
+        self.assertEqual(records['tick'].tolist(), [5 << 32] * 3)
+        self.assertEqual(list(render(records)), ['INFO Saved: 7', f'INFO Saved: {1 << 40}'])
+
+    def test_OlderVersion_ThrowsError(self):
+        with open(self.filename, 'wb') as file:
+            file.write(HEADER.pack(TRACE_MAGIC, TRACE_VERSION - 1, RECORD.size, 8))
+
+        with self.assertRaises(AttributeError):
+            read_trace(self.filename)
+
+    def test_FastEngine_ThrowsAttributeError(self):
+        with Tracer(io.BytesIO()) as tracer:
+            with self.assertRaises(AttributeError):
+                simulation([12], engine='fast', tracer=tracer)
+
+
+if __name__ == '__main__':
+    unittest.main()
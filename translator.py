@@ -9,9 +9,11 @@ import json
 import sys
 import re
 
-from typing import Dict, List
+from typing import Dict, List, Tuple
 from collections import namedtuple
 
+import numpy
+
 import isa
 
 
@@ -42,7 +44,7 @@ class SectionType(str, Enum):
     CODE = '.text'
 
 
-class Token(namedtuple('Token', 'TokenType value')):
+class Token(namedtuple('Token', 'TokenType value line pos', defaults=(0, 0))):
     """Класс для токенов"""
 
 
@@ -50,51 +52,81 @@ class MemoryCell(namedtuple('MemoryCell', 'section imm_type reg1 reg2 reg3 imm o
     """Класс для парсинга в код ячеек памяти"""
 
 
-def lexical_analysis(code: str) -> List[Token]:
-    tokens: List[Token] = []
+class SymbolTable(namedtuple('SymbolTable', 'labels data lines')):
+    """Таблица символов: метки кода и данных с адресами ячеек, строка исходника для каждой ячейки (0 у перехода на _start)."""
 
-    patterns: Dict[TokenType, str] = {
-        TokenType.KEYWORD: r"section",
-        TokenType.COMMENT: r";.*$",
-        TokenType.SYMBOL: r"[\:\+\-\,\(\)]",
-        TokenType.NUMBER_LITERAL: r"[0-9]+",
-        TokenType.CHAR_LITERAL: r"'\s*[a-z]*'",
-        TokenType.STRING_LITERAL: r".?[a-z]+[0-9]*",
-        TokenType.EOL: r"\n",
-        TokenType.WHITESPACE: r"\s+"
-    }
+    def label_of(self, address: int) -> str | None:
+        """Ближайшая метка кода не дальше address (из нескольких на одной ячейке -- последняя), None вне программы или до первой метки."""
+        if not 0 <= address < len(self.lines):
+            return None
+        found, cell = None, -1
+        for label, label_cell in self.labels.items():
+            if cell <= label_cell <= address:
+                found, cell = label, label_cell
+        return found
 
-    cur_pos = 0
-    while cur_pos < len(code):
-        found = False
 
-        for lexem_type, lexem_re in patterns.items():
-            res = re.match(lexem_re, code[cur_pos:],
-                           re.MULTILINE | re.IGNORECASE)
+# Порядок альтернатив важен: как и раньше, побеждает первый подошедший шаблон
+LEXEM_PATTERNS: Dict[TokenType, str] = {
+    TokenType.KEYWORD: r"section",
+    TokenType.COMMENT: r";.*$",
+    TokenType.SYMBOL: r"[\:\+\-\,\(\)]",
+    TokenType.NUMBER_LITERAL: r"[0-9]+",
+    TokenType.CHAR_LITERAL: r"'\s*[a-z]*'",
+    TokenType.STRING_LITERAL: r".?[a-z]+[0-9]*",
+    TokenType.EOL: r"\n",
+    TokenType.WHITESPACE: r"\s+"
+}
 
-            if res is not None:
-                found = True
-                end_pos = cur_pos + res.end()
-                if lexem_type not in (TokenType.COMMENT, TokenType.WHITESPACE):
-                    tokens.append(
-                        Token(lexem_type, code[cur_pos:end_pos].strip().lower()))
-                break
+LEXER = re.compile('|'.join([f'(?P<{lexem_type.name}>{lexem_re})' for lexem_type, lexem_re in LEXEM_PATTERNS.items()] +
+                            ['(?P<MISMATCH>.)']),
+                   re.MULTILINE | re.IGNORECASE)
 
-        cur_pos = end_pos
-        assert found is True, 'Не распознало лексему'
+# Лексемы, которые попадают в поток токенов
+LEXEM_TYPES: Dict[str, TokenType] = {lexem_type.name: lexem_type for lexem_type in LEXEM_PATTERNS
+                                     if lexem_type not in (TokenType.COMMENT, TokenType.EOL, TokenType.WHITESPACE)}
 
-    return tokens
 
+def lexical_analysis(code: str) -> List[Token]:
+    tokens: List[Token] = []
+    append = tokens.append
+    lexem_types = LEXEM_TYPES
+
+    line = 1
+    line_start = -1
+    for res in LEXER.finditer(code):
+        lexem_name = res.lastgroup
+
+        if lexem_name in lexem_types:
+            lexem = res.group()
+            value = lexem.strip()
+            cur_pos = res.start()
+            if value is not lexem:
+                cur_pos += lexem.index(value[0])
+            append(Token(lexem_types[lexem_name], value.lower(), line, cur_pos - line_start))
+        elif lexem_name == 'EOL':
+            cur_pos = res.start()
+            append(Token(TokenType.EOL, '', line, cur_pos - line_start))
+            line += 1
+            line_start = cur_pos
+        elif lexem_name == 'WHITESPACE':
+            cur_pos, end_pos = res.span()
+            newlines = code.count('\n', cur_pos, end_pos)
+            if newlines:
+                line += newlines
+                line_start = code.rindex('\n', cur_pos, end_pos)
+        elif lexem_name == 'MISMATCH':
+            raise AssertionError(f'Не распознало лексему в строке {line}, позиция {res.start() - line_start}')
 
-def shift_and_mask(value: int, shift_length: int, mask: int, length: int) -> int:
-    masked_value = value & mask
-    while masked_value > (2 ** (length) - 1):
-        masked_value = masked_value >> 1
-    return masked_value << shift_length
+    return tokens
 
 
-def generate(tokens: List[Token]) -> any:
+def generate(tokens: List[Token], symbols: SymbolTable | None = None) -> any:
+    """Ячейки памяти и машинные слова; symbols, если передана, заполняется метками и строками ячеек."""
     memory: List[MemoryCell] = []
+    # Строка исходника, из которой получена каждая ячейка
+    cell_lines: List[int] = []
+    line = 0
 
     # Add stub to later put it jmp on .start
     jump_stub = MemoryCell(None, None, None, None, None, None, 'JMP')
@@ -103,21 +135,10 @@ def generate(tokens: List[Token]) -> any:
     # Map with label and its cell
     label_to_cell: Dict[str, int] = {}
 
-    no_args_op: List[str] = [
-        'halt'
-    ]
-
-    one_args_op: List[str] = [
-        'jmp', 'jg', 'bne', 'beq'
-    ]
-
-    two_args_op: List[str] = [
-        'ld', 'sw', 'cmp'
-    ]
-
-    three_args_op: List[str] = [
-        'addi', 'add', 'rem', 'mul', 'div'
-    ]
+    no_args_op: List[str] = operations_with_layout(isa.OperandLayout.NONE)
+    one_args_op: List[str] = operations_with_layout(isa.OperandLayout.LABEL)
+    two_args_op: List[str] = operations_with_layout(isa.OperandLayout.SHIFT)
+    three_args_op: List[str] = operations_with_layout(isa.OperandLayout.IMMEDIATE, isa.OperandLayout.REGISTERS)
 
     registers: Dict[str, int] = {
         'x0': 0, 'zr': 0, 'ZR': 0,
@@ -135,6 +156,8 @@ def generate(tokens: List[Token]) -> any:
 
     while num < len(tokens):
         cur_token = tokens[num]
+        cell_lines.extend([line] * (len(memory) - len(cell_lines)))
+        line = cur_token.line
 
         if cur_token.value == 'section':
             cur_section_place = num + 1
@@ -257,100 +280,103 @@ def generate(tokens: List[Token]) -> any:
     memory[0] = MemoryCell(SectionType.CODE, ImmType.STRING, 0, None,
                            None, '_start', 'jmp')
 
-    values = []
+    if symbols is not None:
+        cell_lines.extend([line] * (len(memory) - len(cell_lines)))
+        for label, cell in label_to_cell.items():
+            is_data = cell < len(memory) and memory[cell].section == SectionType.DATA
+            (symbols.data if is_data else symbols.labels)[label] = cell
+        symbols.lines[:] = cell_lines
+
+    values = encode_cells(memory, label_to_cell, registers)
+    return memory, values.tolist()
+
+
+def operations_with_layout(*layouts: isa.OperandLayout) -> List[str]:
+    return [mnemonic for mnemonic, instruction_format in isa.INSTRUCTIONS.items()
+            if instruction_format.layout in layouts]
+
+
+def encode_cells(memory: List[MemoryCell], label_to_cell: Dict[str, int], registers: Dict[str, int]) -> numpy.ndarray:
+    """Закодировать ячейки памяти в машинные слова по таблице isa.INSTRUCTIONS.
+
+    Ячейки собираются в список строк (опкод или слово данных, reg1, reg2, reg3, imm, данные ли),
+    кодирует их один вызов isa.encode_batch.
+    """
+    # Мнемоника -- (опкод, операнды -- регистры, есть ли операнды)
+    formats = {mnemonic: (int(instruction_format.opcode), instruction_format.layout == isa.OperandLayout.REGISTERS,
+                          instruction_format.layout != isa.OperandLayout.NONE)
+               for mnemonic, instruction_format in isa.INSTRUCTIONS.items()}
+    rows: List[Tuple[int, ...]] = []
+    append = rows.append
+
     for cell in memory:
-        res = 0
-        imm = 0
+        if cell.section is SectionType.DATA:
+            append((cell.opcode, 0, 0, 0, 0, 1))
+            continue
 
-        if cell.section == SectionType.DATA:
-            values.append(cell.opcode)
+        opcode, by_registers, has_operands = formats[cell.opcode]
+        if by_registers:
+            append((opcode, cell.reg1, cell.reg2, registers[cell.imm], 0, 0))
+        elif has_operands:
+            imm = int(cell.imm) if cell.imm_type is ImmType.NUMBER else label_to_cell[cell.imm]
+            append((opcode, cell.reg1, cell.reg2 or 0, 0, imm, 0))
         else:
-            if cell.opcode in one_args_op:
-                if cell.imm_type == ImmType.NUMBER:
-                    imm = int(cell.imm)
-                else:
-                    imm = label_to_cell[cell.imm]
-
-                res += shift_and_mask(imm, 10, 127, 7)
-                res += shift_and_mask(cell.reg1, 7, 7, 3)
-
-            if cell.opcode in two_args_op:
-                if cell.imm_type == ImmType.NUMBER:
-                    imm = int(cell.imm)
-                else:
-                    imm = label_to_cell[cell.imm]
-
-                if cell.opcode in ['sw', 'cmp']:
-                    res += shift_and_mask(imm, 13, 120, 4)
-                    res += shift_and_mask(cell.reg1, 10, 7, 3)
-                    res += shift_and_mask(imm, 4, 7, 3)
-                else:
-                    res += shift_and_mask(imm, 10, 127, 7)
-                    res += shift_and_mask(cell.reg1, 4, 7, 3)
-                res += shift_and_mask(cell.reg2, 7, 7, 3)
-
-            if cell.opcode in three_args_op:
-                if cell.opcode == 'addi':
-                    if cell.imm_type == ImmType.NUMBER:
-                        imm = int(cell.imm)
-                    else:
-                        imm = label_to_cell[cell.imm]
-                    res += shift_and_mask(imm, 10, 127, 7)
-                else:
-                    reg3 = registers[cell.imm]
-                    res += shift_and_mask(reg3, 10, 7, 3)
-                res += shift_and_mask(cell.reg2, 7, 7, 3)
-                res += shift_and_mask(cell.reg1, 4, 7, 3)
-
-            if cell.opcode == 'addi':
-                res += 0
-            elif cell.opcode == 'add':
-                res += 1
-            elif cell.opcode == 'rem':
-                res += 2
-            elif cell.opcode == 'mul':
-                res += 3
-            elif cell.opcode == 'div':
-                res += 4
-            elif cell.opcode == 'ld':
-                res += 5
-            elif cell.opcode == 'sw':
-                res += 6
-            elif cell.opcode == 'cmp':
-                res += 7
-            elif cell.opcode == 'jmp':
-                res += 8
-            elif cell.opcode == 'jg':
-                res += 9
-            elif cell.opcode == 'bne':
-                res += 10
-            elif cell.opcode == 'beq':
-                res += 11
-            else:
-                res += 12
-            values.append(res)
-    return memory, values
-
-
-def translate(code: str) -> List[MemoryCell]:
+            append((opcode, 0, 0, 0, 0, 0))
+
+    table = numpy.array(rows, dtype=numpy.uint32).reshape(len(rows), len(isa.OPERANDS) + 2)
+    is_data = table[:, -1] != 0
+    words = isa.encode_batch(numpy.where(is_data, 0, table[:, 0]), table[:, 1:-1])
+    return numpy.where(is_data, table[:, 0], words)
+
+
+def layout_sections(memory: List[MemoryCell]) -> List[isa.Section]:
+    """Разбить память на непрерывные участки секций."""
+    sections: List[isa.Section] = []
+    for num, cell in enumerate(memory):
+        if sections and sections[-1].name == cell.section.value:
+            sections[-1] = sections[-1]._replace(length=sections[-1].length + 1)
+        else:
+            sections.append(isa.Section(cell.section.value, num, 1))
+    return sections
+
+
+def translate(code: str, symbols: SymbolTable | None = None) -> List[MemoryCell]:
     tokens: List[Token] = lexical_analysis(code)
-    codes: List[MemoryCell] = generate(tokens)
+    codes: List[MemoryCell] = generate(tokens, symbols)
 
     return codes
 
 
+def new_symbol_table() -> SymbolTable:
+    return SymbolTable({}, {}, [])
+
+
+def write_symbols(filename: str, symbols: SymbolTable) -> None:
+    with open(filename, mode='w', encoding='utf-8') as file:
+        file.write(json.dumps(symbols._asdict(), indent=4))
+
+
+def read_symbols(filename: str) -> SymbolTable:
+    with open(filename, encoding='utf-8') as file:
+        return SymbolTable(**json.load(file))
+
+
 def main(args):
-    source, target, logs = args
+    source, target, logs, *symbols_file = args
 
     with open(source, mode='r', encoding='utf-8') as file:
         code = file.read()
 
-    details, codes = translate(code)
+    symbols = new_symbol_table()
+    details, codes = translate(code, symbols)
 
     with open(logs, mode='w', encoding='utf-8') as file:
         file.write(json.dumps(details, indent=4))
 
-    isa.write_code(target, codes)
+    # Ячейка 0 хранит переход на _start
+    isa.write_code(target, codes, 0, layout_sections(details))
+    if symbols_file:
+        write_symbols(symbols_file[0], symbols)
 
 
 if __name__ == '__main__':
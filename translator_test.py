@@ -0,0 +1,76 @@
+# pylint: disable=missing-module-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-class-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-function-docstring  # чтобы не быть Капитаном Очевидностью
+# pylint: disable=line-too-long               # строки с ожидаемым выводом
+
+import unittest
+from translator import lexical_analysis, new_symbol_table, translate, Token, TokenType
+
+
+class LexicalAnalysisTests(unittest.TestCase):
+    """
+    1) Инструкция разбирается в поток токенов
+    2) Токены хранят строку и позицию
+    3) Комментарии и пробелы пропускаются, пробелы перед переводом строки съедают EOL
+    4) Нераспознанная лексема
+    """
+
+    def test_Instruction_ReceiveTokens(self):
+        tokens = lexical_analysis('sw x4, +121(ZR)')
+
+        self.assertEqual([(token.TokenType, token.value) for token in tokens], [
+            (TokenType.STRING_LITERAL, 'sw'),
+            (TokenType.STRING_LITERAL, 'x4'),
+            (TokenType.SYMBOL, ','),
+            (TokenType.SYMBOL, '+'),
+            (TokenType.NUMBER_LITERAL, '121'),
+            (TokenType.SYMBOL, '('),
+            (TokenType.STRING_LITERAL, 'zr'),
+            (TokenType.SYMBOL, ')'),
+        ])
+
+    def test_SeveralLines_ReceiveLineAndPosition(self):
+        tokens = lexical_analysis("section .data\n  h: 'h'\n")
+
+        self.assertEqual(tokens, [
+            Token(TokenType.KEYWORD, 'section', 1, 1),
+            Token(TokenType.STRING_LITERAL, '.data', 1, 9),
+            Token(TokenType.EOL, '', 1, 14),
+            Token(TokenType.STRING_LITERAL, 'h', 2, 3),
+            Token(TokenType.SYMBOL, ':', 2, 4),
+            Token(TokenType.CHAR_LITERAL, "'h'", 2, 6),
+            Token(TokenType.EOL, '', 2, 9),
+        ])
+
+    def test_CommentsAndTrailingSpaces_Skipped(self):
+        tokens = lexical_analysis('halt ; stop\nhalt \nhalt')
+
+        self.assertEqual([(token.TokenType, token.value, token.line) for token in tokens], [
+            (TokenType.STRING_LITERAL, 'halt', 1),
+            (TokenType.EOL, '', 1),
+            (TokenType.STRING_LITERAL, 'halt', 2),
+            (TokenType.STRING_LITERAL, 'halt', 3),
+        ])
+
+    def test_UnknownLexem_ThrowsAssert(self):
+        with self.assertRaises(AssertionError):
+            lexical_analysis('halt\n  #')
+
+
+class SymbolTableTests(unittest.TestCase):
+    """
+    1) Метки кода и данных, строки исходника ячеек и ближайшая метка адреса
+    """
+
+    def test_Program_ReceiveLabelsAndLines(self):
+        symbols = new_symbol_table()
+        translate("section .data\nh: 'h'\nsection .text\n_start:\n  ld x4, +h(ZR)\n.loop:\n\n  jmp .loop\n  halt", symbols)
+
+        self.assertEqual(symbols.labels, {'_start': 2, '.loop': 3})
+        self.assertEqual(symbols.data, {'h': 1})
+        self.assertEqual(symbols.lines, [0, 2, 5, 8, 9])
+        self.assertEqual([symbols.label_of(address) for address in range(6)], [None, None, '_start', '.loop', '.loop', None])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,231 @@
+# pylint: disable=missing-module-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-class-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-function-docstring  # чтобы не быть Капитаном Очевидностью
+# pylint: disable=line-too-long               # строки с ожидаемым выводом
+
+import json
+import math
+import random
+import sys
+from collections import namedtuple
+from typing import Dict, List, Tuple
+
+from components import IOMemoryCell
+from emulator import BRANCH_TICKS, HALT_TICKS, INSTRUCTION_TICKS
+
+# Код должен закончиться до ячеек ввода-вывода: выборка из них -- ошибка, а метки кодируются 7 битами
+MAX_PROGRAM_CELLS = IOMemoryCell.IN.value
+# Аккумулятор x2 приводится по этому модулю после каждой итерации и в операциях, которые могут его раздуть
+MODULUS = 127
+MAX_IMMEDIATE = 127
+# Счетчики циклов по уровням: x1 и x7 портит прерывание, x6 хранит вектор, x2 и x3 -- аккумулятор и временный
+COUNTERS = ('x4', 'x5', 'x1', 'x7', 'x6')
+INTERRUPT_SAFE_COUNTERS = 2
+
+
+class WorkloadSpec(namedtuple('WorkloadSpec', 'instructions depth body branch_density memory_ratio io_ratio interrupt_period seed max_tokens',
+                              defaults=(10 ** 4, 2, 16, 0.2, 0.2, 0.1, None, 0, 1000))):
+    """Параметры нагрузки.
+
+    instructions -- примерное число исполненных инструкций, depth -- вложенность циклов, body -- операций в теле
+    самого внутреннего цикла; доли операций тела: условные переходы, чтения памяти, ввод-вывод (остальное --
+    арифметика). interrupt_period -- токен прерывания каждые столько тактов (не больше max_tokens токенов),
+    None -- без прерываний, тогда тело читает и порт ввода.
+
+    Прерывание посреди sw выводит не то значение: контекст сохраняет результат АЛУ и IR, но не RD2.
+    Поэтому с прерываниями ввод-вывод тела -- это сами прерывания (обработчик читает порт ввода),
+    программа выводит только итог, а токены приходят в первой половине прогона.
+    """
+
+
+class Workload(namedtuple('Workload', 'source schedule output instructions ticks memory_size interrupts spec')):
+    """Сгенерированная программа, расписание ввода и ожидаемый результат.
+
+    instructions и ticks считают переход на _start и HALT, но не инструкции обработчика; с прерываниями ticks
+    зависят от моментов их прихода и не предсказываются (None), вывод от прерываний не зависит:
+    обработчик пишет только x1.
+    """
+
+
+class _Builder():
+    """Текст программы и параллельно код на Python, который считает вывод, инструкции и такты."""
+
+    def __init__(self) -> None:
+        self.lines: List[str] = []
+        self.python: List[str] = []
+        self.indent = 1
+        self.labels = 0
+
+    def label(self, prefix: str) -> str:
+        self.labels += 1
+        return f'.{prefix}{self.labels}'
+
+    def asm(self, *lines: str) -> None:
+        self.lines += ['    ' + line if not line.endswith(':') else line for line in lines]
+
+    def py(self, *lines: str) -> None:
+        self.python += ['    ' * self.indent + line for line in lines]
+
+    def cost(self, instructions: int, branches: int = 0) -> None:
+        """Учесть линейный участок: instructions инструкций, из них branches переходов."""
+        self.py(f'n += {instructions}', f't += {(instructions - branches) * INSTRUCTION_TICKS + branches * BRANCH_TICKS}')
+
+    @property
+    def cells(self) -> int:
+        return sum(1 for line in self.lines if not line.endswith(':'))
+
+
+def limit_code(register: str, limit: int) -> List[str]:
+    """Загрузить limit в register: цифры по основанию 128, сдвиг удвоениями."""
+    digits: List[int] = []
+    while True:
+        digits.insert(0, limit % (MAX_IMMEDIATE + 1))
+        limit //= MAX_IMMEDIATE + 1
+        if limit == 0:
+            break
+    lines = [f'addi {register}, x0, {digits[0]}']
+    for digit in digits[1:]:
+        lines += [f'add {register}, {register}, {register}'] * 7 + [f'addi {register}, {register}, {digit}']
+    return lines
+
+
+def _body(builder: _Builder, spec: WorkloadSpec, rng: random.Random, data: List[int]) -> None:
+    for _ in range(spec.body):
+        choice = rng.random()
+        if choice < spec.branch_density:
+            skip = builder.label('s')
+            threshold, step = rng.randrange(MODULUS), rng.randrange(1, MAX_IMMEDIATE + 1)
+            builder.asm(f'addi x3, x0, {threshold}', 'cmp x2, +0(x3)', f'jg {skip}', f'addi x2, x2, {step}', skip + ':')
+            builder.cost(3, 1)
+            builder.py(f'if x2 <= {threshold}:', f'    x2 += {step}', '    n += 1', f'    t += {INSTRUCTION_TICKS}')
+        elif choice < spec.branch_density + spec.memory_ratio:
+            cell = rng.randrange(len(data))
+            builder.asm(f'ld x3, +d{cell}(ZR)', 'add x2, x2, x3')
+            builder.cost(2)
+            builder.py(f'x2 += {data[cell]}')
+        elif choice < spec.branch_density + spec.memory_ratio + spec.io_ratio and spec.interrupt_period is None:
+            if rng.random() < 0.5:
+                builder.asm(f'ld x3, +{IOMemoryCell.IN.value}(ZR)', 'add x2, x2, x3', f'addi x3, x0, {MODULUS}', 'rem x2, x2, x3')
+                builder.cost(4)
+                builder.py(f'x2 = (x2 + dip) % {MODULUS}')
+            else:
+                builder.asm(f'sw x2, +{IOMemoryCell.OUT.value}(ZR)')
+                builder.cost(1)
+                builder.py('output.append(x2)', 'dip = x2')
+        elif rng.random() < 0.5:
+            step = rng.randrange(1, MAX_IMMEDIATE + 1)
+            builder.asm(f'addi x2, x2, {step}')
+            builder.cost(1)
+            builder.py(f'x2 += {step}')
+        else:
+            factor = rng.randrange(2, 8)
+            builder.asm(f'addi x3, x0, {factor}', 'mul x2, x2, x3', f'addi x3, x0, {MODULUS}', 'rem x2, x2, x3')
+            builder.cost(4)
+            builder.py(f'x2 = x2 * {factor} % {MODULUS}')
+    builder.asm(f'addi x3, x0, {MODULUS}', 'rem x2, x2, x3')
+    builder.cost(2)
+    builder.py(f'x2 %= {MODULUS}')
+
+
+def _loops(builder: _Builder, spec: WorkloadSpec, rng: random.Random, data: List[int], limits: List[int]) -> None:
+    counter, limit = COUNTERS[len(limits) - 1], limits[0]
+    loop = builder.label('l')
+    builder.asm(f'add {counter}, x0, x0', loop + ':')
+    builder.cost(1)
+    builder.py(f'for _ in range({limit}):')
+    builder.indent += 1
+    if len(limits) > 1:
+        _loops(builder, spec, rng, data, limits[1:])
+    else:
+        _body(builder, spec, rng, data)
+    # Конец итерации: счетчик + 1, предел во временный регистр, переход назад, пока предел больше счетчика
+    load = limit_code('x3', limit)
+    builder.asm(f'addi {counter}, {counter}, 1', *load, f'cmp x3, +0({counter})', f'jg {loop}')
+    builder.cost(len(load) + 3, 1)
+    builder.indent -= 1
+
+
+def loop_limits(spec: WorkloadSpec, iteration_instructions: int) -> List[int]:
+    """Итераций на уровнях вложенности, чтобы тело исполнилось около instructions / iteration_instructions раз."""
+    total = max(1, round(spec.instructions / iteration_instructions))
+    inner = max(1, round(total ** (1 / spec.depth)))
+    limits = [inner] * (spec.depth - 1)
+    limits.insert(0, max(1, round(total / inner ** (spec.depth - 1))))
+    return limits
+
+
+def generate_workload(spec: WorkloadSpec = WorkloadSpec()) -> Workload:
+    """Программа по параметрам spec с расписанием и ожидаемым выводом, посчитанным без симулятора."""
+    interrupts = spec.interrupt_period is not None
+    assert 1 <= spec.depth <= (INTERRUPT_SAFE_COUNTERS if interrupts else len(COUNTERS)), 'Unsupported loop depth'
+    assert spec.body >= 0 and spec.instructions > 0, 'Workload is empty'
+    rng = random.Random(spec.seed)
+    data = [rng.randrange(ord('a'), ord('z') + 1) for _ in range(8)]
+
+    # Тело строится дважды: первый раз -- чтобы узнать его длину и подобрать пределы циклов
+    probe = _Builder()
+    _body(probe, spec, random.Random(spec.seed), data)
+    limits = loop_limits(spec, max(1, sum(1 for line in probe.lines if not line.endswith(':'))))
+
+    builder = _Builder()
+    builder.py('n, t = 1, ' + str(BRANCH_TICKS))
+    builder.py('x2, dip, output = 0, 0, []')
+    builder.asm('add x2, x0, x0')
+    builder.cost(1)
+    _loops(builder, spec, random.Random(spec.seed), data, limits)
+    builder.asm(f'sw x2, +{IOMemoryCell.OUT.value}(ZR)', 'halt')
+    builder.cost(1)
+    builder.py('output.append(x2)', 'n += 1', f't += {HALT_TICKS}', 'return output, n, t')
+
+    lines = ['section .data'] + [f"d{cell}: '{chr(value)}'" for cell, value in enumerate(data)] + \
+            ['section .text', '_start:'] + builder.lines
+    # Ячейка 0 -- переход на _start
+    assert 1 + len(data) + builder.cells <= MAX_PROGRAM_CELLS, 'Program does not fit before IO cells, reduce body or depth'
+
+    namespace: Dict[str, object] = {}
+    exec(compile('\n'.join(['def run():'] + builder.python), '<workload>', 'exec'), namespace)  # pylint: disable=exec-used
+    output, instructions, ticks = namespace['run']()
+
+    schedule: List[Tuple[int, str]] = []
+    if interrupts:
+        count = min(spec.max_tokens, ticks // 2 // spec.interrupt_period)
+        schedule = [(spec.interrupt_period * number, chr(ord('a') + number % 26)) for number in range(1, count + 1)]
+    return Workload('\n'.join(lines) + '\n', schedule, output, instructions, None if interrupts else ticks,
+                    512, interrupts, spec)
+
+
+def straight_line_source(instructions: int, seed: int = 0) -> str:
+    """Линейная программа из instructions арифметических инструкций и HALT -- нагрузка только для транслятора.
+
+    Длиннее MAX_PROGRAM_CELLS она не исполняется: код заходит на ячейки ввода-вывода.
+    """
+    rng = random.Random(seed)
+    body = ['addi x2, x2, {}', 'add x3, x3, x2', 'cmp x2, +{}(x3)', 'mul x4, x2, x3']
+    lines = ['section .text', '_start:'] + [rng.choice(body).format(rng.randrange(MAX_IMMEDIATE + 1))
+                                             for _ in range(instructions)] + ['halt']
+    return '\n'.join(lines) + '\n'
+
+
+def main(args):
+    """workload.py <program.asm> <schedule.csv> <expected.json> [поле=значение ...] -- поля WorkloadSpec."""
+    source, schedule, expected, *fields = args
+    values: Dict[str, object] = {}
+    for field in fields:
+        name, value = field.split('=', 1)
+        values[name] = None if value == 'None' else float(value) if '.' in value else int(value)
+    workload = generate_workload(WorkloadSpec(**values))
+
+    with open(source, 'w', encoding='utf-8') as file:
+        file.write(workload.source)
+    with open(schedule, 'w', encoding='utf-8') as file:
+        file.writelines(f'{tick},{value}\n' for tick, value in workload.schedule)
+    with open(expected, 'w', encoding='utf-8') as file:
+        file.write(json.dumps({'output': workload.output, 'instructions': workload.instructions, 'ticks': workload.ticks,
+                               'memory_size': workload.memory_size, 'interrupts': workload.interrupts,
+                               'spec': workload.spec._asdict()}, indent=4))
+    print(f'{workload.instructions} instructions, {workload.ticks} ticks, {len(workload.output)} outputs, '
+          f'{len(workload.schedule)} tokens, {math.ceil(len(workload.source) / 1024)} KB of source')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
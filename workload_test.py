@@ -0,0 +1,60 @@
+# pylint: disable=missing-module-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-class-docstring     # чтобы не быть Капитаном Очевидностью
+# pylint: disable=missing-function-docstring  # чтобы не быть Капитаном Очевидностью
+# pylint: disable=line-too-long               # строки с ожидаемым выводом
+
+import unittest
+from machine import ENGINES
+from translator import translate
+from workload import WorkloadSpec, generate_workload, straight_line_source
+
+
+def run(workload, engine: str):
+    _, program = translate(workload.source)
+    retired = []
+    result = ENGINES[engine](program, 0, workload.interrupts, workload.memory_size, workload.schedule,
+                             instruction_hook=retired.append)
+    # HALT хук не видит
+    return result, len(retired) + 1
+
+
+class WorkloadTests(unittest.TestCase):
+    """
+    1) Вывод, инструкции и такты нагрузки совпадают с моделями
+    2) С прерываниями вывод предсказан, токены приходят в первой половине прогона
+    3) Размер нагрузки по числу инструкций и вложенности, линейная программа для транслятора
+    """
+
+    def test_Workload_MatchesEngines(self):
+        for spec in [WorkloadSpec(2000, 1, seed=1), WorkloadSpec(5000, 3, 8, 0.3, 0.3, 0.3, seed=2)]:
+            workload = generate_workload(spec)
+            for engine in ['fast', 'circuit']:
+                with self.subTest(spec=spec, engine=engine):
+                    result, instructions = run(workload, engine)
+                    self.assertEqual(result.output, workload.output)
+                    self.assertEqual((instructions, result.ticks), (workload.instructions, workload.ticks))
+
+    def test_Interrupts_OutputPredicted(self):
+        workload = generate_workload(WorkloadSpec(4000, 2, interrupt_period=13, seed=3))
+
+        self.assertIsNone(workload.ticks)
+        self.assertEqual(len(workload.output), 1)
+        self.assertGreater(len(workload.schedule), 100)
+        for engine in ['fast', 'circuit']:
+            result, _ = run(workload, engine)
+            self.assertEqual(result.output, workload.output)
+            self.assertGreater(result.ticks, 2 * workload.schedule[-1][0])
+        with self.assertRaises(AssertionError):
+            generate_workload(WorkloadSpec(depth=3, interrupt_period=13))
+
+    def test_Size_FollowsSpec(self):
+        for depth in range(1, 6):
+            workload = generate_workload(WorkloadSpec(10 ** 5, depth, seed=depth))
+            self.assertAlmostEqual(workload.instructions / 10 ** 5, 1, delta=0.25)
+
+        _, words = translate(straight_line_source(1000))
+        self.assertEqual(len(words), 1002)
+
+
+if __name__ == '__main__':
+    unittest.main()